@@ -10,6 +10,10 @@ Step:
     varied separately
 
 Reference: https://github.com/gem5bootcamp/2024/blob/main/materials/02-Using-gem5/01-stdlib/completed/02-processor.py
+
+With --hostperf-ticks N, host wall time, ticks, committed instructions and
+RSS are sampled every N ticks into hostperf.bin in the outdir, without
+dumping stats (simtools/hostperf.py).
 """
 
 import argparse
@@ -61,6 +65,8 @@ ap.add_argument("--width", type=int, default=4)
 ap.add_argument("--rob",   type=int, default=128)
 ap.add_argument("--lq",    type=int, default=64)
 ap.add_argument("--sq",    type=int, default=64)
+ap.add_argument("--hostperf-ticks", type=int, default=0,
+                help="sample host time, insts and RSS every N ticks (0 = off)")
 args = ap.parse_args()
 
 cache_hierarchy = MESITwoLevelCacheHierarchy(
@@ -94,5 +100,12 @@ board = SimpleBoard(
 board.set_workload(obtain_resource("x86-npb-is-size-s-run"))
 
 # Run
-simulator = Simulator(board=board)
-simulator.run()
+if args.hostperf_ticks:
+    from simtools.hostperf import HostPerfSampler
+
+    sampler = HostPerfSampler(board, every=args.hostperf_ticks)
+    simulator = Simulator(board=board, on_exit_event=sampler.handlers())
+    sampler.run(simulator)
+else:
+    simulator = Simulator(board=board)
+    simulator.run()
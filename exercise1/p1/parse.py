@@ -156,6 +156,17 @@ def compute_metrics(run_dir, stats):
         "MPKI_L2": mpki_l2,
     }
 
+CSV_COLUMNS = ["run","cpu","issueWidth","numROBEntries","LQEntries","SQEntries",
+        "simSeconds","simInsts","totalCycles","IPC","CPI",
+        "L1I_misses","L1D_misses","L2_misses","MPKI_I","MPKI_D","MPKI_L2"]
+
+def row_for_outdir(outdir):
+    """One CSV row for one run directory (used by the streaming sweep runner)."""
+    stats_path = os.path.join(str(outdir), STATS_FILE)
+    if not os.path.isfile(stats_path):
+        return None
+    return compute_metrics(str(outdir), load_stats(stats_path))
+
 def main():
     rows = []
     for run_dir in sorted(glob.glob(OUT_GLOB)):
@@ -165,9 +176,7 @@ def main():
         stats = load_stats(stats_path)
         rows.append(compute_metrics(run_dir, stats))
 
-    cols = ["run","cpu","issueWidth","numROBEntries","LQEntries","SQEntries",
-            "simSeconds","simInsts","totalCycles","IPC","CPI",
-            "L1I_misses","L1D_misses","L2_misses","MPKI_I","MPKI_D","MPKI_L2"]
+    cols = CSV_COLUMNS
 
     os.makedirs("p1", exist_ok=True)
     with open(CSV_OUT, "w", newline="") as f:
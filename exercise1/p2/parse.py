@@ -159,6 +159,20 @@ def extract_metrics(d: Dict[str, Number], outdir: Optional[Path]=None) -> Dict[s
 
 # ---------- CLI ----------
 
+CSV_COLUMNS = ["system","config","outdir",
+       "simInsts/Ops","cycles","simSeconds","hostSeconds","IPC","CPI",
+       "L1I_accesses","L1I_misses","L1I_MPKI",
+       "L1D_accesses","L1D_misses","L1D_MPKI",
+       "L1_total_MPKI",
+       "L2_accesses","L2_misses","L2_MPKI"]
+
+def row_for_outdir(outdir: Path) -> Optional[Dict[str, Optional[Number]]]:
+    """One CSV row for one outdir (used by the streaming sweep runner)."""
+    stats = Path(outdir) / "stats.txt"
+    if not stats.exists():
+        return None
+    return extract_metrics(load_stats(stats), Path(outdir))
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--roots", nargs="*", help="directories to scan recursively for stats.txt")
@@ -186,12 +200,7 @@ def main():
               else f"[{r['system']}] {r['config']}: (partial metrics)")
 
     # Write CSV
-    hdr = ["system","config","outdir",
-           "simInsts/Ops","cycles","simSeconds","hostSeconds","IPC","CPI",
-           "L1I_accesses","L1I_misses","L1I_MPKI",
-           "L1D_accesses","L1D_misses","L1D_MPKI",
-           "L1_total_MPKI",
-           "L2_accesses","L2_misses","L2_MPKI"]
+    hdr = CSV_COLUMNS
     write_header = not args.out.exists()
     with args.out.open("a", newline="") as f:
         w = csv.DictWriter(f, fieldnames=hdr)
@@ -109,6 +109,15 @@ def parse_one(stats_path: Path) -> Dict[str, Number]:
         "avgMemAccLat_ns": lat_ns,
     }
 
+CSV_COLUMNS = ["config","outdir","simSeconds","hostSeconds",
+       "bytesRead","bytesWritten","bytesTotal",
+       "throughput_Bps","avgMemAccLat_ticks","avgMemAccLat_ns"]
+
+def row_for_outdir(outdir: Path) -> Optional[Dict[str, Number]]:
+    """One CSV row for one outdir (used by the streaming sweep runner)."""
+    stats = Path(outdir) / "stats.txt"
+    return parse_one(stats) if stats.exists() else None
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--roots", nargs="+", required=True,
@@ -133,9 +142,7 @@ def main():
             print(f"{r['config']}: (incomplete)")
 
     # CSV
-    hdr = ["config","outdir","simSeconds","hostSeconds",
-           "bytesRead","bytesWritten","bytesTotal",
-           "throughput_Bps","avgMemAccLat_ticks","avgMemAccLat_ns"]
+    hdr = CSV_COLUMNS
     with open(args.out, "w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=hdr)
         w.writeheader()
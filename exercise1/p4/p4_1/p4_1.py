@@ -1,6 +1,22 @@
 """
 FS X86: KVM fast-forward, switch to detailed CPU at 2nd m5 exit, stop at 3rd.
 Stats are dump+reset at the 2nd exit so final stats.txt is ROI-only.
+
+Everything before the 2nd exit is the same for --detailed timing/o3, so
+`make pool` boots once and restores both points from a checkpoint taken
+there (simtools/prefix.py, "prefix" in sweep.json). With
+--checkpoint-store the checkpoint comes from the shared store
+(simtools/ckptstore.py) and is only taken if no one has taken it yet.
+
+With --roi-pipeline the switch goes KVM -> ATOMIC for --warmup-insts
+(caches warm up) -> stats reset -> detailed for --roi-insts
+(simtools/roi.py), instead of measuring from cold caches. It changes the
+processor, so with a shared prefix it has to be in the prefix args too
+(a checkpoint taken without it is refused).
+
+With --phase-profile, host time, ticks, instructions and RSS are recorded
+at every exit event and stats dump, into phases.json/phases.txt in the
+outdir (simtools/phase_profile.py).
 """
 
 import argparse
@@ -21,10 +37,23 @@ from gem5.simulate.exit_event import ExitEvent
 from gem5.simulate.simulator import Simulator
 from m5 import stats as m5stats
 
+from simtools.prefix import SharedPrefix, add_arguments as add_prefix_arguments
+from simtools.phase_profile import PhaseProfiler
+from simtools.roi import ROIPipeline, ROIProcessor
+
 ap = argparse.ArgumentParser("Problem 4: KVM → switch at 2nd m5 exit")
 ap.add_argument("--detailed", choices=["timing", "o3"], default="o3")
 ap.add_argument("--cores", type=int, default=2)
+ap.add_argument("--roi-pipeline", action="store_true",
+                help="warm the caches on ATOMIC cores before the detailed ROI")
+ap.add_argument("--warmup-insts", type=int, default=50_000_000)
+ap.add_argument("--roi-insts", type=int, default=100_000_000,
+                help="detailed instructions on core 0 (0: until the 3rd exit)")
+ap.add_argument("--phase-profile", action="store_true",
+                help="write a host-time timeline of the run's phases to the outdir")
+add_prefix_arguments(ap, at="EXIT:2")
 args = ap.parse_args()
+shared = SharedPrefix.from_args(args, fixed=("cores", "roi_pipeline"))
 
 cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
     l1d_size="16kB", l1i_size="16kB", l2_size="256kB"
@@ -37,12 +66,15 @@ memory = SingleChannelDDR3_1600(size="3GB")
 switch_to = CPUTypes.O3 if args.detailed == "o3" else CPUTypes.TIMING
 
 # Start with KVM, declare what we'll switch to
-processor = SimpleSwitchableProcessor(
-    starting_core_type=CPUTypes.KVM,
-    switch_core_type=switch_to,
-    isa=ISA.X86,
-    num_cores=args.cores,
-)
+if args.roi_pipeline:
+    processor = ROIProcessor(detailed=switch_to, isa=ISA.X86, num_cores=args.cores)
+else:
+    processor = SimpleSwitchableProcessor(
+        starting_core_type=CPUTypes.KVM,
+        switch_core_type=switch_to,
+        isa=ISA.X86,
+        num_cores=args.cores,
+    )
 
 for c in processor.get_cores():
     c.core.usePerf = False
@@ -56,6 +88,7 @@ board = X86Board(
 
 workload = obtain_resource("x86-ubuntu-24.04-boot-with-systemd", resource_version="1.0.0")
 board.set_workload(workload)
+shared.use_store(board, workload)
 
 def exit_handler():
     print("first exit event: Kernel booted")
@@ -72,8 +105,21 @@ def exit_handler():
     print("--> 3rd exit event: After run script (ROI end)")
     yield True
 
+if args.roi_pipeline:
+    on_exit_event = ROIPipeline(processor, at="EXIT:2", warmup_insts=args.warmup_insts,
+                                roi_insts=args.roi_insts).handlers()
+else:
+    on_exit_event = {ExitEvent.EXIT: exit_handler()}
+
 simulator = Simulator(
     board=board,
-    on_exit_event={ExitEvent.EXIT: exit_handler()},
+    on_exit_event=shared.handlers(on_exit_event),
+    checkpoint_path=shared.checkpoint_path,
 )
-simulator.run()
+if args.phase_profile:
+    PhaseProfiler(board, labels={
+        "EXIT:1": "kernel boot",
+        "EXIT:2": "systemd + login",
+        "EXIT:3": "runscript (ROI)",
+    }).attach(simulator)
+shared.run(simulator)
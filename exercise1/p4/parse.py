@@ -230,6 +230,23 @@ def extract_row(blocks: List[Dict[str, Num]], outdir: Path) -> Dict[str, Optiona
 
     return row
 
+CSV_COLUMNS = [
+    "config","outdir",
+    "hostSeconds_total","hostSeconds_ROI",
+    "simSeconds_total","simSeconds_ROI",
+    "simInsts","cycles","IPC","CPI",
+    "L1I_accesses","L1I_misses","L1I_MPKI",
+    "L1D_accesses","L1D_misses","L1D_MPKI",
+    "L1_total_MPKI",
+    "L2_accesses","L2_misses","L2_MPKI",
+    "TLB_accesses","TLB_misses","TLB_miss_rate",
+]
+
+def row_for_outdir(outdir: Path) -> Optional[Dict[str, Optional[Num]]]:
+    """One CSV row for one outdir (used by the streaming sweep runner)."""
+    stats = Path(outdir) / "stats.txt"
+    return extract_row(load_blocks(stats), Path(outdir)) if stats.exists() else None
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--roots", nargs="+", required=True,
@@ -258,17 +275,7 @@ def main():
             f"TLB_miss_rate={r.get('TLB_miss_rate')}"
         )
 
-    hdr = [
-        "config","outdir",
-        "hostSeconds_total","hostSeconds_ROI",
-        "simSeconds_total","simSeconds_ROI",
-        "simInsts","cycles","IPC","CPI",
-        "L1I_accesses","L1I_misses","L1I_MPKI",
-        "L1D_accesses","L1D_misses","L1D_MPKI",
-        "L1_total_MPKI",
-        "L2_accesses","L2_misses","L2_MPKI",
-        "TLB_accesses","TLB_misses","TLB_miss_rate",
-    ]
+    hdr = CSV_COLUMNS
     with open(args.out, "w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=hdr)
         w.writeheader()
@@ -22,11 +22,17 @@ from gem5.simulate.exit_event import ExitEvent
 from gem5.simulate.simulator import Simulator
 from m5 import stats as m5stats
 
+from simtools.prefix import SharedPrefix, add_arguments as add_prefix_arguments
+
 requires(isa_required=ISA.X86, kvm_required=True) # Since booting with KVM
 ap = argparse.ArgumentParser("Problem 5 FS mode with ROI")
 ap.add_argument("--cpu", choices=["timing","o3"], default="timing")
 ap.add_argument("--cores", type=int, default=1)
+# Boot + systemd are the same for every --cpu; `make pool` runs them once,
+# --checkpoint-store once per host (simtools/ckptstore.py).
+add_prefix_arguments(ap, at="WORKBEGIN")
 args = ap.parse_args()
+shared = SharedPrefix.from_args(args, fixed=("cores",))
 
 detailed_type = CPUTypes.TIMING if args.cpu == "timing" else CPUTypes.O3
 
@@ -59,6 +65,7 @@ board = X86Board(
 # FS image with ROI hypercalls that run IS size S
 workload = obtain_resource("x86-ubuntu-24.04-npb-is-s", resource_version="1.0.0")
 board.set_workload(workload)
+shared.use_store(board, workload)
 
 def on_exit():
     print("Exiting the simulation for kernel boot")
@@ -79,11 +86,12 @@ def on_work_end():
 
 sim = Simulator(
     board=board,
-    on_exit_event={
+    on_exit_event=shared.handlers({
         ExitEvent.EXIT: on_exit(),
         ExitEvent.WORKBEGIN: on_work_begin(),
         ExitEvent.WORKEND: on_work_end(),
-    },
+    }),
+    checkpoint_path=shared.checkpoint_path,
 )
 
-sim.run()
\ No newline at end of file
+shared.run(sim)
\ No newline at end of file
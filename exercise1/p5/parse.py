@@ -220,6 +220,21 @@ def iter_outdirs_from_roots(roots: List[str]) -> List[Path]:
                 for child in sorted(par.rglob("stats.txt")): _add(child.parent)
     return found
 
+CSV_COLUMNS = ["config","outdir",
+       "hostSeconds_total","hostSeconds_ROI",
+       "simSeconds_total","simSeconds_ROI",
+       "simInsts","cycles","IPC","CPI",
+       "L1I_accesses","L1I_misses","L1I_MPKI",
+       "L1D_accesses","L1D_misses","L1D_MPKI",
+       "L1_total_MPKI",
+       "L2_accesses","L2_misses","L2_MPKI",
+       "TLB_accesses","TLB_misses","TLB_miss_rate"]
+
+def row_for_outdir(outdir: Path) -> Optional[Dict[str, Optional[Number]]]:
+    """One CSV row for one outdir (used by the streaming sweep runner)."""
+    stats = Path(outdir) / "stats.txt"
+    return extract_row(load_blocks(stats), Path(outdir)) if stats.exists() else None
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--roots", nargs="+", required=True, help="outdir roots to scan (e.g., log/*)")
@@ -238,15 +253,7 @@ def main():
               f"IPC={r.get('IPC')}  L1I={r.get('L1I_MPKI')}  L1D={r.get('L1D_MPKI')}  L2={r.get('L2_MPKI')}  "
               f"TLBmr={r.get('TLB_miss_rate')}")
 
-    hdr = ["config","outdir",
-           "hostSeconds_total","hostSeconds_ROI",
-           "simSeconds_total","simSeconds_ROI",
-           "simInsts","cycles","IPC","CPI",
-           "L1I_accesses","L1I_misses","L1I_MPKI",
-           "L1D_accesses","L1D_misses","L1D_MPKI",
-           "L1_total_MPKI",
-           "L2_accesses","L2_misses","L2_MPKI",
-           "TLB_accesses","TLB_misses","TLB_miss_rate"]
+    hdr = CSV_COLUMNS
     with open(args.out, "w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=hdr)
         w.writeheader()
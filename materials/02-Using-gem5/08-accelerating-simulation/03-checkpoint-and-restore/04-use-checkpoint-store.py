@@ -0,0 +1,134 @@
+# Copyright (c) 2024 The Regents of the University of California.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met: redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer;
+# redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution;
+# neither the name of the copyright holders nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+03-take-a-checkpoint.py and 03-restore-the-checkpoint.py in one script,
+with the checkpoint kept in the shared checkpoint store
+(simtools/ckptstore.py) instead of 03-cpt.
+
+The store indexes the checkpoint by board layout, kernel, disk, workload
+and exit-event point ("npb-ep-a after WORKBEGIN"). The first run finds no
+entry, so it re-runs this script with --take-checkpoint: 2 KVM cores boot
+Linux and the checkpoint is taken at the work-begin marker. Every later run,
+by you or anyone else using the same store, restores it right away on
+TIMING cores. Runs that start at the same time wait for the one that
+produces the checkpoint.
+
+Usage:
+------
+PYTHONPATH=/workspaces/2025 gem5 -re --outdir=store-m5-out 04-use-checkpoint-store.py
+
+python3 -m simtools.ckptstore list
+"""
+
+import argparse
+
+from gem5.components.boards.x86_board import X86Board
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import (
+    PrivateL1CacheHierarchy
+)
+from gem5.components.memory.single_channel import SingleChannelDDR4_2400
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.isas import ISA
+from gem5.resources.resource import obtain_resource
+from gem5.simulate.simulator import (
+    ExitEvent,
+    Simulator,
+)
+from gem5.utils.requires import requires
+import m5
+
+from simtools.prefix import SharedPrefix, add_arguments
+
+parser = argparse.ArgumentParser()
+add_arguments(parser, at="WORKBEGIN")
+parser.set_defaults(checkpoint_store="")
+args = parser.parse_args()
+shared = SharedPrefix.from_args(args)
+
+# Taking the checkpoint boots with KVM; the restored run is detailed.
+taking = args.take_checkpoint is not None
+
+requires(
+    isa_required=ISA.X86,
+    kvm_required=taking,
+)
+
+if taking:
+    cache_hierarchy = NoCache()
+else:
+    cache_hierarchy = PrivateL1CacheHierarchy(
+        l1d_size="32kB",
+        l1i_size="32kB"
+    )
+
+# Memory and core count are part of the checkpoint's key: keep them the
+# same in both modes.
+memory = SingleChannelDDR4_2400(size="3GB")
+
+processor = SimpleProcessor(
+    cpu_type=CPUTypes.KVM if taking else CPUTypes.TIMING,
+    isa=ISA.X86,
+    num_cores=2,
+)
+
+if taking:
+    for proc in processor.get_cores():
+        proc.core.usePerf = False
+
+board = X86Board(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+workload = obtain_resource("npb-ep-a")
+board.set_workload(workload)
+shared.use_store(board, workload)
+
+def workbegin_handler():
+    print("Restored after booting Linux, at work begin")
+    m5.stats.reset()
+    yield False
+
+simulator = Simulator(
+    board=board,
+    on_exit_event=shared.handlers({
+        ExitEvent.WORKBEGIN: workbegin_handler(),
+    }),
+    checkpoint_path=shared.checkpoint_path,
+)
+
+if taking:
+    shared.run(simulator)
+else:
+    print("Simulation will exit after 1,000,000,000 Ticks")
+    shared.run(simulator, 1_000_000_000)
+
+print("Simulation Done")
@@ -0,0 +1,104 @@
+"""
+One KVM boot of npb-ep-a, many checkpoints (simtools/capture.py).
+
+03-take-a-checkpoint.py takes a single checkpoint at the work-begin marker
+and stops. This script keeps the KVM cores running and takes one at every
+point given with --points, straight into the shared checkpoint store
+(simtools/ckptstore.py):
+
+  --points work              every m5 work-begin marker
+  --points ticks:N           every N ticks
+  --points insts:N           every N instructions of core 0
+  --points simpoints:PREFIX  at the simpoints in PREFIX.simpts/.weights
+
+With --from-workbegin, ticks and instructions are counted from the first
+work-begin marker, so the boot itself is not sampled. The memory, core
+count and board are the ones 04-use-checkpoint-store.py restores into.
+capture-m5out/capture.json lists the entries in the order they were taken.
+
+Usage:
+------
+PYTHONPATH=/workspaces/2025 gem5 -re --outdir=capture-m5out 05-capture-checkpoints.py \
+    --points insts:500000000 --from-workbegin --limit 20
+
+python3 -m simtools.capture capture-m5out/capture.json
+"""
+
+import argparse
+
+from gem5.components.boards.x86_board import X86Board
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.memory.single_channel import SingleChannelDDR4_2400
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.isas import ISA
+from gem5.resources.resource import obtain_resource
+from gem5.simulate.simulator import Simulator
+from gem5.utils.requires import requires
+
+from simtools.capture import CheckpointCapture, parse_points
+from simtools.ckptstore import CheckpointStore
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--points", default="work",
+                    help="work, ticks:N, insts:N or simpoints:PREFIX (default: work)")
+parser.add_argument("--from-workbegin", action="store_true",
+                    help="count ticks/instructions from the first work-begin marker")
+parser.add_argument("--limit", type=int, default=None, help="stop after this many checkpoints")
+parser.add_argument("--interval", type=int, default=1_000_000,
+                    help="simpoint interval in instructions (simpoints only)")
+parser.add_argument("--warmup", type=int, default=1_000_000,
+                    help="instructions to checkpoint ahead of each simpoint (simpoints only)")
+parser.add_argument("--store", default=None, help="checkpoint store root (default: the shared one)")
+args = parser.parse_args()
+kind, _ = parse_points(args.points)
+
+requires(
+    isa_required=ISA.X86,
+    kvm_required=True,
+)
+
+cache_hierarchy = NoCache()
+
+memory = SingleChannelDDR4_2400(size="3GB")
+
+processor = SimpleProcessor(
+    cpu_type=CPUTypes.KVM,
+    isa=ISA.X86,
+    num_cores=2,
+)
+
+# Instruction points need the KVM cores' perf counters.
+for proc in processor.get_cores():
+    proc.core.usePerf = kind in ("insts", "simpoints")
+
+board = X86Board(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+workload = obtain_resource("npb-ep-a")
+board.set_workload(workload)
+
+capture = CheckpointCapture(
+    board, workload, args.points,
+    start="WORKBEGIN" if args.from_workbegin else None,
+    store=CheckpointStore(args.store),
+    limit=args.limit,
+    interval=args.interval,
+    warmup=args.warmup,
+)
+
+simulator = Simulator(
+    board=board,
+    on_exit_event=capture.handlers(),
+)
+
+print("Running the simulation")
+print("Using KVM cpu")
+
+capture.run(simulator)
+
+print("Simulation Done")
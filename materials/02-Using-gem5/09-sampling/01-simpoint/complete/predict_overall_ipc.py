@@ -1,39 +1,41 @@
-baseline_ipc = 0.0
-baseline_stats_file = "/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/complete/full-detailed-run-m5out/stats.txt"
-
-with open(baseline_stats_file, "r") as f:
-    for line in f:
-        if "board.processor.cores.core.ipc" in line:
-            line = line.split()
-            baseline_ipc = float(line[1])
-            break
-
-num_simpoints = 3
-simpoint_ipcs = []
-simpoint_weights = []
-
-for i in range(num_simpoints):
-    simpoint_stats_file = f"/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/complete/simpoint{i}-run/stats.txt"
-    with open(simpoint_stats_file, "r") as f:
-        simpoint_ipc = 0.0
-        for line in f:
-            if "board.processor.cores.core.ipc" in line:
-                line = line.split()
-                simpoint_ipc = float(line[1])
-        simpoint_ipcs.append(simpoint_ipc)
-    simpoint_stdout_file = f"/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/complete/simpoint{i}-run/simout.txt"
-    simpoint_weight = 0.0
-    with open(simpoint_stdout_file, "r") as f:
-        for line in f:
-            if "Ran SimPoint" in line:
-                line = line.split()
-                simpoint_weight = float(line[-1])
-    simpoint_weights.append(simpoint_weight)
-
-predicted_ipc = 0.0
-
-for i in range(num_simpoints):
-    predicted_ipc += simpoint_ipcs[i] * simpoint_weights[i]
+"""
+Predict the overall IPC from the SimPoint runs and compare it with the
+full detailed run.
+
+Thin wrapper around simtools/simpoint_aggregate.py. The simpoints and their
+weights come from results.simpts/results.weights, and IPC is combined from
+the weighted instruction and cycle counts (not by averaging the IPCs).
+The same tool estimates every other stat as well:
+
+    python3 -m simtools.simpoint_aggregate . --weights results.weights \
+        --reference full-detailed-run-m5out/stats.txt --json estimates.json
+
+Usage
+-----
+
+PYTHONPATH=/workspaces/2025 python3 predict_overall_ipc.py
+"""
+
+import argparse
+from pathlib import Path
+
+from simtools.simpoint_aggregate import estimate_dir, predicted
+
+base = Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/complete")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--results", type=Path, default=base,
+                    help="directory with the simpoint<N>-run outdirs")
+parser.add_argument("--weights", type=Path, default=base / "results.weights")
+parser.add_argument("--reference", type=Path,
+                    default=base / "full-detailed-run-m5out/stats.txt")
+args = parser.parse_args()
+
+result = estimate_dir(args.results, args.weights.with_suffix(".simpts"), args.weights,
+                      reference=args.reference)
+predicted_ipc = predicted(result)
+baseline_ipc = [e["reference"] for n, e in result["stats"].items()
+                if n.endswith("core.ipc") and "reference" in e][0]
 
 print(f"predicted IPC: {predicted_ipc}")
 print(f"actual IPC: {baseline_ipc}")
@@ -0,0 +1,5 @@
+# Same clustering as simpoint3.2-cmd.sh, without the simpoint binary
+# (simtools/simpoint.py). Drop --k to let BIC choose the number of clusters.
+PYTHONPATH=/workspaces/2025 python3 -m simtools.simpoint \
+    simpoint-analysis-m5out/simpoint.bb.gz --k 5 --simpoints \
+    results.simpts --weights results.weights
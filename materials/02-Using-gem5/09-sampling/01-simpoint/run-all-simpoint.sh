@@ -1,21 +1,10 @@
 #!/bin/bash
 
-# Run the gem5 commands in parallel
-gem5 -re --outdir=simpoint0-run simpoint-run.py --sid=0 &
-pid0=$!
-gem5 -re --outdir=simpoint1-run simpoint-run.py --sid=1 &
-pid1=$!
-gem5 -re --outdir=simpoint2-run simpoint-run.py --sid=2 &
-pid2=$!
-
-# Array of PIDs and SIDs
-pids=($pid0 $pid1 $pid2)
-sids=(0 1 2)
-
-# Loop to wait for each process and echo a message when it finishes
-for i in "${!pids[@]}"; do
-    wait ${pids[$i]} && echo "gem5 with sid ${sids[$i]} finished"
-done
-
-# Wait for all background jobs to finish
-wait
+# Run one gem5 simpoint-run.py --sid=N per simpoint in results.simpts, as
+# many at a time as the host's cores and memory allow, skipping simpoints
+# that already have results, then print the weighted IPC prediction
+# (simtools/simpoint_runner.py).
+PYTHONPATH=/workspaces/2025 python3 -m simtools.simpoint_runner \
+    --simpoints results.simpts --weights results.weights \
+    --script simpoint-run.py --outdir 'simpoint{sid}-run' \
+    --reference-stats full-detailed-run-m5out/stats.txt "$@"
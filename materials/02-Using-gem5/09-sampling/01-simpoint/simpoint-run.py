@@ -30,6 +30,10 @@ Usage
 
 gem5 -re --outdir=simpoint[sid]-run simpoint-run.py --sid=[sid]
 
+With --dump-stats GLOB ... the dump at the end of the warmup keeps only the
+matching stats (simtools/statdump.py; needs PYTHONPATH=/workspaces/2025);
+the measured interval is always dumped in full.
+
 """
 
 import argparse
@@ -55,9 +59,17 @@ requires(isa_required=ISA.X86)
 parser = argparse.ArgumentParser()
 
 parser.add_argument("--sid", type=int, required=True)
+parser.add_argument("--dump-stats", nargs="+", default=None, metavar="GLOB",
+                    help="stats to keep in the warmup dump (default: all)")
 
 args = parser.parse_args()
 
+if args.dump_stats:
+    from simtools.statdump import dumper
+    dump_warmup_stats = dumper(args.dump_stats)
+else:
+    dump_warmup_stats = m5.stats.dump
+
 cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
     l1d_size="32kB",
     l1i_size="32kB",
@@ -105,7 +117,7 @@ def max_inst():
             simulator.schedule_max_insts(
                 board.get_simpoint().get_simpoint_interval()
             )
-            m5.stats.dump()
+            dump_warmup_stats()
             m5.stats.reset()
             yield False
 
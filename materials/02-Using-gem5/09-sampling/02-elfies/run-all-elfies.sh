@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# Run every region of the ELFie suite in elfies.txt (run-elfies.py
+# --manifest elfies.txt --sid=N), as many at a time as the host's cores and
+# memory allow, then print weighted whole-program estimates
+# (simtools/elfie_batch.py).
+PYTHONPATH=/workspaces/2025 python3 -m simtools.elfie_batch \
+    --manifest elfies.txt --script run-elfies.py --outdir 'elfie{sid}-run' "$@"
@@ -38,6 +38,7 @@ from gem5.resources.resource import obtain_resource
 from gem5.utils.requires import requires
 from m5.params import PcCountPair
 from gem5.isas import ISA
+import argparse
 import m5
 
 requires(isa_required = ISA.X86)
@@ -45,8 +46,24 @@ requires(isa_required = ISA.X86)
 '''
 Usage:
     gem5 -re run-elfies.py
+    gem5 -re run-elfies.py --manifest elfies.txt --sid N
+
+With --manifest, run region N of an ELFie suite (see simtools/elfie_batch.py,
+which runs all of them in parallel and combines the stats).
 '''
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--manifest", help="ELFie suite: 'resource weight start_pc:count end_pc:count' lines")
+parser.add_argument("--sid", type=int, default=0, help="region of the manifest to run")
+args = parser.parse_args()
+
+if args.manifest:
+    from simtools.elfie_batch import read_manifest
+    region = read_manifest(args.manifest)[args.sid]
+    resource, start, end = region.resource, region.start, region.end
+else:
+    resource, start, end = "wrf-s.1_globalr13", (0x100b643, 1), (0x526730, 297879)
+
 cache_hierarchy = PrivateL1SharedL2CacheHierarchy(
     l1i_size="32KiB",
     l1i_assoc=8,
@@ -71,10 +88,10 @@ board = SimpleBoard(
 )
 
 board.set_se_binary_workload(
-    binary=obtain_resource("wrf-s.1_globalr13")
+    binary=obtain_resource(resource)
 )
 
-elfie = ELFieInfo(start = PcCountPair(int("0x100b643",0),1), end = PcCountPair(int("0x526730",0),297879) )
+elfie = ELFieInfo(start = PcCountPair(*start), end = PcCountPair(*end) )
 
 elfie.setup_processor(
     processor = processor
@@ -0,0 +1,108 @@
+"""
+Adaptive version of SMARTS.py: the program length is not typed in, and
+detailed sampling stops (or thins out) as soon as the CPI estimate reaches
+the target confidence interval. See simtools/smarts.py.
+
+The first run of a binary samples with the default period and records the
+program length; later runs space the samples over the whole program.
+
+Usage
+-----
+
+PYTHONPATH=/workspaces/2025 gem5 -re adaptive-SMARTS.py [--target 0.03] [--mode stop|stretch]
+
+Per-sample CPI and the final estimate are written to m5out/smarts.json.
+"""
+
+import argparse
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_private_l2_walk_cache_hierarchy import (
+    PrivateL1PrivateL2WalkCacheHierarchy,
+)
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_switchable_processor import SimpleSwitchableProcessor
+from gem5.isas import ISA
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import BinaryResource
+from gem5.utils.requires import requires
+
+from simtools.statdump import SAMPLE_STATS
+from simtools.smarts import AdaptiveSMARTS
+
+requires(isa_required=ISA.X86)
+
+parser = argparse.ArgumentParser(description="SMARTS that stops once the CPI estimate is tight enough")
+parser.add_argument("--target", type=float, default=0.03,
+                    help="relative CI half-width to reach (default: 0.03 = +/-3%%)")
+parser.add_argument("--z", type=float, default=3.0,
+                    help="CI width in standard errors (default: 3 ~ 99.7%%)")
+parser.add_argument("--mode", choices=["stop", "stretch"], default="stop",
+                    help="after convergence: stop sampling, or stretch the period")
+parser.add_argument("--W", type=int, default=None,
+                    help="detailed warmup length (default: 2U; see calibrate-warmup.py)")
+parser.add_argument("--min-samples", type=int, default=30)
+parser.add_argument("--U", type=int, default=1000, help="sampling unit (instructions)")
+parser.add_argument("--k", type=int, default=None,
+                    help="sampling period in units of U (default: from the discovered length)")
+parser.add_argument("--dump-stats", nargs="*", default=None, metavar="GLOB",
+                    help="keep only these stats in the per-sample dumps "
+                         "(no GLOB: the ones simtools.sample_estimator uses)")
+args = parser.parse_args()
+
+cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
+    l1d_size="32kB",
+    l1i_size="32kB",
+    l2_size="256kB",
+)
+
+memory = DualChannelDDR4_2400(size="3GB")
+
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.ATOMIC,
+    switch_core_type=CPUTypes.O3,
+    isa=ISA.X86,
+    num_cores=1,
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+binary_path = Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/workload/simple_workload")
+board.set_se_binary_workload(
+    binary=BinaryResource(local_path=binary_path.as_posix())
+)
+
+smarts = AdaptiveSMARTS(
+    processor,
+    clock="3GHz",
+    workload=binary_path,
+    U=args.U,
+    W=args.W,
+    k=args.k,
+    target=args.target,
+    z=args.z,
+    min_samples=args.min_samples,
+    mode=args.mode,
+    dump_stats=SAMPLE_STATS if args.dump_stats == [] else args.dump_stats,
+)
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={
+        ExitEvent.SIMPOINT_BEGIN: smarts.generator()
+    }
+)
+
+smarts.start()
+simulator.run()
+smarts.finish()
+
+print("Simulation Done")
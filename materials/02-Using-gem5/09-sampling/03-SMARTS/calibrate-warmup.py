@@ -0,0 +1,106 @@
+"""
+Warmup calibration for SMARTS.py: measure how much detailed warmup the O3
+core needs on this workload and cache hierarchy instead of assuming W=2U.
+A few sample points are each measured after W = 0, U, 2U, ... --max-W
+instructions of detailed warmup, every (point, W) in a forked child (see
+simtools/warmup_calibrate.py), and the shortest W whose CPI stays within
+--tolerance of the longest warmup is written to m5out/calibration.json.
+
+The sample points are spread over the program length cached by an earlier
+adaptive-SMARTS.py or pfsa-SMARTS.py run, or given with --points.
+
+Usage
+-----
+
+PYTHONPATH=/workspaces/2025 gem5 -re calibrate-warmup.py [--points N ...] [--max-children N]
+
+Afterwards, e.g. with a tighter tolerance:
+
+python3 -m simtools.warmup_calibrate report m5out --tolerance 0.005
+
+and run pfsa-SMARTS.py or adaptive-SMARTS.py with --W <safe W>.
+"""
+
+import argparse
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_private_l2_walk_cache_hierarchy import (
+    PrivateL1PrivateL2WalkCacheHierarchy,
+)
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_switchable_processor import SimpleSwitchableProcessor
+from gem5.isas import ISA
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import BinaryResource
+from gem5.utils.requires import requires
+
+from simtools.warmup_calibrate import TOLERANCE, WarmupCalibration
+
+requires(isa_required=ISA.X86)
+
+parser = argparse.ArgumentParser(description="Find the shortest safe detailed warmup")
+parser.add_argument("--U", type=int, default=1000, help="sampling unit (instructions)")
+parser.add_argument("--max-W", type=int, default=None,
+                    help="longest warmup, the reference (default: 64U)")
+parser.add_argument("--points", type=int, nargs="+", default=None,
+                    help="instruction counts of the measured units (default: spread over the program)")
+parser.add_argument("--samples", type=int, default=5, help="number of spread points")
+parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="largest acceptable relative CPI error (default: 0.01)")
+parser.add_argument("--max-children", type=int, default=None,
+                    help="samples running at once (default: cores - 1)")
+args = parser.parse_args()
+
+cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
+    l1d_size="32kB",
+    l1i_size="32kB",
+    l2_size="256kB",
+)
+
+memory = DualChannelDDR4_2400(size="3GB")
+
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.ATOMIC,
+    switch_core_type=CPUTypes.O3,
+    isa=ISA.X86,
+    num_cores=1,
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+binary_path = Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/workload/simple_workload")
+board.set_se_binary_workload(
+    binary=BinaryResource(local_path=binary_path.as_posix())
+)
+
+calibration = WarmupCalibration(
+    processor,
+    clock="3GHz",
+    workload=binary_path,
+    U=args.U,
+    points=args.points,
+    samples=args.samples,
+    max_warmup=args.max_W,
+    max_children=args.max_children,
+    tolerance=args.tolerance,
+)
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={
+        ExitEvent.SIMPOINT_BEGIN: calibration.generator()
+    }
+)
+
+calibration.start()
+calibration.run(simulator)
+
+print("Simulation Done")
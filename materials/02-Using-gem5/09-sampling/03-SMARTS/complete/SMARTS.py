@@ -30,6 +30,9 @@ Usage
 
 gem5 -re SMARTS.py
 
+With --dump-stats the per-sample dumps keep only the listed stats
+(simtools/statdump.py), which needs PYTHONPATH=/workspaces/2025.
+
 """
 
 import argparse
@@ -53,6 +56,18 @@ import m5
 
 requires(isa_required=ISA.X86)
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--dump-stats", nargs="*", default=None, metavar="GLOB",
+                    help="keep only these stats in the per-sample dumps "
+                         "(no GLOB: the ones simtools.sample_estimator uses)")
+args = parser.parse_args()
+
+if args.dump_stats is None:
+    dump_stats = m5.stats.dump
+else:
+    from simtools.statdump import SAMPLE_STATS, dumper
+    dump_stats = dumper(args.dump_stats or SAMPLE_STATS)
+
 cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
     l1d_size="32kB",
     l1i_size="32kB",
@@ -80,7 +95,7 @@ board.set_se_binary_workload(
 )
 
 def smarts_generator(
-    k: int, U: int, W: int, processor
+    k: int, U: int, W: int, processor, dump_stats=m5.stats.dump
 ):
     """
     :param k: the systematic sampling interval. Each interval simulation k*U
@@ -88,6 +103,8 @@ def smarts_generator(
     warmup part, and the detail simulation part.
     :param U: sampling unit size. The instruction length in each unit.
     :param W: the length of the detailed warmup part.
+    :param dump_stats: called instead of m5.stats.dump() at the end of each
+    sample, e.g. a simtools.statdump dumper that keeps only some stats.
 
     Each interval instruction length is k*U.
     The warmup part starts at (k-1)*U-W
@@ -139,7 +156,7 @@ def smarts_generator(
         print("got to end of detail simulation\n")
         print("now dump stats\n")
         # dump stats
-        m5.stats.dump()
+        dump_stats()
 
         # switch core type
         print("switch core type\n")
@@ -171,6 +188,7 @@ simulator = Simulator(
             U=ideal_U,
             W=ideal_W,
             processor=processor,
+            dump_stats=dump_stats,
         )
     }
 )
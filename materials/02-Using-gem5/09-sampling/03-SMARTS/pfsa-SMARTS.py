@@ -0,0 +1,106 @@
+"""
+pFSA version of SMARTS.py: the atomic core fast-forwards through the whole
+program in this process, and every sample is a forked child that switches
+to O3, runs the detailed warmup and the measured unit, and writes its stats
+to m5out/samples/<n>/. Up to --max-children samples run at the same time,
+so on a many-core host the detailed part costs little more than one sample.
+See simtools/pfsa.py.
+
+Usage
+-----
+
+PYTHONPATH=/workspaces/2025 gem5 -re pfsa-SMARTS.py [--max-children N]
+
+Afterwards:
+
+python3 -m simtools.sample_estimator m5out/samples.txt
+
+m5out/smarts.json has the pFSA summary.
+"""
+
+import argparse
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_private_l2_walk_cache_hierarchy import (
+    PrivateL1PrivateL2WalkCacheHierarchy,
+)
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_switchable_processor import SimpleSwitchableProcessor
+from gem5.isas import ISA
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import BinaryResource
+from gem5.utils.requires import requires
+
+from simtools.pfsa import ParallelSMARTS
+from simtools.statdump import SAMPLE_STATS
+
+requires(isa_required=ISA.X86)
+
+parser = argparse.ArgumentParser(description="SMARTS with detailed samples in forked children")
+parser.add_argument("--max-children", type=int, default=None,
+                    help="detailed samples running at once (default: cores - 1)")
+parser.add_argument("--z", type=float, default=3.0,
+                    help="CI width in standard errors (default: 3 ~ 99.7%%)")
+parser.add_argument("--W", type=int, default=None,
+                    help="detailed warmup length (default: 2U; see calibrate-warmup.py)")
+parser.add_argument("--U", type=int, default=1000, help="sampling unit (instructions)")
+parser.add_argument("--k", type=int, default=None,
+                    help="sampling period in units of U (default: from the discovered length)")
+parser.add_argument("--dump-stats", nargs="*", default=None, metavar="GLOB",
+                    help="keep only these stats in the per-sample dumps "
+                         "(no GLOB: the ones simtools.sample_estimator uses)")
+args = parser.parse_args()
+
+cache_hierarchy = PrivateL1PrivateL2WalkCacheHierarchy(
+    l1d_size="32kB",
+    l1i_size="32kB",
+    l2_size="256kB",
+)
+
+memory = DualChannelDDR4_2400(size="3GB")
+
+processor = SimpleSwitchableProcessor(
+    starting_core_type=CPUTypes.ATOMIC,
+    switch_core_type=CPUTypes.O3,
+    isa=ISA.X86,
+    num_cores=1,
+)
+
+board = SimpleBoard(
+    clk_freq="3GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+binary_path = Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/01-simpoint/workload/simple_workload")
+board.set_se_binary_workload(
+    binary=BinaryResource(local_path=binary_path.as_posix())
+)
+
+pfsa = ParallelSMARTS(
+    processor,
+    clock="3GHz",
+    workload=binary_path,
+    U=args.U,
+    W=args.W,
+    k=args.k,
+    max_children=args.max_children,
+    z=args.z,
+    dump_stats=SAMPLE_STATS if args.dump_stats == [] else args.dump_stats,
+)
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={
+        ExitEvent.SIMPOINT_BEGIN: pfsa.generator()
+    }
+)
+
+pfsa.start()
+pfsa.run(simulator)
+
+print("Simulation Done")
@@ -1,20 +1,37 @@
-from pathlib import Path
+"""
+Predict the overall IPC of the SMARTS run from its per-sample stats dumps.
+
+Thin wrapper around simtools/sample_estimator.py, which estimates any set of
+metrics (CPI, MPKI, bandwidth, branch mispredict rate) with confidence
+intervals and a recommended sample count:
+
+    python3 -m simtools.sample_estimator m5out/stats.txt --json estimate.json
+
+Usage
+-----
+
+PYTHONPATH=/workspaces/2025 python3 predict_ipc.py [--stats m5out/stats.txt]
+"""
+
+import argparse
 import math
+from pathlib import Path
+
+from simtools.sample_estimator import estimate_file
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--stats", type=Path,
+                    default=Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/03-SMARTS/m5out/stats.txt"))
+parser.add_argument("--actual", type=float, default=1.247741,
+                    help="IPC of the full detailed run")
+args = parser.parse_args()
+
+ipc = estimate_file(args.stats, ["ipc"])["metrics"]["ipc"]
+if not ipc or not ipc["samples"]:
+    raise SystemExit(f"No samples with committed instructions in {args.stats}")
 
-stats_file = Path("/workspaces/2025/materials/02-Using-gem5/09-sampling/03-SMARTS/m5out/stats.txt")
-
-with stats_file.open("r") as f:
-    num_samples = 0
-    sample_ipc = []
-    for line in f:
-        if "board.processor.switch.core.ipc" in line:
-            line = line.split()
-            ipc = float(line[1])
-            sample_ipc.append(ipc)
-            num_samples += 1
-    num_samples -= 1
-    avg_ipc = sum(sample_ipc[:-1]) / num_samples
-    print(f"Number of samples: {num_samples}")
-    print(f"Predicted Overall IPC: {avg_ipc}")
-    print(f"Actual Overall IPC: 1.247741")
-    print(f"Relative Error: {(math.fabs(avg_ipc - 1.247741)/1.247741)*100}%")
+print(f"Number of samples: {ipc['samples']}")
+print(f"Predicted Overall IPC: {ipc['mean']}")
+print(f"99.7% confidence interval: [{ipc['ci'][0]:.6f}, {ipc['ci'][1]:.6f}]")
+print(f"Actual Overall IPC: {args.actual}")
+print(f"Relative Error: {(math.fabs(ipc['mean'] - args.actual)/args.actual)*100}%")
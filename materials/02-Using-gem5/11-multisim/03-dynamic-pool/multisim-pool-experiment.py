@@ -0,0 +1,87 @@
+"""
+The "02-multiprocessing-via-multisim" experiment run through the dynamic
+multisim front-end in simtools/multisim_pool.py instead of
+gem5.utils.multisim.
+
+Differences to the MultiSim version:
+- no `set_num_processes`: the pool is sized from the free cores and memory
+  of the host and re-sized every time a simulation finishes;
+- each simulator gets a priority and an estimated cost, so the big-cache
+  configurations (slowest here) start first;
+- results are summarized as each simulation finishes, not after the batch.
+
+Usage
+-----
+PYTHONPATH=/workspaces/2025 gem5 -re -m simtools.multisim_pool \
+    multisim-pool-experiment.py
+
+"""
+
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import PrivateL1CacheHierarchy
+from gem5.components.memory import SingleChannelDDR3_1600
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.isas import ISA
+from gem5.resources.resource import obtain_resource
+from gem5.simulate.simulator import Simulator
+from m5 import options
+
+from simtools import multisim_pool
+from simtools.statsfile import load_blocks
+
+for data_cache_size in ["8kB","16kB"]:
+    for instruction_cache_size in ["8kB","16kB"]:
+
+        cache_hierarchy = PrivateL1CacheHierarchy(
+            l1d_size=data_cache_size,
+            l1i_size=instruction_cache_size,
+        )
+
+        memory = SingleChannelDDR3_1600(size="32MB")
+
+        processor = SimpleProcessor(
+            cpu_type=CPUTypes.TIMING,
+            isa=ISA.X86,
+            num_cores=1
+        )
+
+        board = SimpleBoard(
+            clk_freq="3GHz",
+            processor=processor,
+            memory=memory,
+            cache_hierarchy=cache_hierarchy,
+        )
+
+        board.set_se_binary_workload(
+            obtain_resource("x86-matrix-multiply")
+        )
+
+        # `priority` wins over `cost`; `cost` only orders simulators of the
+        # same priority (longest first). `mem` is the host memory we expect
+        # this simulator to need, used to size the pool.
+        multisim_pool.add_simulator(
+            Simulator(
+                board=board,
+                id=f"process_{data_cache_size}_{instruction_cache_size}"
+            ),
+            priority=0,
+            cost=float(data_cache_size[:-2]) + float(instruction_cache_size[:-2]),
+            mem="512MiB",
+        )
+
+
+# Runs in the parent process as soon as one simulator is done.
+def summarize(sim_id: str, exit_code: int):
+    if exit_code != 0:
+        print(f"{sim_id}: failed with exit code {exit_code}")
+        return
+    blocks = load_blocks(Path(options.outdir) / sim_id / "stats.txt")
+    if blocks:
+        final = blocks[-1]
+        print(f"{sim_id}: simSeconds={final.get('simSeconds')} "
+              f"hostSeconds={final.get('hostSeconds')}")
+
+multisim_pool.set_on_complete(summarize)
@@ -0,0 +1,119 @@
+"""
+Step 3 of LoopPoint-style sampling: take one checkpoint per planned region.
+
+Replays the profiling run (same atomic cores, same region length, so the
+same region boundaries) and saves looppoint-checkpoint/cpt.region<N> at the
+start of every "checkpoint_region" in the plan written by
+`python3 -m simtools.looppoint`. Stops after the last one.
+
+Usage
+-----
+
+/workspaces/2024/gem5/build/X86/gem5.fast -re --outdir=looppoint-checkpoint-m5out looppoint-checkpoint.py [--plan looppoint.json]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.memory.single_channel import SingleChannelDDR4_2400
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import PrivateL1CacheHierarchy
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.resources.resource import BinaryResource
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.isas import ISA
+
+from m5.objects import LocalInstTracker, GlobalInstTracker
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--plan", type=Path, default=Path("looppoint.json"))
+parser.add_argument("--checkpoint-dir", type=Path, default=Path("looppoint-checkpoint"))
+parser.add_argument("--cores", type=int, default=8)
+args = parser.parse_args()
+
+plan = json.loads(args.plan.read_text())
+wanted = sorted({r["checkpoint_region"] for r in plan["regions"]})
+
+binary_path = Path("/workspaces/2024/materials/03-Developing-gem5-models/09-extending-gem5-models/simple-omp-workload/simple_workload")
+
+cache_hierarchy = PrivateL1CacheHierarchy(
+    l1d_size="64kB",
+    l1i_size="64kB",
+)
+
+memory = SingleChannelDDR4_2400("1GB")
+
+processor = SimpleProcessor(
+    cpu_type=CPUTypes.ATOMIC,
+    num_cores=args.cores,
+    isa=ISA.X86
+)
+
+global_inst_tracker = GlobalInstTracker(
+    inst_threshold=plan["region_length"]
+)
+all_trackers = []
+
+for core in processor.get_cores():
+    tracker = LocalInstTracker(
+        global_inst_tracker=global_inst_tracker,
+        start_listening=False,
+    )
+    core.core.probeListener = tracker
+    all_trackers.append(tracker)
+
+board = SimpleBoard(
+    clk_freq="1GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(
+    binary=BinaryResource(
+        local_path=binary_path.as_posix()
+    )
+)
+
+
+def save(region):
+    if region in wanted:
+        path = args.checkpoint_dir / f"cpt.region{region}"
+        print(f"Taking a checkpoint at the start of region {region} to {path}")
+        simulator.save_checkpoint(path)
+    return region >= wanted[-1]
+
+
+def workbegin_handler():
+    for tracker in all_trackers:
+        tracker.startListening()
+    yield save(0)
+
+
+def region_handler():
+    region = 0
+    while True:
+        region += 1
+        global_inst_tracker.resetCounter()
+        yield save(region)
+
+
+def workend_handler():
+    print(f"Reached workend before region {wanted[-1]}; is the plan from this binary?")
+    yield True
+
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={
+        ExitEvent.MAX_INSTS: region_handler(),
+        ExitEvent.WORKBEGIN: workbegin_handler(),
+        ExitEvent.WORKEND: workend_handler(),
+    }
+)
+
+simulator.run()
+print("Simulation Done")
@@ -0,0 +1,139 @@
+"""
+Step 1 of LoopPoint-style sampling for the multithreaded simple-omp-workload.
+
+Runs the parallel region (m5_work_begin to m5_work_end) on atomic cores and
+cuts it into regions of --region-length instructions summed over all
+threads, using the GlobalInstTracker/LocalInstTracker from
+02-global-inst-tracker (gem5 has to be built with them). Stats are dumped
+once per region; the dumps are the profile.
+
+The whole flow:
+
+  1. gem5.fast -re --outdir=looppoint-profile-m5out looppoint-profile.py
+  2. PYTHONPATH=/workspaces/2024 python3 -m simtools.looppoint \
+         looppoint-profile-m5out/stats.txt --prefix looppoint
+     (clusters the regions, writes looppoint.simpts/.weights/.json)
+  3. gem5.fast -re --outdir=looppoint-checkpoint-m5out looppoint-checkpoint.py
+  4. ./run-all-looppoints.sh
+     (simulates the picked regions in parallel, prints the weighted
+     prediction; simtools.simpoint_aggregate estimates every other stat)
+
+Usage
+-----
+
+/workspaces/2024/gem5/build/X86/gem5.fast -re --outdir=looppoint-profile-m5out looppoint-profile.py [--region-length 100000]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.memory.single_channel import SingleChannelDDR4_2400
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import PrivateL1CacheHierarchy
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.resources.resource import BinaryResource
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.isas import ISA
+
+import m5
+from m5 import options
+from m5.objects import LocalInstTracker, GlobalInstTracker
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--region-length", type=int, default=100_000,
+                    help="instructions per region, summed over all threads")
+parser.add_argument("--cores", type=int, default=8)
+args = parser.parse_args()
+
+binary_path = Path("/workspaces/2024/materials/03-Developing-gem5-models/09-extending-gem5-models/simple-omp-workload/simple_workload")
+
+cache_hierarchy = PrivateL1CacheHierarchy(
+    l1d_size="64kB",
+    l1i_size="64kB",
+)
+
+memory = SingleChannelDDR4_2400("1GB")
+
+# Atomic cores: the profile and the checkpoint pass must see the same
+# thread interleaving, so that region N starts at the same point in both.
+processor = SimpleProcessor(
+    cpu_type=CPUTypes.ATOMIC,
+    num_cores=args.cores,
+    isa=ISA.X86
+)
+
+global_inst_tracker = GlobalInstTracker(
+    inst_threshold=args.region_length
+)
+all_trackers = []
+
+for core in processor.get_cores():
+    tracker = LocalInstTracker(
+        global_inst_tracker=global_inst_tracker,
+        start_listening=False,
+    )
+    core.core.probeListener = tracker
+    all_trackers.append(tracker)
+
+board = SimpleBoard(
+    clk_freq="1GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(
+    binary=BinaryResource(
+        local_path=binary_path.as_posix()
+    )
+)
+
+regions = 0
+
+
+def workbegin_handler():
+    print("Reached workbegin, region 0 starts")
+    m5.stats.reset()
+    for tracker in all_trackers:
+        tracker.startListening()
+    yield False
+
+
+def region_handler():
+    global regions
+    while True:
+        regions += 1
+        print(f"End of region {regions - 1}")
+        m5.stats.dump()
+        m5.stats.reset()
+        global_inst_tracker.resetCounter()
+        yield False
+
+
+def workend_handler():
+    # The last, shorter region is dumped by gem5 at exit.
+    print(f"Reached workend after {regions + 1} regions")
+    for tracker in all_trackers:
+        tracker.stopListening()
+    Path(options.outdir, "profile.json").write_text(json.dumps({
+        "region_length": args.region_length,
+        "regions": regions + 1,
+        "threads": args.cores,
+    }, indent=2))
+    yield True
+
+
+simulator = Simulator(
+    board=board,
+    on_exit_event={
+        ExitEvent.MAX_INSTS: region_handler(),
+        ExitEvent.WORKBEGIN: workbegin_handler(),
+        ExitEvent.WORKEND: workend_handler(),
+    }
+)
+
+simulator.run()
+print("Simulation Done")
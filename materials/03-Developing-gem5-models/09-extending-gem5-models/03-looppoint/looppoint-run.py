@@ -0,0 +1,139 @@
+"""
+Step 4 of LoopPoint-style sampling: simulate one planned region in detail.
+
+Restores looppoint-checkpoint/cpt.region<N> of simpoint id --sid into
+detailed cores. With "warmup" 1 in the plan the checkpoint is one region
+early, and that region is simulated as warmup before the stats are reset.
+The region ends after region_length instructions over all threads (the
+GlobalInstTracker again) or at m5_work_end, whichever comes first; its
+stats are the ones gem5 dumps at exit.
+
+If the plan entry has "start" and "end" markers ({"pc": ..., "count": ...},
+counts relative to the checkpoint), the region is delimited by them
+instead, as in run-elfies.py.
+
+run-all-looppoints.sh runs this for every simpoint id.
+
+Usage
+-----
+
+/workspaces/2024/gem5/build/X86/gem5.fast -re --outdir=looppoint[sid]-run looppoint-run.py --sid=[sid]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from gem5.components.boards.simple_board import SimpleBoard
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.memory.single_channel import SingleChannelDDR4_2400
+from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import PrivateL1CacheHierarchy
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.resources.elfie import ELFieInfo
+from gem5.resources.resource import BinaryResource
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+from gem5.isas import ISA
+
+import m5
+from m5.objects import LocalInstTracker, GlobalInstTracker
+from m5.params import PcCountPair
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sid", type=int, required=True)
+parser.add_argument("--plan", type=Path, default=Path("looppoint.json"))
+parser.add_argument("--checkpoint-dir", type=Path, default=Path("looppoint-checkpoint"))
+parser.add_argument("--cpu", choices=["o3", "timing"], default="o3")
+parser.add_argument("--cores", type=int, default=8)
+args = parser.parse_args()
+
+plan = json.loads(args.plan.read_text())
+region = next(r for r in plan["regions"] if r["sid"] == args.sid)
+
+binary_path = Path("/workspaces/2024/materials/03-Developing-gem5-models/09-extending-gem5-models/simple-omp-workload/simple_workload")
+
+cache_hierarchy = PrivateL1CacheHierarchy(
+    l1d_size="64kB",
+    l1i_size="64kB",
+)
+
+memory = SingleChannelDDR4_2400("1GB")
+
+processor = SimpleProcessor(
+    cpu_type=CPUTypes.O3 if args.cpu == "o3" else CPUTypes.TIMING,
+    num_cores=args.cores,
+    isa=ISA.X86
+)
+
+board = SimpleBoard(
+    clk_freq="1GHz",
+    processor=processor,
+    memory=memory,
+    cache_hierarchy=cache_hierarchy,
+)
+
+board.set_se_binary_workload(
+    binary=BinaryResource(
+        local_path=binary_path.as_posix()
+    ),
+    checkpoint=args.checkpoint_dir / f"cpt.region{region['checkpoint_region']}",
+)
+
+use_markers = "start" in region and "end" in region
+
+if use_markers:
+    elfie = ELFieInfo(
+        start=PcCountPair(int(str(region["start"]["pc"]), 0), region["start"]["count"]),
+        end=PcCountPair(int(str(region["end"]["pc"]), 0), region["end"]["count"]),
+    )
+    elfie.setup_processor(processor=processor)
+else:
+    global_inst_tracker = GlobalInstTracker(
+        inst_threshold=plan["region_length"]
+    )
+    for core in processor.get_cores():
+        core.core.probeListener = LocalInstTracker(
+            global_inst_tracker=global_inst_tracker,
+            start_listening=True,
+        )
+
+
+def marker_handler():
+    print("reached the start marker, now reset stats")
+    m5.stats.reset()
+    yield False
+    print("reached the end marker")
+    yield True
+
+
+def region_handler():
+    for _ in range(region["warmup"]):
+        print("end of warmup region, starting to simulate the region")
+        m5.stats.reset()
+        global_inst_tracker.resetCounter()
+        yield False
+    print("end of region")
+    while True:
+        yield True
+
+
+def workend_handler():
+    print("reached workend, the region ends here")
+    yield True
+
+
+if use_markers:
+    on_exit_event = {ExitEvent.SIMPOINT_BEGIN: marker_handler()}
+else:
+    on_exit_event = {ExitEvent.MAX_INSTS: region_handler()}
+on_exit_event[ExitEvent.WORKEND] = workend_handler()
+
+simulator = Simulator(
+    board=board,
+    on_exit_event=on_exit_event,
+)
+
+simulator.run()
+
+print("Simulation Done")
+print(f"Ran region {region['region']} (sid {args.sid}) with weight {region['weight']}")
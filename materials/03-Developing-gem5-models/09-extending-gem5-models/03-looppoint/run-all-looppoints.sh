@@ -0,0 +1,10 @@
+#!/bin/bash
+
+# Simulate every region in looppoint.simpts (looppoint-run.py --sid=N), as
+# many at a time as the host's cores and memory allow, then print the
+# weighted prediction (simtools/simpoint_runner.py). Pass
+# --reference-stats <stats.txt of a full detailed run> to compare.
+PYTHONPATH=/workspaces/2024 python3 -m simtools.simpoint_runner \
+    --gem5 /workspaces/2024/gem5/build/X86/gem5.fast \
+    --simpoints looppoint.simpts --weights looppoint.weights \
+    --script looppoint-run.py --outdir 'looppoint{sid}-run' "$@"
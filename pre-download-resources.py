@@ -1,10 +1,20 @@
-from gem5.resources.resource import obtain_resource
+from pathlib import Path
 
-# grep "obtain_resource(.*)" materials/isca24/ -roh | sort | uniq
-# note, this does not work for workloads. We have to get the resources used
-# in each workload.
+from simtools.prefetch import collect, prefetch
 
-obtain_resource("x86-linux-kernel-5.4.0-105-generic").get_local_path()
-obtain_resource("x86-m5-exit").get_local_path()
-obtain_resource("x86-ubuntu-24.04-npb-img").get_local_path()
-obtain_resource("x86-ubuntu-24.04-img").get_local_path()
+# Every resource obtained with a literal id in the current materials (not
+# materials/archive) and the exercises, plus the ones the bootcamp needs that are only referenced
+# indirectly. Workloads are expanded into their kernels, disk images, etc.
+# by prefetch(), and all downloads run concurrently.
+root = Path(__file__).resolve().parent
+
+resources = collect(sorted(root.glob("materials/0*")) + [root / "exercise1"]) | {
+    ("x86-linux-kernel-5.4.0-105-generic", None),
+    ("x86-m5-exit", None),
+    ("x86-ubuntu-24.04-npb-img", None),
+    ("x86-ubuntu-24.04-img", None),
+}
+
+failed = prefetch(resources, jobs=8)
+for (rid, ver), err in failed:
+    print(f"Could not fetch {rid}@{ver or 'latest'}: {err}")
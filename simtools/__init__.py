@@ -0,0 +1,8 @@
+"""
+simtools — host-side helpers shared by the exercise and bootcamp configs.
+
+Modules that only touch files (sweeps, stats parsing, result databases) run
+under plain python3. Modules that build SimObjects or exit-event generators
+import gem5 lazily and are meant to be imported from a gem5 config script,
+with the repository root on PYTHONPATH.
+"""
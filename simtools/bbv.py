@@ -0,0 +1,117 @@
+"""
+bbv.py — Streaming reader for gem5 basic block vectors (simpoint.bb[.gz]).
+
+`addSimPointProbe()` writes one text line per interval,
+
+    T:<bb id>:<count> :<bb id>:<count> ...
+
+which for long full-system runs is tens of GB uncompressed. The reader
+decompresses and parses the stream a few MB at a time, normalizes every
+interval to sum 1 and projects it right away to a dense float32 vector of
+`dim` dimensions (random [-1, 1] matrix, one row per basic block id, from a
+fixed seed). The projected rows are appended to a raw float32 file that is
+opened as a read-only memory map, so neither the sparse vectors nor the
+projected matrix have to fit in RAM.
+
+The projected file is kept next to the BBV (<bbv>.proj<dim>-<seed>.f32)
+and reused as long as it is newer than the BBV.
+"""
+
+import gzip
+import os
+import socket
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+DIM = 15
+SEED = 493575226       # SimPoint 3.2's default projection seed
+ROW_BLOCK = 4096       # projection rows are generated per block of bb ids
+CHUNK_BYTES = 8 << 20  # text parsed per step
+
+
+class Projection:
+    """Random [-1, 1] matrix with one row per basic block, grown on demand."""
+
+    def __init__(self, dim: int = DIM, seed: int = SEED):
+        self.dim = dim
+        self.seed = seed
+        self.rows = np.empty((0, dim), dtype=np.float32)
+
+    def _grow(self, max_id: int) -> None:
+        have = self.rows.shape[0] // ROW_BLOCK
+        need = max_id // ROW_BLOCK + 1
+        # One generator per block keeps the matrix independent of read order.
+        blocks = [np.random.default_rng([self.seed, b])
+                  .uniform(-1.0, 1.0, (ROW_BLOCK, self.dim)).astype(np.float32)
+                  for b in range(have, need)]
+        self.rows = np.vstack([self.rows, *blocks])
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        if ids.size and ids.max() >= self.rows.shape[0]:
+            self._grow(int(ids.max()))
+        return self.rows[ids]
+
+
+def _open(path: Path):
+    return gzip.open(path, "rt") if Path(path).suffix == ".gz" else open(path, "r")
+
+
+def _chunks(path: Path, chunk_bytes: int) -> Iterator[List[str]]:
+    with _open(path) as f:
+        while True:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                return
+            yield [ln for ln in lines if ln.startswith("T")]
+
+
+def project_chunk(lines: List[str], proj: Projection) -> np.ndarray:
+    """Dense (len(lines), dim) float32 projections of one chunk of intervals."""
+    out = np.zeros((len(lines), proj.dim), dtype=np.float32)
+    if not lines:
+        return out
+    # One split over the whole chunk: "T:3:10 :7:2" -> "3 10 7 2".
+    pairs_per_line = np.array([ln.count(":") // 2 for ln in lines])
+    flat = " ".join(ln[1:] for ln in lines).replace(":", " ").split()
+    if not flat:
+        return out
+    pairs = np.array(flat, dtype=np.int64).reshape(-1, 2)
+    ids, counts = pairs[:, 0] - 1, pairs[:, 1].astype(np.float32)
+
+    nonempty = np.flatnonzero(pairs_per_line)
+    starts = np.concatenate(([0], np.cumsum(pairs_per_line)[:-1]))[nonempty]
+    line_of_pair = np.repeat(np.arange(len(lines)), pairs_per_line)
+    totals = np.bincount(line_of_pair, weights=counts, minlength=len(lines))
+    w = counts / totals[line_of_pair].astype(np.float32)
+
+    out[nonempty] = np.add.reduceat(proj.take(ids) * w[:, None], starts, axis=0)
+    return out
+
+
+def projected_path(bbv: Path, dim: int = DIM, seed: int = SEED) -> Path:
+    bbv = Path(bbv)
+    return bbv.with_name(f"{bbv.name}.proj{dim}-{seed}.f32")
+
+
+def project(bbv: Path, dim: int = DIM, seed: int = SEED, out: Optional[Path] = None,
+            chunk_bytes: int = CHUNK_BYTES) -> np.memmap:
+    """Project every interval of `bbv`; returns an (intervals, dim) read-only memmap."""
+    bbv = Path(bbv)
+    out = Path(out) if out else projected_path(bbv, dim, seed)
+    if not (out.exists() and out.stat().st_mtime >= bbv.stat().st_mtime):
+        proj = Projection(dim, seed)
+        # Per process: two projecting the same BBV must not share a temp file.
+        tmp = out.with_name(f"{out.name}.{socket.gethostname()}-{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                for lines in _chunks(bbv, chunk_bytes):
+                    project_chunk(lines, proj).tofile(f)
+            tmp.replace(out)
+        finally:
+            tmp.unlink(missing_ok=True)
+    n = out.stat().st_size // (4 * dim)
+    if n == 0:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.memmap(out, dtype=np.float32, mode="r", shape=(n, dim))
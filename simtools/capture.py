@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+capture.py — Many checkpoints from one (KVM) boot, into the checkpoint store.
+
+03-take-a-checkpoint.py boots, checkpoints once and exits, so a study that
+needs 30 checkpoints boots 30 times. CheckpointCapture keeps going after
+each checkpoint. The points are one of
+
+  work            every ExitEvent.WORKBEGIN (m5 work-begin marker);
+  ticks:N         every N ticks;
+  insts:N         every N instructions of core 0 (KVM cores need usePerf);
+  simpoints:P     the starts of the simpoints in P.simpts/P.weights
+                  (simtools.simpoint), minus `warmup` instructions, with
+                  `interval` instructions per simpoint interval.
+
+Tick and instruction points count from the start of the simulation, or
+with start="WORKBEGIN" from the first work-begin marker (so the boot is
+not sampled). Every checkpoint goes into the shared store
+(simtools/ckptstore.py) under the board's key with `at` naming the point
+(WORKBEGIN:3, TICKS:2000000000, INSTS_AFTER_WORKBEGIN:50000000, ...), and
+with the point's tick, instruction count, simpoint id and weight in its
+meta.json. Points already in the store are not taken again. Packing a
+checkpoint into the store pauses the simulation until it is done.
+
+<outdir>/capture.json lists the captured entries in order; a sampling run
+gets its checkpoint back with
+
+  from simtools.capture import checkpoints
+  for point, cpt in checkpoints("capture-m5out/capture.json"):
+      ...   # Simulator(checkpoint_path=cpt), point["weight"], ...
+
+Usage (in the config script)
+  capture = CheckpointCapture(board, workload, "insts:100000000", start="WORKBEGIN")
+  simulator = Simulator(board=board, on_exit_event=capture.handlers())
+  capture.run(simulator)
+
+Listing a capture
+  python3 -m simtools.capture capture-m5out/capture.json
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from simtools.ckptstore import CheckpointStore
+
+
+def parse_points(spec: str) -> Tuple[str, str]:
+    """'insts:1000' -> ('insts', '1000'), 'work' -> ('work', '')."""
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind not in ("work", "ticks", "insts", "simpoints"):
+        raise ValueError(f"unknown capture points '{spec}' (work, ticks:N, insts:N, simpoints:PREFIX)")
+    if kind in ("ticks", "insts") and (not arg.isdigit() or int(arg) <= 0):
+        raise ValueError(f"capture points '{spec}': N must be a positive integer")
+    if kind == "simpoints" and not arg:
+        raise ValueError(f"capture points '{spec}': give the .simpts/.weights prefix")
+    return kind, arg
+
+
+def simpoint_starts(prefix: str, interval: int, warmup: int) -> List[Dict[str, Any]]:
+    """Checkpoint positions for the simpoints in <prefix>.simpts/.weights."""
+    from simtools.simpoint import read_results
+
+    out = []
+    for sid, (iv, cluster, weight) in enumerate(read_results(Path(f"{prefix}.simpts"),
+                                                             Path(f"{prefix}.weights"))):
+        start = iv * interval
+        out.append({"sid": sid, "cluster": cluster, "weight": weight,
+                    "start": start, "position": max(0, start - warmup),
+                    "warmup": min(warmup, start)})
+    return sorted(out, key=lambda p: p["position"])
+
+
+def checkpoints(capture_json, store: Optional[CheckpointStore] = None
+                ) -> Iterator[Tuple[Dict[str, Any], Path]]:
+    """(point, checkpoint directory) for every point of a capture."""
+    capture = json.loads(Path(capture_json).read_text())
+    store = store or CheckpointStore(capture.get("store"))
+    for point in capture["points"]:
+        cpt = store.by_digest(point["digest"])
+        if cpt is None:
+            raise FileNotFoundError(f"{point['at']}: entry {point['digest']} is not in {store.root}")
+        yield point, cpt
+
+
+# ---------- gem5 side ----------
+
+class CheckpointCapture:
+    def __init__(self, board, workload, points: str, start: Optional[str] = None,
+                 store: Optional[CheckpointStore] = None, limit: Optional[int] = None,
+                 interval: int = 1_000_000, warmup: int = 1_000_000):
+        """
+        :param start: None, or "WORKBEGIN": count ticks/instructions from
+            the first work-begin marker.
+        :param limit: stop after this many points (periodic kinds run to the
+            end of the workload otherwise).
+        :param interval, warmup: simpoint interval and warmup, in instructions.
+        """
+        from simtools.ckptstore import key_for
+
+        self.kind, arg = parse_points(points)
+        self.spec = points
+        if start not in (None, "WORKBEGIN"):
+            raise ValueError(f"start must be None or 'WORKBEGIN', not {start!r}")
+        self.start = start
+        self.board = board
+        self.store = store or CheckpointStore()
+        self.limit = limit
+        self.every = int(arg) if self.kind in ("ticks", "insts") else None
+        self.simpoints = (simpoint_starts(arg, interval, warmup)
+                          if self.kind == "simpoints" else None)
+        if self.simpoints is not None and limit is None:
+            self.limit = len(self.simpoints)
+        # The keys of the points only differ in `at`.
+        self._key = key_for(board, workload, "WORKBEGIN")
+        if self.kind in ("insts", "simpoints"):
+            for core in board.get_processor().get_cores():
+                if getattr(core.core, "usePerf", True) is False:
+                    raise ValueError("instruction points under KVM need core.usePerf = True")
+        self.simulator = None
+        self.captured: List[Dict[str, Any]] = []
+        self.works = 0
+        self.origin = 0  # tick that tick points count from
+
+    def _insts(self) -> Optional[int]:
+        try:
+            return int(self.board.get_processor().get_cores()[0].core.totalInsts())
+        except Exception:
+            return None
+
+    def _at(self, position: int) -> str:
+        name = "TICKS" if self.kind == "ticks" else "INSTS"
+        if self.start:
+            name += f"_AFTER_{self.start}"
+        return f"{name}:{position}"
+
+    def _take(self, at: str, **info) -> bool:
+        """Checkpoint into the store; True once the last point is taken."""
+        import m5
+
+        key = replace(self._key, at=at)
+        point = {"index": len(self.captured), "at": at, "tick": m5.curTick(),
+                 "insts": self._insts(), **info}
+        point["digest"] = self.store.add(key, self.simulator.save_checkpoint,
+                                         {"capture": {**point, "points": self.spec}})
+        self.captured.append(point)
+        print(f"capture: {at} (tick {point['tick']}) -> {point['digest']}")
+        return self.limit is not None and len(self.captured) >= self.limit
+
+    def _arm(self) -> None:
+        """Schedule the exit at the next tick/instruction point."""
+        import m5
+
+        core = self.board.get_processor().get_cores()[0]
+        n = len(self.captured)
+        if self.kind == "ticks":
+            m5.scheduleTickExitFromCurrent(self.every)
+        elif self.kind == "insts":
+            core._set_simpoint([self.every], True)  # relative to now
+        elif self.kind == "simpoints" and n < len(self.simpoints):
+            done = self.simpoints[n - 1]["position"] if n else 0
+            core._set_simpoint([self.simpoints[n]["position"] - done], True)
+
+    def _take_simpoints(self, position: int) -> bool:
+        # Simpoints at the same position (e.g. several within the warmup of
+        # the origin) share one exit, and one checkpoint.
+        while len(self.captured) < len(self.simpoints):
+            p = self.simpoints[len(self.captured)]
+            if p["position"] != position:
+                break
+            if self._take(self._at(position), **p):
+                return True
+        return False
+
+    def _begin(self) -> bool:
+        import m5
+
+        self.origin = m5.curTick()
+        if self.kind == "simpoints" and self._take_simpoints(0):
+            return True
+        self._arm()
+        return False
+
+    def _on_point(self) -> Iterator[bool]:
+        import m5
+
+        while True:
+            if self.kind == "ticks":
+                done = self._take(self._at(m5.curTick() - self.origin))
+            elif self.kind == "insts":
+                done = self._take(self._at((len(self.captured) + 1) * self.every))
+            else:
+                done = self._take_simpoints(self.simpoints[len(self.captured)]["position"])
+            if done:
+                yield True
+                return
+            self._arm()
+            yield False
+
+    def _on_workbegin(self) -> Iterator[bool]:
+        while True:
+            self.works += 1
+            if self.kind == "work":
+                yield self._take(f"WORKBEGIN:{self.works}")
+            elif self.start == "WORKBEGIN" and self.works == 1:
+                yield self._begin()
+            else:
+                yield False
+
+    def handlers(self, on_exit_event: Optional[Dict] = None) -> Dict:
+        """on_exit_event for the Simulator; the capture owns the events it uses."""
+        from gem5.simulate.exit_event import ExitEvent
+
+        handlers = dict(on_exit_event or {})
+        handlers[ExitEvent.WORKBEGIN] = self._on_workbegin()
+        if self.kind == "ticks":
+            handlers[ExitEvent.SCHEDULED_TICK] = self._on_point()
+        elif self.kind in ("insts", "simpoints"):
+            handlers[ExitEvent.SIMPOINT_BEGIN] = self._on_point()
+        return handlers
+
+    def run(self, simulator, *args, **kwargs) -> List[Dict[str, Any]]:
+        """simulator.run() until the last point (or the end); writes capture.json."""
+        from m5 import options
+
+        self.simulator = simulator
+        if self.start is None and self.kind != "work":
+            simulator._instantiate()  # tick exits are scheduled from the current tick
+            self._begin()
+        if self.limit is None or len(self.captured) < self.limit:
+            simulator.run(*args, **kwargs)
+        out = Path(options.outdir) / "capture.json"
+        out.write_text(json.dumps({"points_spec": self.spec, "start": self.start,
+                                   "store": str(self.store.root.resolve()),
+                                   "points": self.captured}, indent=2))
+        print(f"capture: {len(self.captured)} checkpoints, listed in {out}")
+        return self.captured
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.capture")
+    ap.add_argument("capture", type=Path, help="capture.json of a capture run")
+    ap.add_argument("--root", type=Path, default=None, help="store directory (default: the capture's)")
+    args = ap.parse_args()
+
+    capture = json.loads(args.capture.read_text())
+    store = CheckpointStore(args.root or capture.get("store"))
+    print(f"{capture['points_spec']}"
+          f"{' after ' + capture['start'] if capture.get('start') else ''}, store {store.root}")
+    missing = 0
+    for p in capture["points"]:
+        there = (store.root / p["digest"] / "key.json").exists()
+        missing += not there
+        extra = f"  sid {p['sid']} weight {p['weight']:.4f}" if "sid" in p else ""
+        print(f"{p['index']:>4}  {p['at']:<32} tick {p['tick']:>16}  {p['digest']}"
+              f"{'' if there else '  (missing)'}{extra}")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
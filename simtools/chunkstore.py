@@ -0,0 +1,259 @@
+"""
+chunkstore.py — Deduplicated, compressed storage for checkpoint directories.
+
+Checkpoints of the same board taken after the same boot are almost the
+same bytes: the physical-memory image dominates, and most of it is either
+zero or identical between them. A packed directory is stored as
+
+  - chunks: every file is cut at content-defined boundaries (a rolling sum
+    of a random byte table over a 48-byte window hits a 16-bit mask; chunks
+    are 16-256 KiB, 64 KiB on average), so an insertion only changes the
+    chunks around it. Each distinct chunk is written once, as
+    chunks/<sha256[:2]>/<sha256>.zst (zstd, level 3) or .zz (zlib, when the
+    zstandard module is not installed). All-zero chunks are not stored;
+  - a manifest (JSON): per file its size, mode and chunk list.
+
+gem5 writes physical memory gzip-compressed, which would hide the
+duplicates, so gzip files are decompressed before chunking and unpacked
+as plain files; gem5 reads those through the same gzopen() call.
+
+The rolling hash is computed with numpy a block at a time. Packing and
+unpacking compress/decompress chunks in a thread pool (zlib, zstandard and
+hashlib release the GIL); unpacking writes every chunk at its offset with
+pwrite() and leaves zero chunks as holes, so restoring a mostly-empty 3GB
+image costs little more than its non-zero part.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # zlib is always there; .zst chunks then cannot be read
+    zstandard = None
+
+from simtools import hostres
+
+WINDOW = 48
+MIN_CHUNK = 16 << 10
+MAX_CHUNK = 256 << 10
+MASK = (64 << 10) - 1  # 64 KiB average
+BLOCK = 8 << 20  # bytes hashed per numpy pass
+GEAR = np.random.default_rng(0x5EED).integers(0, 2**32, 256, dtype=np.uint32)
+
+
+# ---------- chunking ----------
+
+def _candidates(block: bytes, tail: bytes) -> np.ndarray:
+    """Offsets in `block` after which the window hash hits the mask.
+
+    `tail` is the end of the previous block, so windows that straddle two
+    blocks are hashed too; a boundary depends only on the 48 bytes before it.
+    """
+    buf = np.frombuffer(tail + block, dtype=np.uint8)
+    if len(buf) < WINDOW:
+        return np.empty(0, dtype=np.int64)
+    c = np.cumsum(GEAR[buf], dtype=np.uint32)
+    h = c[WINDOW - 1:].copy()
+    h[1:] -= c[:-WINDOW]
+    return np.flatnonzero((h & MASK) == 0) + (WINDOW - len(tail))
+
+
+def _cuts(cand: np.ndarray, length: int, final: bool) -> List[int]:
+    """Chunk ends in a buffer of `length` bytes that starts at a boundary."""
+    cuts, pos = [], 0
+    while True:
+        i = np.searchsorted(cand, pos + MIN_CHUNK)
+        if i < len(cand) and cand[i] <= pos + MAX_CHUNK:
+            pos = int(cand[i])
+        elif pos + MAX_CHUNK <= length:
+            pos += MAX_CHUNK
+        else:
+            break
+        cuts.append(pos)
+    if final and pos < length:
+        cuts.append(length)
+    return cuts
+
+
+def _blocks(path: Path) -> Tuple[Iterator[bytes], bool]:
+    """The file's contents a block at a time, gunzipped if it is gzip."""
+    with open(path, "rb") as f:
+        gz = f.read(2) == b"\x1f\x8b"
+
+    def read():
+        with (gzip.open(path, "rb") if gz else open(path, "rb")) as f:
+            while True:
+                b = f.read(BLOCK)
+                if not b:
+                    return
+                yield b
+    return read(), gz
+
+
+def chunks(path: Path, pool: Optional[ThreadPoolExecutor] = None,
+           depth: int = 1) -> Tuple[Iterator[bytes], bool]:
+    """(content-defined chunks of the file, whether it was gzip).
+
+    With a pool, up to `depth` blocks are hashed in parallel ahead of the
+    one being cut.
+    """
+    blocks, gz = _blocks(path)
+
+    def hashed():
+        ahead, tail = [], b""
+        for block in blocks:
+            if pool is None:
+                ahead.append((block, _candidates(block, tail)))
+            else:
+                ahead.append((block, pool.submit(_candidates, block, tail)))
+            tail = block[-(WINDOW - 1):]
+            if len(ahead) > depth:
+                block, cand = ahead.pop(0)
+                yield block, cand if pool is None else cand.result()
+        for block, cand in ahead:
+            yield block, cand if pool is None else cand.result()
+
+    def gen():
+        carry = b""
+        cand_carry = np.empty(0, dtype=np.int64)
+        for block, cand in hashed():
+            buf = carry + block
+            cand = np.concatenate((cand_carry, cand + len(carry)))
+            start = 0
+            for end in _cuts(cand, len(buf), final=False):
+                yield buf[start:end]
+                start = end
+            carry = buf[start:]
+            cand_carry = cand[cand > start] - start
+        start = 0
+        for end in _cuts(cand_carry, len(carry), final=True):
+            yield carry[start:end]
+            start = end
+    return gen(), gz
+
+
+# ---------- chunk files ----------
+
+def _compress(data: bytes) -> Tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data), "zst"
+    return zlib.compress(data, 1), "zz"
+
+
+def _chunk_path(root: Path, digest: str, codec: str) -> Path:
+    return root / digest[:2] / f"{digest}.{codec}"
+
+
+def read_chunk(root: Path, digest: str) -> bytes:
+    p = _chunk_path(root, digest, "zst")
+    if p.exists():
+        if zstandard is None:
+            raise RuntimeError(f"{p}: zstd chunk, but the zstandard module is not installed")
+        return zstandard.ZstdDecompressor().decompress(p.read_bytes())
+    return zlib.decompress(_chunk_path(root, digest, "zz").read_bytes())
+
+
+def has_chunk(root: Path, digest: str) -> bool:
+    return any(_chunk_path(root, digest, c).exists() for c in ("zst", "zz"))
+
+
+def _store_chunk(root: Path, data: bytes) -> Tuple[str, int]:
+    """Write one chunk unless it is already there; (digest, bytes written)."""
+    digest = hashlib.sha256(data).hexdigest()
+    if has_chunk(root, digest):
+        return digest, 0
+    blob, codec = _compress(data)
+    p = _chunk_path(root, digest, codec)
+    if not p.parent.exists():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.chmod(p.parent, 0o2775)  # other users of a shared store add chunks too
+        except OSError:
+            pass
+    tmp = p.with_name(f"{p.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    tmp.write_bytes(blob)
+    os.replace(tmp, p)
+    return digest, len(blob)
+
+
+def chunk_files(root: Path) -> Iterator[Path]:
+    return (p for p in Path(root).glob("??/*") if not p.name.endswith(".tmp"))
+
+
+# ---------- directories ----------
+
+def pack(src: Path, root: Path, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Store every file under `src` in the chunk store `root`; the manifest."""
+    workers = workers or hostres.usable_cpus()
+    files, written, logical = [], 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path in sorted(p for p in Path(src).rglob("*") if p.is_file()):
+            stream, gz = chunks(path, pool, depth=max(1, workers // 2))
+            entries: List[List[Any]] = []
+            pending: List[List[Any]] = []
+
+            def settle():
+                nonlocal written
+                for e in pending:
+                    e[0], n = e[0].result()
+                    written += n
+                pending.clear()
+
+            for data in stream:
+                if not np.frombuffer(data, dtype=np.uint8).any():
+                    entries.append([None, len(data)])
+                    continue
+                entries.append([pool.submit(_store_chunk, root, data), len(data)])
+                pending.append(entries[-1])
+                if len(pending) >= 4 * workers:
+                    settle()
+            settle()
+            size = sum(n for _, n in entries)
+            logical += size
+            files.append({"path": str(path.relative_to(src)), "size": size,
+                          "mode": path.stat().st_mode & 0o777, "gunzipped": gz,
+                          "chunks": entries})
+    return {"files": files, "bytes": logical, "written": written}
+
+
+def unpack(manifest: Dict[str, Any], root: Path, dest: Path,
+           workers: Optional[int] = None) -> None:
+    """Recreate a packed directory at `dest` (zero chunks become holes)."""
+    workers = workers or hostres.usable_cpus()
+    dest = Path(dest)
+
+    def put(fd: int, digest: str, offset: int) -> None:
+        os.pwrite(fd, read_chunk(root, digest), offset)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for f in manifest["files"]:
+            path = dest / f["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, f["mode"])
+            try:
+                os.ftruncate(fd, f["size"])
+                offset, jobs = 0, []
+                for digest, n in f["chunks"]:
+                    if digest is not None:
+                        jobs.append(pool.submit(put, fd, digest, offset))
+                    offset += n
+                for j in jobs:
+                    j.result()
+            finally:
+                os.close(fd)
+
+
+def referenced(manifest: Dict[str, Any]) -> Iterator[str]:
+    for f in manifest["files"]:
+        for digest, _ in f["chunks"]:
+            if digest is not None:
+                yield digest
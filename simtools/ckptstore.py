@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+ckptstore.py — Checkpoint library shared by every script and user on a host.
+
+03-take-a-checkpoint.py, p4/p5 and simpoint-checkpoint.py each boot (or
+fast-forward) from scratch and keep their checkpoint in a local directory.
+The store keeps them in one place instead, indexed by what the checkpoint
+depends on:
+
+  - layout: board, processor and memory classes, ISA, core count and
+    memory size (a checkpoint only restores into the same SimObject tree
+    and address map; caches and the CPU model may differ);
+  - kernel and disk: resource id@version (FS), empty for SE;
+  - workload: resource id@version, or binary path, size and mtime (SE);
+  - at: the exit-event point, EVENT:N as in simtools/prefix.py
+    (the N-th ExitEvent.EVENT).
+
+Each entry is <root>/<digest>/ with the checkpoint in cpt/, the producing
+run's outdir in m5out/, and key.json/meta.json. The root is
+$SIMTOOLS_CKPT_STORE, else simtools-checkpoints/ under $GEM5_RESOURCE_DIR
+(~/.cache/gem5), which is already the place shared between users; give
+the directory a common group and the store keeps its entries group
+writable.
+
+A missing checkpoint is produced exactly once: the first process takes an
+exclusive lock on <digest>.lock (fcntl.flock, released if it dies), runs
+the producer into a temporary directory and renames it into place; every
+other process asking for the same key waits on the lock and then finds
+the entry.
+
+Entries are stored deduplicated (simtools/chunkstore.py): the checkpoint
+is cut into content-defined chunks kept once each, compressed, under
+<root>/chunks/, and the entry keeps only cpt.manifest.json. Post-boot
+checkpoints of the same board share most of their memory image, so a new
+one mostly adds its manifest. lookup()/ensure() unpack cpt/ on first use
+(chunks decompressed in parallel, zero pages left as holes) and later
+callers reuse it; `gc` deletes unpacked copies not used for a day, and
+chunks no manifest refers to any more.
+
+Usage (config scripts that use simtools.prefix)
+  shared = SharedPrefix.from_args(args)     # with --checkpoint-store given
+  ...
+  board.set_workload(workload)
+  shared.use_store(board, workload)         # restore from the store
+
+The producer is the same script re-run by gem5 with --take-checkpoint.
+
+Managing the store
+  python3 -m simtools.ckptstore list
+  python3 -m simtools.ckptstore remove DIGEST [...]
+  python3 -m simtools.ckptstore gc [--idle-hours 24]
+"""
+
+import argparse
+import fcntl
+import getpass
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from simtools import chunkstore
+from simtools.workload import workload_key
+
+Producer = Callable[[Path, Path], List[str]]  # (checkpoint dir, outdir) -> command
+MANIFEST = "cpt.manifest.json"
+
+
+def default_root() -> Path:
+    env = os.environ.get("SIMTOOLS_CKPT_STORE")
+    if env:
+        return Path(env)
+    base = os.environ.get("GEM5_RESOURCE_DIR") or Path.home() / ".cache" / "gem5"
+    return Path(base) / "simtools-checkpoints"
+
+
+def normalize_at(at: str) -> str:
+    """'workbegin' -> 'WORKBEGIN:1', 'exit:2' -> 'EXIT:2'."""
+    name, _, count = at.partition(":")
+    return f"{name.strip().upper()}:{int(count) if count else 1}"
+
+
+@dataclass(frozen=True)
+class CheckpointKey:
+    layout: str
+    kernel: str
+    disk: str
+    workload: str
+    at: str
+
+    def digest(self) -> str:
+        text = json.dumps(asdict(self), sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+    def describe(self) -> str:
+        return f"{self.workload} after {self.at} on {self.layout}"
+
+
+# ---------- gem5 side: keys from a board ----------
+
+def _resource_name(res) -> str:
+    if res is None:
+        return ""
+    if hasattr(res, "get_id"):
+        return f"{res.get_id()}@{res.get_resource_version()}"
+    return workload_key(res)  # a binary path
+
+
+def key_for(board, workload: Union[str, Path, object], at: str) -> CheckpointKey:
+    """Key of a checkpoint of `board` running `workload`, taken at `at`."""
+    proc = board.get_processor()
+    mem = board.get_memory()
+    layout = (f"{type(board).__name__}/{type(proc).__name__}/{type(mem).__name__}/"
+              f"{proc.get_isa().name}/{proc.get_num_cores()} cores/{mem.get_size()} B")
+    params = workload.get_parameters() if hasattr(workload, "get_parameters") else {}
+    kernel = _resource_name(params.get("kernel"))
+    disk = _resource_name(params.get("disk_image"))
+    return CheckpointKey(layout, kernel, disk, _resource_name(workload), normalize_at(at))
+
+
+def _gem5() -> str:
+    try:
+        return os.readlink("/proc/self/exe")
+    except OSError:
+        return sys.executable
+
+
+def rerun_command(at: str) -> Producer:
+    """Re-run this gem5 process's script with --take-checkpoint (simtools.prefix)."""
+    gem5 = _gem5()
+    script, argv = sys.argv[0], sys.argv[1:]
+
+    def command(cpt: Path, outdir: Path) -> List[str]:
+        return [gem5, "-re", f"--outdir={outdir}", script, *argv,
+                "--prefix-at", at, "--take-checkpoint", str(cpt)]
+    return command
+
+
+# ---------- the store ----------
+
+class CheckpointStore:
+    def __init__(self, root: Optional[Path] = None, dedup: bool = True):
+        """
+        :param dedup: store new entries in the chunk store (and keep cpt/
+            only as an unpacked copy); entries are read either way.
+        """
+        self.root = Path(root) if root else default_root()
+        self.chunks = self.root / "chunks"
+        self.dedup = dedup
+
+    def _entry(self, key: CheckpointKey) -> Path:
+        return self.root / key.digest()
+
+    def lookup(self, key: CheckpointKey) -> Optional[Path]:
+        """The checkpoint directory if the store has one for `key`."""
+        entry = self._entry(key)
+        if not (entry / "key.json").exists():
+            return None
+        if not (entry / "cpt").exists():
+            with self.lock(key):
+                self._unpack(entry)
+        return self._used(entry)
+
+    def _mkroot(self) -> None:
+        if not self.root.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            try:
+                os.chmod(self.root, 0o2775)
+            except OSError:
+                pass
+
+    @contextmanager
+    def _flock(self, name: str, op: int) -> Iterator[None]:
+        self._mkroot()
+        fd = os.open(self.root / name, os.O_RDONLY | os.O_CREAT, 0o664)
+        try:
+            fcntl.flock(fd, op)  # BlockingIOError with LOCK_NB if held
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def lock(self, key: CheckpointKey) -> Iterator[None]:
+        return self._flock(f"{key.digest()}.lock", fcntl.LOCK_EX)
+
+    def _chunk_lock(self, exclusive: bool = False) -> Iterator[None]:
+        # Shared while chunks are written or read, exclusive for gc's sweep.
+        return self._flock(".chunks.lock", fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def ensure(self, key: CheckpointKey, producer: Producer) -> Path:
+        """The checkpoint for `key`, produced first if no one has yet."""
+        found = self.lookup(key)
+        if found:
+            return found
+        with self.lock(key):
+            entry = self._entry(key)
+            if (entry / "key.json").exists():  # produced while we waited
+                print(f"ckptstore: {key.describe()}: produced by another process")
+                self._unpack(entry)
+                return self._used(entry)
+            return self._produce(key, producer)
+
+    def _used(self, entry: Path) -> Path:
+        try:
+            (entry / ".last-used").touch()
+        except OSError:
+            pass
+        return entry / "cpt"
+
+    def _unpack(self, entry: Path) -> None:
+        """Recreate cpt/ from the chunk store (entry lock held)."""
+        if (entry / "cpt").exists():
+            return
+        manifest = json.loads((entry / MANIFEST).read_text())
+        tmp = entry / f".cpt-{socket.gethostname()}-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        t0 = time.monotonic()
+        with self._chunk_lock():
+            chunkstore.unpack(manifest, self.chunks, tmp)
+        _group_writable(tmp)
+        os.rename(tmp, entry / "cpt")
+        print(f"ckptstore: unpacked {entry.name} ({manifest['bytes'] / 2**30:.2f} GiB) "
+              f"in {time.monotonic() - t0:.1f} s")
+
+    def _pack(self, entry: Path) -> Dict[str, Any]:
+        """Put cpt/ into the chunk store and write its manifest."""
+        t0 = time.monotonic()
+        with self._chunk_lock():
+            manifest = chunkstore.pack(entry / "cpt", self.chunks)
+            # Before the lock is released: gc's sweep only keeps the chunks
+            # of the manifests it finds, and must never see half of one.
+            tmp = entry / f".{MANIFEST}-{os.getpid()}"
+            tmp.write_text(json.dumps(manifest))
+            os.replace(tmp, entry / MANIFEST)
+        print(f"ckptstore: packed {entry.name}: {manifest['bytes'] / 2**30:.2f} GiB, "
+              f"{manifest['written'] / 2**20:.1f} MiB new chunks, "
+              f"{time.monotonic() - t0:.1f} s")
+        return manifest
+
+    def _tmp(self, key: CheckpointKey) -> Path:
+        tmp = self.root / f".tmp-{key.digest()}-{socket.gethostname()}-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        return tmp
+
+    def _meta(self, seconds: float, command: List[str], **extra) -> Dict[str, Any]:
+        return {"created": time.time(), "user": getpass.getuser(),
+                "host": socket.gethostname(), "seconds": seconds,
+                "command": command, **extra}
+
+    def _produce(self, key: CheckpointKey, producer: Producer) -> Path:
+        tmp = self._tmp(key)
+        cmd = producer(tmp / "cpt", tmp / "m5out")
+        print(f"ckptstore: {key.describe()}: not in {self.root}, producing it")
+        t0 = time.monotonic()
+        code = subprocess.call(cmd)
+        if code != 0 or not (tmp / "cpt" / "m5.cpt").exists():
+            raise RuntimeError(f"ckptstore: producer exited {code} without a checkpoint "
+                               f"(log in {tmp / 'm5out'}): {' '.join(cmd)}")
+        entry = self._finish(tmp, key, self._meta(time.monotonic() - t0, cmd), unpacked=True)
+        return self._used(entry)
+
+    def has(self, key: CheckpointKey) -> bool:
+        return (self._entry(key) / "key.json").exists()
+
+    def add(self, key: CheckpointKey, save: Callable[[Path], None],
+            meta: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store a checkpoint taken in this process: `save(dir)` writes it (e.g.
+        simulator.save_checkpoint). Nothing is taken if the key is already
+        there. Returns the entry's digest.
+        """
+        with self.lock(key):
+            if self.has(key):
+                print(f"ckptstore: {key.describe()}: already stored")
+                return key.digest()
+            tmp = self._tmp(key)
+            t0 = time.monotonic()
+            save(tmp / "cpt")
+            if not (tmp / "cpt" / "m5.cpt").exists():
+                raise RuntimeError(f"ckptstore: no checkpoint written to {tmp / 'cpt'}")
+            command = [_gem5(), *sys.argv]
+            self._finish(tmp, key, self._meta(time.monotonic() - t0, command, **(meta or {})),
+                         unpacked=False)
+        return key.digest()
+
+    def _finish(self, tmp: Path, key: CheckpointKey, meta: Dict[str, Any],
+                unpacked: bool) -> Path:
+        """Move a complete temporary entry into place (entry lock held)."""
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        if self.dedup:
+            self._pack(tmp)
+            shutil.rmtree(tmp / "cpt")
+            if unpacked:
+                # The unpacked copy has plain, sparse memory stores, which
+                # restore faster than gem5's gzip ones (simtools/fastrestore.py).
+                self._unpack(tmp)
+        (tmp / "key.json").write_text(json.dumps(asdict(key), indent=2))
+        _group_writable(tmp)
+        entry = self._entry(key)
+        shutil.rmtree(entry, ignore_errors=True)  # an incomplete leftover
+        os.rename(tmp, entry)
+        print(f"ckptstore: stored {key.describe()} as {entry.name}")
+        return entry
+
+    def entries(self) -> List[dict]:
+        out = []
+        for k in sorted(self.root.glob("*/key.json")) if self.root.exists() else []:
+            entry = k.parent
+            if entry.name.startswith("."):
+                continue
+            try:
+                meta = json.loads((entry / "meta.json").read_text())
+            except (OSError, ValueError):
+                meta = {}
+            try:
+                size = json.loads((entry / MANIFEST).read_text())["bytes"]
+                packed = True
+            except (OSError, ValueError):
+                size = sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+                packed = False
+            out.append({"digest": entry.name, "key": json.loads(k.read_text()),
+                        "bytes": size, "packed": packed,
+                        "unpacked": (entry / "cpt").exists(), **meta})
+        return out
+
+    def chunk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in chunkstore.chunk_files(self.chunks))
+
+    def by_digest(self, digest: str) -> Optional[Path]:
+        """lookup() for an entry known by its digest (e.g. from a capture)."""
+        entry = self.root / digest
+        if not (entry / "key.json").exists():
+            return None
+        return self.lookup(CheckpointKey(**json.loads((entry / "key.json").read_text())))
+
+    def remove(self, digest: str) -> bool:
+        entry = self.root / digest
+        if not (entry / "key.json").exists():
+            return False
+        key = CheckpointKey(**json.loads((entry / "key.json").read_text()))
+        with self.lock(key):
+            shutil.rmtree(entry)
+        return True  # its chunks go at the next gc
+
+    def gc(self, idle_hours: float = 24.0) -> Dict[str, int]:
+        """Pack plain entries, drop idle unpacked copies, delete unused chunks."""
+        stats = {"packed": 0, "dropped": 0, "chunks": 0, "bytes": 0}
+        idle = time.time() - 3600 * idle_hours
+        for e in self.entries():
+            entry = self.root / e["digest"]
+            try:
+                with self._flock(f"{entry.name}.lock", fcntl.LOCK_EX | fcntl.LOCK_NB):
+                    if not e["packed"] and self.dedup:
+                        self._pack(entry)
+                        stats["packed"] += 1
+                    used = entry / ".last-used"
+                    last = used.stat().st_mtime if used.exists() else 0
+                    if (entry / MANIFEST).exists() and (entry / "cpt").exists() and last < idle:
+                        shutil.rmtree(entry / "cpt")
+                        stats["dropped"] += 1
+            except BlockingIOError:  # being produced or unpacked
+                continue
+        # A producer that died leaves its .tmp-<digest>-... behind.
+        for tmp in self.root.glob(".tmp-*"):
+            try:
+                with self._flock(f"{tmp.name.split('-')[1]}.lock", fcntl.LOCK_EX | fcntl.LOCK_NB):
+                    shutil.rmtree(tmp, ignore_errors=True)
+            except BlockingIOError:
+                continue
+        with self._chunk_lock(exclusive=True):
+            live = set()
+            for m in self.root.glob(f"*/{MANIFEST}"):
+                live.update(chunkstore.referenced(json.loads(m.read_text())))
+            for p in list(chunkstore.chunk_files(self.chunks)):
+                if p.name.split(".")[0] not in live:
+                    stats["chunks"] += 1
+                    stats["bytes"] += p.stat().st_size
+                    p.unlink()
+            for p in self.chunks.glob("??/*.tmp"):
+                p.unlink()
+        return stats
+
+
+def _group_writable(top: Path) -> None:
+    for d, _, files in os.walk(top):
+        for p in [d, *(os.path.join(d, f) for f in files)]:
+            os.chmod(p, os.stat(p).st_mode | 0o060)
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.ckptstore")
+    ap.add_argument("--root", type=Path, default=None, help="store directory (default: %s)" % default_root())
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="entries with their keys and sizes")
+    rm = sub.add_parser("remove", help="delete entries")
+    rm.add_argument("digests", nargs="+")
+    gc = sub.add_parser("gc", help="pack plain entries, drop idle unpacked copies, "
+                                   "delete unreferenced chunks")
+    gc.add_argument("--idle-hours", type=float, default=24.0,
+                    help="keep unpacked copies used more recently (default 24)")
+    args = ap.parse_args()
+
+    store = CheckpointStore(args.root)
+    if args.cmd == "list":
+        for e in store.entries():
+            k = e["key"]
+            state = ("packed+unpacked" if e["unpacked"] else "packed") if e["packed"] else "plain"
+            print(f"{e['digest']}  {e['bytes'] / 2**30:7.2f} GiB  {e.get('user', '?'):<10} "
+                  f"{k['workload']} after {k['at']}")
+            print(f"    {k['layout']}  kernel={k['kernel'] or '-'} disk={k['disk'] or '-'}  [{state}]")
+        print(f"chunks: {store.chunk_bytes() / 2**30:.2f} GiB")
+    elif args.cmd == "remove":
+        missing = [d for d in args.digests if not store.remove(d)]
+        if missing:
+            sys.exit(f"not in {store.root}: {', '.join(missing)}")
+    elif args.cmd == "gc":
+        s = store.gc(args.idle_hours)
+        print(f"packed {s['packed']} entries, dropped {s['dropped']} unpacked copies, "
+              f"deleted {s['chunks']} chunks ({s['bytes'] / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+elfie_batch.py — Run a suite of ELFie regions in parallel and combine them.
+
+An ELFie suite is a list of regions, each an ELFie resource with its start
+and end (PC, count) markers and the region's weight in the whole program.
+The list is a text file, one region per line:
+
+    # resource            weight   start            end
+    wrf-s.1_globalr13     0.0312   0x100b643:1      0x526730:297879
+    wrf-s.1_globalr14     0.0871   0x100b643:1      0x526730:310422
+
+Region N (its line among the non-comment lines) runs as
+
+    gem5 -re --outdir=<outdir> run-elfies.py --manifest <file> --sid=N
+
+which resets the stats at the start marker and dumps them at the end
+marker. The processes are started as the host has room for them
+(simtools/simpoint_runner.run_jobs); a region whose outdir already has an
+IPC is not run again unless --force is given. Afterwards the per-region
+dumps are combined into weighted whole-program estimates of every stat
+(simtools/simpoint_aggregate.py); weights are renormalized over the
+regions that produced stats.
+
+Usage
+  python3 -m simtools.elfie_batch [--manifest elfies.txt] [--script run-elfies.py] \
+      [--outdir 'elfie{sid}-run'] [--jobs N] [--program-insts N] \
+      [--json estimates.json] [-- extra script args]
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+from simtools import hostres
+from simtools.simpoint_aggregate import DEFAULT_STATS, estimate, predicted, print_table
+from simtools.simpoint_runner import SimPointJob, ipc_of, run_jobs
+
+
+@dataclass
+class ELFieRegion:
+    resource: str
+    weight: float
+    start: Tuple[int, int]  # (pc, count)
+    end: Tuple[int, int]
+
+
+def _marker(text: str) -> Tuple[int, int]:
+    pc, _, count = text.partition(":")
+    return int(pc, 0), int(count or 1)
+
+
+def read_manifest(path: Path) -> List[ELFieRegion]:
+    regions = []
+    for lineno, line in enumerate(Path(path).read_text().split("\n"), 1):
+        fields = line.split("#", 1)[0].split()
+        if not fields:
+            continue
+        if len(fields) != 4:
+            raise ValueError(f"{path}:{lineno}: expected 'resource weight start_pc:count end_pc:count'")
+        regions.append(ELFieRegion(fields[0], float(fields[1]),
+                                   _marker(fields[2]), _marker(fields[3])))
+    if not regions:
+        raise ValueError(f"{path}: no ELFie regions")
+    return regions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--manifest", type=Path, default=Path("elfies.txt"),
+                    help="one 'resource weight start end' line per region")
+    ap.add_argument("--gem5", default="gem5")
+    ap.add_argument("--script", default="run-elfies.py")
+    ap.add_argument("--outdir", default="elfie{sid}-run", help="per-region outdir pattern")
+    ap.add_argument("--jobs", type=int, help="upper bound on parallel gem5 processes")
+    ap.add_argument("--mem-per-job", default="6GiB", help="expected peak RSS of one run")
+    ap.add_argument("--force", action="store_true", help="rerun regions with cached results")
+    ap.add_argument("--program-insts", type=float,
+                    help="instructions in the whole program (scales counts)")
+    ap.add_argument("--stats", nargs="+", default=DEFAULT_STATS,
+                    help="regexes of the stats to print (the JSON has all)")
+    ap.add_argument("--json", type=Path, help="write every estimate here")
+    ap.add_argument("script_args", nargs="*", help="passed to the script (after --)")
+    args = ap.parse_args()
+
+    try:
+        regions = read_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        sys.exit(f"elfie_batch: {e}")
+    jobs = [SimPointJob(sid, sid, sid, r.weight, Path(args.outdir.format(sid=sid)))
+            for sid, r in enumerate(regions)]
+    todo = [j for j in jobs if args.force or ipc_of(j.outdir) is None]
+    print(f"elfie_batch: {len(jobs)} regions, {len(jobs) - len(todo)} cached, {len(todo)} to run")
+
+    codes = run_jobs(todo, [args.gem5, args.script, f"--manifest={args.manifest.resolve()}",
+                            *args.script_args],
+                     args.jobs, hostres.to_bytes(args.mem_per_job))
+    failed = sorted(sid for sid, c in codes.items() if c != 0)
+    have = [j for j in jobs if ipc_of(j.outdir) is not None]
+    if not have:
+        sys.exit("elfie_batch: no region produced stats")
+    try:
+        result = estimate([j.outdir for j in have], [j.weight for j in have],
+                          program_insts=args.program_insts)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(f"elfie_batch: {e}")
+    result["regions"] = [{"sid": j.sid, "resource": regions[j.sid].resource,
+                          "weight": j.weight, "outdir": str(j.outdir)} for j in jobs]
+    result["missing"] = [j.sid for j in jobs if j not in have]
+    result["failed"] = failed
+
+    print_table(result, args.stats)
+    print(f"predicted IPC: {predicted(result)}")
+    if result["missing"]:
+        covered = sum(j.weight for j in have) / sum(j.weight for j in jobs)
+        print(f"  (without regions {result['missing']}, {100 * covered:.1f}% of the weight)")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    sys.exit(1 if failed or result["missing"] else 0)
+
+
+if __name__ == "__main__":
+    main()
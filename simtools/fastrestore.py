@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+fastrestore.py — Checkpoints whose memory images restore without gunzip.
+
+gem5 saves each physical-memory store as a gzip file, and on restore reads
+it whole through gzread() into the simulated memory, skipping zero words.
+For a 3GB X86Board that is a 3GB decompression before the first tick, in
+every process that restores, even if the run then only lasts 1e9 ticks.
+
+gem5 opens the store with gzopen(), which reads a file that is not gzip
+as it is. prepare() rewrites the stores as plain sparse files: pages that
+are all zero become holes. What this saves is the inflate step only:
+unserializeStore still gzread()s the full store size and compares every
+word against zero, holes included, so restore time still grows with the
+memory size. Holes cost no disk I/O or page cache, though, and N runs
+restoring the same checkpoint share one cached copy of the rest.
+
+This is not lazy loading. Mapping the image and filling pages on first
+touch (or skipping holes with SEEK_DATA) would need a change to
+PhysicalMemory::unserializeStore in gem5 itself.
+
+The plain copy is <cpt>.plain/ next to the checkpoint (other files are
+hard links, m5.cpt a copy), made once under a lock and reused while it is
+newer than the checkpoint; in_place=True converts the checkpoint itself. Checkpoints
+unpacked from simtools.ckptstore are already plain.
+
+Usage (config script)
+  from simtools.fastrestore import prepare
+
+  simulator = Simulator(board=board, checkpoint_path=prepare(cpt_dir))
+
+From the shell
+  python3 -m simtools.fastrestore CPT_DIR [--in-place]
+"""
+
+import argparse
+import fcntl
+import gzip
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+PAGE = 4096
+BLOCK = 64 << 20
+
+
+def gzip_stores(cpt: Path) -> List[Path]:
+    """Files of the checkpoint that are gzip (the memory stores)."""
+    out = []
+    for p in sorted(Path(cpt).iterdir()):
+        if p.is_file() and p.name != "m5.cpt":
+            with open(p, "rb") as f:
+                if f.read(2) == b"\x1f\x8b":
+                    out.append(p)
+    return out
+
+
+def _nonzero_runs(block: bytes) -> List[Tuple[int, int]]:
+    """(start, end) byte ranges of the runs of non-zero pages in `block`."""
+    arr = np.frombuffer(block, dtype=np.uint8)
+    full = len(arr) // PAGE * PAGE
+    nz = arr[:full].reshape(-1, PAGE).any(axis=1)
+    if full < len(arr):
+        nz = np.append(nz, arr[full:].any())
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], nz.astype(np.int8), [0]))))
+    return [(int(s) * PAGE, min(int(e) * PAGE, len(arr)))
+            for s, e in zip(edges[::2], edges[1::2])]
+
+
+def gunzip_sparse(src: Path, dst: Path) -> Tuple[int, int]:
+    """Decompress `src` into `dst` with zero pages as holes; (size, non-zero bytes)."""
+    size = data = 0
+    with gzip.open(src, "rb") as f, open(dst, "wb") as out:
+        while True:
+            block = f.read(BLOCK)
+            if not block:
+                break
+            for start, end in _nonzero_runs(block):
+                out.seek(size + start)
+                out.write(block[start:end])
+                data += end - start
+            size += len(block)
+        out.truncate(size)
+    shutil.copymode(src, dst)
+    return size, data
+
+
+def _gunzip_store(src: Path, dst: Path) -> None:
+    size, data = gunzip_sparse(src, dst)
+    print(f"fastrestore: {src.name}: {size / 2**30:.2f} GiB, {data / 2**20:.1f} MiB non-zero")
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    if src.is_dir():
+        shutil.copytree(src, dst)
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def prepare(cpt, in_place: bool = False) -> Path:
+    """A checkpoint directory equivalent to `cpt` with plain memory stores."""
+    cpt = Path(cpt)
+    out = cpt if in_place else cpt.with_name(cpt.name + ".plain")
+    lock = cpt.with_name(f".{cpt.name}.fastrestore.lock")
+    fd = os.open(lock, os.O_RDONLY | os.O_CREAT, 0o664)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        stores = gzip_stores(cpt)
+        if in_place:
+            for src in stores:
+                tmp = src.with_name(f".{src.name}.{os.getpid()}.tmp")
+                _gunzip_store(src, tmp)
+                os.replace(tmp, src)
+            return cpt
+        if not stores:
+            return cpt
+        # The copy of m5.cpt keeps its mtime, so a retaken checkpoint is newer.
+        if (out / "m5.cpt").exists() and \
+                (out / "m5.cpt").stat().st_mtime >= (cpt / "m5.cpt").stat().st_mtime:
+            return out
+        tmp = cpt.with_name(f".{cpt.name}.plain.{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        for p in cpt.iterdir():
+            if p.name == "m5.cpt":
+                shutil.copy2(p, tmp / p.name)
+            elif p not in stores:
+                _link_or_copy(p, tmp / p.name)
+        for src in stores:
+            _gunzip_store(src, tmp / src.name)
+        shutil.rmtree(out, ignore_errors=True)
+        os.rename(tmp, out)
+        return out
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.fastrestore")
+    ap.add_argument("checkpoint", type=Path, help="checkpoint directory (with m5.cpt)")
+    ap.add_argument("--in-place", action="store_true",
+                    help="convert the checkpoint itself instead of making <cpt>.plain")
+    args = ap.parse_args()
+    if not (args.checkpoint / "m5.cpt").exists():
+        sys.exit(f"{args.checkpoint}: not a checkpoint (no m5.cpt)")
+    print(prepare(args.checkpoint, args.in_place))
+
+
+if __name__ == "__main__":
+    main()
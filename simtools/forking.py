@@ -0,0 +1,78 @@
+"""
+forking.py — Bookkeeping for m5.fork() children (pFSA, warmup calibration).
+
+The parent forks a child per sample into the sample's own outdir; the child
+re-points the text stats output there, simulates its sample and exits
+without gem5's teardown. The parent keeps at most `max_children` children
+at a time and collects the exit codes of its own children only (waiting
+for any child would also reap unrelated subprocesses).
+
+Usage (in a sampler's exit-event generator)
+  self.forks = ForkedChildren(max_children)
+  ...
+  if self.forks.fork(sample_dir, job=n):
+      yield from self._child(n)          # in the child
+  ...
+  simulator.run()
+  self.forks.exit_child()                # no-op in the parent
+  self.forks.wait_all()
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+POLL_SECONDS = 0.05
+
+
+class ForkedChildren:
+    def __init__(self, max_children: int):
+        self.max_children = max_children
+        self.children: Dict[int, Any] = {}  # pid -> job
+        self.failed: List[Any] = []
+        self.is_child = False
+
+    def reap(self, block: bool) -> None:
+        """Collect finished children; with `block`, wait for at least one."""
+        while self.children:
+            for pid in list(self.children):
+                done, status = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    job = self.children.pop(pid)
+                    if os.waitstatus_to_exitcode(status) != 0:
+                        self.failed.append(job)
+                    block = False
+            if not block:
+                return
+            time.sleep(POLL_SECONDS)
+
+    def fork(self, outdir: Path, job: Any) -> bool:
+        """Fork into `outdir` once a slot is free; True in the child."""
+        import m5
+
+        self.reap(block=len(self.children) >= self.max_children)
+        outdir.mkdir(parents=True, exist_ok=True)
+        pid = m5.fork(str(outdir))
+        if pid == 0:
+            self.is_child = True
+            self.children = {}
+            # The inherited text output still points at the parent's
+            # stats.txt; dump into the child's outdir instead.
+            m5.stats.outputList[:] = []
+            m5.stats.addStatVisitor("stats.txt")
+            return True
+        self.children[pid] = job
+        return False
+
+    def exit_child(self) -> None:
+        """In a child: exit now, without the atexit stats dump or teardown."""
+        if self.is_child:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(0)
+
+    def wait_all(self) -> None:
+        while self.children:
+            self.reap(block=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+hostperf.py — Host-performance time series, sampled every N simulated ticks.
+
+hostSeconds, hostInstRate and hostMemory are only computed at stats dumps,
+and an SE run like p1.py dumps once, at the end. HostPerfSampler schedules
+a tick exit every `every` ticks and appends one 32-byte record to
+<outdir>/hostperf.bin:
+
+  host_seconds (float64)  wall time since the simulation started
+  tick         (uint64)
+  insts        (uint64)   committed by all cores
+  rss          (uint64)   host resident set, bytes
+
+No stats are touched, so a sample costs one return to Python. The file
+starts with a 16-byte header (magic, version, `every`) and is flushed
+after each record. Per interval, the report gives host seconds per
+simulated millisecond and KIPS. It lists the slowest intervals and, if
+the run also has a phases.json (simtools/phase_profile.py), the phase
+each interval falls in. A Ruby traffic spike shows up as a run of slow
+intervals.
+
+The sampler owns ExitEvent.SCHEDULED_TICK.
+
+Usage (in the config script)
+  sampler = HostPerfSampler(board, every=1_000_000_000)   # 1 ms at 1 THz ticks
+  simulator = Simulator(board=board, on_exit_event=sampler.handlers())
+  sampler.run(simulator)
+
+Reading it
+  python3 -m simtools.hostperf m5out [--top 10] [--csv intervals.csv]
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from simtools.phase_profile import committed_insts, rss_bytes
+
+MAGIC = b"HPRF"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")  # magic, version, every
+RECORD = struct.Struct("<dQQQ")
+DTYPE = np.dtype([("host_seconds", "<f8"), ("tick", "<u8"), ("insts", "<u8"), ("rss", "<u8")])
+FILENAME = "hostperf.bin"
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """{'every': N, 'samples': structured array} from a hostperf.bin."""
+    with open(path, "rb") as f:
+        magic, version, every = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a hostperf v{VERSION} file")
+        data = f.read()
+    n = len(data) // DTYPE.itemsize  # a killed run may leave half a record
+    return {"every": every, "samples": np.frombuffer(data[:n * DTYPE.itemsize], dtype=DTYPE)}
+
+
+def intervals(samples: np.ndarray, every: int,
+              ticks_per_second: float = 1e12) -> List[Dict[str, Any]]:
+    """Per-interval rates; `partial` marks the short last one (the run ended in it)."""
+    out = []
+    for a, b in zip(samples[:-1], samples[1:]):
+        host = float(b["host_seconds"] - a["host_seconds"])
+        sim = int(b["tick"] - a["tick"]) / ticks_per_second
+        insts = int(b["insts"]) - int(a["insts"])
+        out.append({"start_tick": int(a["tick"]), "end_tick": int(b["tick"]),
+                    "host_seconds": host,
+                    "host_s_per_sim_ms": host / (sim * 1e3) if sim > 0 else None,
+                    "kips": insts / host / 1e3 if host > 0 else None,
+                    "insts": insts, "rss": int(b["rss"]),
+                    "partial": int(b["tick"] - a["tick"]) < every})
+    return out
+
+
+def label_phases(rows: List[Dict[str, Any]], phases_json: Path) -> None:
+    """Add the phase (from phase_profile's marks) each interval ends in."""
+    marks = json.loads(phases_json.read_text())["marks"]
+    ticks = [m["tick"] for m in marks]
+    for r in rows:
+        i = bisect.bisect_left(ticks, r["end_tick"])
+        r["phase"] = marks[i]["label"] if i < len(marks) else "(after last mark)"
+
+
+def report(rows: List[Dict[str, Any]], top: int) -> str:
+    rows = [r for r in rows if not r["partial"]] or rows
+    if not rows:
+        return "no intervals\n"
+    rate = np.array([r["host_s_per_sim_ms"] or 0.0 for r in rows])
+    kips = np.array([r["kips"] or 0.0 for r in rows])
+    lines = [f"{len(rows)} intervals, {sum(r['host_seconds'] for r in rows):.1f} host s, "
+             f"peak RSS {max(r['rss'] for r in rows) / 2**20:.0f} MiB",
+             f"host s per sim ms: median {np.median(rate):.3f}, p90 {np.percentile(rate, 90):.3f}, "
+             f"max {rate.max():.3f}",
+             f"KIPS: median {np.median(kips):.1f}, min {kips.min():.1f}",
+             "", f"slowest {min(top, len(rows))} intervals:",
+             f"{'start tick':>16} {'end tick':>16} {'host s':>8} {'s/sim ms':>9} {'KIPS':>9}  phase"]
+    for i in np.argsort(-rate)[:top]:
+        r = rows[i]
+        lines.append(f"{r['start_tick']:>16} {r['end_tick']:>16} {r['host_seconds']:>8.2f} "
+                     f"{rate[i]:>9.3f} {kips[i]:>9.1f}  {r.get('phase', '')}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- gem5 side ----------
+
+class HostPerfSampler:
+    def __init__(self, board, every: int, path: Optional[Path] = None):
+        from m5 import options
+
+        if every <= 0:
+            raise ValueError("every must be a positive number of ticks")
+        self.board = board
+        self.every = every
+        self.path = Path(path or Path(options.outdir) / FILENAME)
+        self.file = None
+        self.t0 = 0.0
+
+    def sample(self) -> None:
+        import m5
+
+        self.file.write(RECORD.pack(time.monotonic() - self.t0, m5.curTick(),
+                                    committed_insts(self.board) or 0, rss_bytes()))
+        self.file.flush()
+
+    def _on_tick(self) -> Iterator[bool]:
+        import m5
+
+        while True:
+            self.sample()
+            m5.scheduleTickExitFromCurrent(self.every)
+            yield False
+
+    def handlers(self, on_exit_event: Optional[Dict] = None) -> Dict:
+        from gem5.simulate.exit_event import ExitEvent
+
+        handlers = dict(on_exit_event or {})
+        handlers[ExitEvent.SCHEDULED_TICK] = self._on_tick()
+        return handlers
+
+    def run(self, simulator, *args, **kwargs) -> None:
+        """simulator.run() with sampling; the last sample is taken at the end."""
+        import m5
+
+        simulator._instantiate()  # the first exit is scheduled from the current tick
+        self.file = open(self.path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.every))
+        self.t0 = time.monotonic()
+        self.sample()
+        m5.scheduleTickExitFromCurrent(self.every)
+        try:
+            simulator.run(*args, **kwargs)
+        finally:
+            self.sample()
+            self.file.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.hostperf")
+    ap.add_argument("outdir", type=Path, help=f"outdir with {FILENAME} (or the file)")
+    ap.add_argument("--top", type=int, default=10, help="slowest intervals to list")
+    ap.add_argument("--csv", type=Path, help="write every interval here")
+    ap.add_argument("--ticks-per-second", type=float, default=1e12)
+    args = ap.parse_args()
+
+    path = args.outdir / FILENAME if args.outdir.is_dir() else args.outdir
+    try:
+        data = load(path)
+    except (OSError, ValueError, struct.error) as e:
+        sys.exit(f"{path}: {e}")
+    rows = intervals(data["samples"], data["every"], args.ticks_per_second)
+    phases_json = path.parent / "phases.json"
+    if phases_json.exists():
+        label_phases(rows, phases_json)
+    sys.stdout.write(report(rows, args.top))
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
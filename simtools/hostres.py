@@ -0,0 +1,67 @@
+"""
+hostres.py — How much of this host a batch of gem5 processes may use.
+
+Pool sizes are derived from what the host actually has free when a job is
+about to start: usable cores minus load from other users, and MemAvailable
+minus what already-running jobs are still expected to grow into.
+"""
+
+import os
+from typing import Optional
+
+from simtools.runtime_model import parse_size
+
+
+def usable_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _meminfo_kib(field: str, path: str = "/proc/meminfo") -> Optional[int]:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def mem_available() -> Optional[int]:
+    """MemAvailable in bytes, or None where /proc/meminfo does not exist."""
+    kib = _meminfo_kib("MemAvailable")
+    return None if kib is None else kib * 1024
+
+
+def rss(pid: int) -> int:
+    """Resident set size of `pid` in bytes (0 if it is gone)."""
+    kib = _meminfo_kib("VmRSS", f"/proc/{pid}/status")
+    return 0 if kib is None else kib * 1024
+
+
+def to_bytes(size) -> int:
+    """Accept 4096, "2GiB", "512MB"."""
+    if isinstance(size, (int, float)):
+        return int(size)
+    v = parse_size(size)
+    if v is None:
+        raise ValueError(f"not a memory size: {size!r}")
+    return int(v)
+
+
+def cpu_slots(running: int, max_jobs: Optional[int] = None) -> int:
+    """Number of additional jobs the cores can take right now."""
+    cpus = usable_cpus()
+    try:
+        load = os.getloadavg()[0]
+    except OSError:
+        load = float(running)
+    # Load not explained by our own jobs belongs to someone else.
+    foreign = max(0.0, load - running)
+    limit = max(1, int(cpus - foreign))
+    if max_jobs:
+        limit = min(limit, max_jobs)
+    return max(0, limit - running)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+looppoint.py — Pick representative regions of a multithreaded run.
+
+LoopPoint-style flow for the 8-64 thread workloads that SimPoint/SMARTS
+cannot handle (both assume one instruction stream). The profiling run
+(03-looppoint/looppoint-profile.py) cuts the parallel region into regions
+of `region_length` instructions summed over all threads, using the
+GlobalInstTracker from 02-global-inst-tracker, and dumps stats once per
+region. This module turns those dumps into a region selection:
+
+  1. signature per region: every thread's instruction count and
+     instruction mix (committed instruction types, loads/stores/branches),
+     normalized to sum 1, so regions cluster by what all threads were
+     doing, and load imbalance between threads shows up as a difference;
+  2. k-means with k chosen by BIC, as in simtools/simpoint.py;
+  3. per cluster the region closest to the centroid, weighted by the
+     cluster's share of all instructions.
+
+Output: <prefix>.simpts / <prefix>.weights (SimPoint format, the "interval"
+is the region number, so simtools.simpoint_runner and
+simtools.simpoint_aggregate work unchanged) and <prefix>.json, the plan
+the checkpoint and run scripts read: per simpoint id its region, the
+region its checkpoint is taken at (one region earlier when
+`warmup_regions` is 1, which is then simulated as warmup), and the
+region length.
+
+Markers: LoopPoint proper marks region boundaries with (loop PC, count)
+pairs, which stay valid when the thread interleaving changes. The
+profile here only has global instruction counts, so a region's end in the
+detailed run is "region_length instructions over all threads after the
+start", not the same loop iteration. Where (PC, count) markers are known
+for a region (e.g. from a LoopPoint/Pin profile), put them into the plan
+as "start"/"end" {"pc": ..., "count": ...} and looppoint-run.py ends the
+region on the PC marker instead.
+
+Usage
+  python3 -m simtools.looppoint looppoint-profile-m5out/stats.txt \
+      [--prefix looppoint] [--k N | --max-k 10] [--warmup-regions 1]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simtools.sample_estimator import INSTS, _columns, load_samples
+from simtools.simpoint import SEED, choose, pick_simpoints, write_results
+
+# per-thread signature stats (any core); the first group that matches wins
+MIX = [
+    [r"\.commitStats0\.committedInstType::(?!total)\w+$"],
+    [r"\.commitStats0\.num(Load|Store|Int|Fp|Vec)Insts$",
+     r"\.num(Load|Store)Insts$", r"\.executeStats0\.numBranches$"],
+]
+
+
+def signatures(names: Sequence[str], data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(regions x features) signatures, each row summing to 1, and insts per region."""
+    insts = _columns(names, INSTS)
+    if not insts:
+        raise ValueError("no per-thread committed-instruction stats in the profile")
+    mix: List[int] = []
+    for group in MIX:
+        mix = sorted({c for pat in group for c in _columns(names, [pat])})
+        if mix:
+            break
+    x = data[:, insts + mix]
+    total = x.sum(axis=1, keepdims=True)
+    x = np.divide(x, total, out=np.zeros_like(x), where=total > 0)
+    return x, data[:, insts].sum(axis=1)
+
+
+def select(x: np.ndarray, insts: np.ndarray, k: Optional[int] = None, max_k: int = 10,
+           restarts: int = 5, seed: int = SEED, threshold: float = 0.9
+           ) -> Tuple[int, List[Tuple[int, int, float]]]:
+    """(k, [(region, cluster, instruction-weighted weight)]) by region."""
+    n = x.shape[0]
+    ks = [min(k, n)] if k else list(range(1, min(max_k, n) + 1))
+    chosen, centers, labels, _ = choose(x, ks, restarts, seed, threshold)
+    # Weights count instructions, not regions: the last region is shorter.
+    share = np.bincount(labels, weights=insts, minlength=centers.shape[0]) / insts.sum()
+    return chosen, [(r, c, float(share[c])) for r, c, _ in pick_simpoints(x, centers, labels)]
+
+
+def plan(picks: List[Tuple[int, int, float]], region_length: int,
+         warmup_regions: int) -> Dict[str, Any]:
+    return {
+        "region_length": region_length,
+        "warmup_regions": warmup_regions,
+        "regions": [{"sid": sid, "region": r, "cluster": c, "weight": w,
+                     "checkpoint_region": max(0, r - warmup_regions),
+                     "warmup": min(r, warmup_regions)}
+                    for sid, (r, c, w) in enumerate(picks)],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("stats", type=Path, help="stats.txt of looppoint-profile.py (one dump per region)")
+    ap.add_argument("--prefix", default="looppoint", help="output file prefix")
+    ap.add_argument("--region-length", type=int,
+                    help="instructions per region (default: from profile.json next to STATS)")
+    ap.add_argument("--k", type=int, help="fixed number of clusters")
+    ap.add_argument("--max-k", type=int, default=10)
+    ap.add_argument("--warmup-regions", type=int, choices=[0, 1], default=1,
+                    help="simulate the region before each pick as warmup")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+
+    if not args.stats.exists():
+        sys.exit(f"{args.stats}: no such stats file")
+    names, data = load_samples(args.stats)
+    if data.shape[0] == 0:
+        sys.exit(f"{args.stats}: no region dumps")
+    x, insts = signatures(names, data)
+    region_length = args.region_length
+    profile = args.stats.parent / "profile.json"
+    if region_length is None and profile.exists():
+        region_length = json.loads(profile.read_text())["region_length"]
+    if region_length is None:
+        region_length = int(np.median(insts))
+    k, picks = select(x, insts, args.k, args.max_k, seed=args.seed)
+
+    prefix = Path(args.prefix)
+    write_results(picks, prefix.with_suffix(".simpts"), prefix.with_suffix(".weights"))
+    prefix.with_suffix(".json").write_text(
+        json.dumps(plan(picks, region_length, args.warmup_regions), indent=2) + "\n")
+    print(f"{data.shape[0]} regions of {region_length} instructions, k={k}: "
+          f"regions {[r for r, _, _ in picks]} -> {prefix}.simpts/.weights/.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+multisim_pool.py — A MultiSim front-end with a host-sized, dynamic pool.
+
+gem5.utils.multisim runs the registered simulators on a fixed-size pool in
+registration order. This front-end:
+
+  - sizes the pool from free cores and MemAvailable when it starts, and
+    re-evaluates it every time a simulation finishes;
+  - starts simulators by priority, then by estimated cost (longest first),
+    back-filling smaller jobs when a big one does not fit in memory yet;
+  - reports each finished simulator id to a callback in the parent process,
+    so aggregation can start while the rest of the batch is still running.
+
+Usage (in the config script)
+  from simtools import multisim_pool
+
+  multisim_pool.add_simulator(Simulator(board=board, id="..."),
+                              priority=1, cost=4.0, mem="3GiB")
+  multisim_pool.set_on_complete(lambda sim_id, code: print(sim_id, code))
+
+and run it with
+  PYTHONPATH=<repo root> gem5 -re -m simtools.multisim_pool \
+      [--max-processes N] [--mem-per-sim 2GiB] config.py [config args...]
+
+Each simulator writes into <outdir>/<id>, like gem5.utils.multisim.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from simtools import hostres
+from simtools.forking import POLL_SECONDS
+
+
+@dataclass
+class _Entry:
+    simulator: object
+    id: str
+    priority: int
+    cost: float
+    mem: Optional[int]
+    order: int
+
+
+_entries: Dict[str, _Entry] = {}
+_on_complete: Optional[Callable[[str, int], None]] = None
+
+
+def add_simulator(simulator, priority: int = 0, cost: float = 1.0, mem=None) -> None:
+    """
+    Register a simulator. Higher `priority` starts first; within a priority
+    the larger estimated `cost` (any consistent unit, e.g. expected seconds)
+    starts first. `mem` is the expected host memory ("3GiB"); it defaults
+    to --mem-per-sim.
+    """
+    sim_id = simulator.get_id()
+    if sim_id is None:
+        raise ValueError("simulators run by multisim_pool need an `id`")
+    if sim_id in _entries:
+        raise ValueError(f"duplicate simulator id '{sim_id}'")
+    _entries[sim_id] = _Entry(
+        simulator=simulator, id=sim_id, priority=priority, cost=cost,
+        mem=None if mem is None else hostres.to_bytes(mem), order=len(_entries),
+    )
+
+
+def set_on_complete(callback: Callable[[str, int], None]) -> None:
+    """`callback(sim_id, exit_code)` runs in the parent as each simulator finishes."""
+    global _on_complete
+    _on_complete = callback
+
+
+def _run_child(entry: _Entry, outroot: Path) -> None:
+    from m5 import options
+    from m5.core import setOutputDir
+
+    outdir = outroot / entry.id
+    outdir.mkdir(parents=True, exist_ok=True)
+    options.outdir = str(outdir)
+    setOutputDir(options.outdir)
+    # -r/-e redirected the parent's output once at startup; give each child its own.
+    if options.redirect_stdout:
+        fd = os.open(outdir / options.stdout_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, sys.stdout.fileno())
+        os.close(fd)
+    if options.redirect_stderr:
+        fd = os.open(outdir / options.stderr_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, sys.stderr.fileno())
+        os.close(fd)
+    entry.simulator.run()
+
+
+def _fork(entry: _Entry, outroot: Path) -> int:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_child(entry, outroot)
+        except BaseException as e:  # never return into the parent's loop
+            print(f"multisim_pool: {entry.id} failed: {e!r}", file=sys.stderr)
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+def _reap(running: Dict[int, _Entry]) -> List[Tuple[_Entry, int]]:
+    """
+    Wait for at least one of our simulators; (entry, exit code) of each
+    that finished. Only the pids in `running` are waited on: the config
+    script or gem5 may have children of their own.
+    """
+    while True:
+        done = []
+        for pid in list(running):
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                done.append((running.pop(pid), os.waitstatus_to_exitcode(status)))
+        if done:
+            return done
+        time.sleep(POLL_SECONDS)
+
+
+def run(outroot: Path, max_processes: Optional[int], mem_per_sim: int) -> int:
+    pending: List[_Entry] = sorted(
+        _entries.values(), key=lambda e: (-e.priority, -e.cost, e.order))
+    running: Dict[int, _Entry] = {}
+    failed = 0
+    t0 = time.monotonic()
+
+    def mem_of(e: _Entry) -> int:
+        return e.mem if e.mem is not None else mem_per_sim
+
+    while pending or running:
+        free_cpu = hostres.cpu_slots(len(running), max_processes)
+        avail = hostres.mem_available()
+        if avail is not None:
+            # Running jobs may still grow up to their estimate.
+            avail -= sum(max(0, mem_of(e) - hostres.rss(pid)) for pid, e in running.items())
+
+        for e in list(pending):
+            if free_cpu <= 0:
+                break
+            if avail is not None and mem_of(e) > avail and running:
+                continue  # back-fill a smaller job; retry this one later
+            pending.remove(e)
+            running[_fork(e, outroot)] = e
+            free_cpu -= 1
+            if avail is not None:
+                avail -= mem_of(e)
+            print(f"multisim_pool: started {e.id} "
+                  f"(priority {e.priority}, cost {e.cost}, {len(running)} running)")
+
+        for e, code in _reap(running):
+            failed += code != 0
+            print(f"multisim_pool: finished {e.id} exit {code} "
+                  f"after {time.monotonic() - t0:.1f}s, {len(pending)} pending")
+            if _on_complete is not None:
+                try:
+                    _on_complete(e.id, code)
+                except Exception as ex:  # keep collecting the other simulators
+                    print(f"multisim_pool: on_complete({e.id}) failed: {ex!r}",
+                          file=sys.stderr)
+    return failed
+
+
+def main():
+    try:
+        from m5 import options
+    except ImportError:
+        sys.exit("Error: multisim_pool is meant to be run with the gem5 binary (gem5 -m)")
+
+    ap = argparse.ArgumentParser(prog="gem5 -m simtools.multisim_pool")
+    ap.add_argument("config", type=Path, help="config script that calls add_simulator()")
+    ap.add_argument("--max-processes", type=int, default=None,
+                    help="upper bound on concurrent simulators (default: host-sized)")
+    ap.add_argument("--mem-per-sim", default="2GiB",
+                    help="host memory expected per simulator without an explicit `mem`")
+    ap.add_argument("--list", action="store_true", help="print the simulator ids and exit")
+    ap.add_argument("config_args", nargs=argparse.REMAINDER)
+    args = ap.parse_args()
+
+    # The config registers into *this* module even though we run as __main__.
+    import runpy
+    import simtools.multisim_pool as registry
+
+    sys.argv = [str(args.config)] + args.config_args
+    runpy.run_path(str(args.config), run_name="__multisim_pool__")
+
+    if args.list:
+        for e in registry._entries.values():
+            print(e.id)
+        return
+    failed = registry.run(Path(options.outdir), args.max_processes,
+                          hostres.to_bytes(args.mem_per_sim))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ in ("__main__", "__m5_main__"):
+    main()
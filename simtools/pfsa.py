@@ -0,0 +1,183 @@
+"""
+pfsa.py — Parallel sampled simulation with m5.fork() (pFSA).
+
+SMARTS.py alternates fast-forwarding and detailed samples in one process,
+so no two detailed samples ever overlap. Here the fast-forward core in the
+parent never switches:
+
+  - at every sample point the parent forks; the child switches to the
+    detailed core, runs W instructions of warmup and U measured
+    instructions, dumps its stats into its own outdir
+    (<outdir>/samples/<n>/stats.txt plus sample.json) and exits;
+  - the parent schedules the next sample k*U instructions later and keeps
+    fast-forwarding right away;
+  - at most `max_children` children run at once; when all slots are busy
+    the parent waits for one to finish before forking again.
+
+The child gets a copy-on-write snapshot of the whole simulated system
+(memory and caches), so the samples are the same as the serial scheme's,
+only overlapped. For FS boards the starting core can be KVM; gem5 re-creates the VM in the child.
+
+When the program ends the parent waits for the remaining children and
+writes
+
+  - <outdir>/samples.txt: the children's dumps concatenated in sample
+    order, for `python3 -m simtools.sample_estimator`;
+  - <outdir>/smarts.json: a simtools.smarts-style summary (mode "pfsa").
+
+Usage (in the config script)
+  from simtools.pfsa import ParallelSMARTS
+
+  pfsa = ParallelSMARTS(processor, clock="3GHz", workload=binary_path, max_children=31)
+  simulator = Simulator(board=board,
+                        on_exit_event={ExitEvent.SIMPOINT_BEGIN: pfsa.generator()})
+  pfsa.start()
+  pfsa.run(simulator)   # returns in the parent only, after all samples are in
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from simtools import hostres
+from simtools.forking import ForkedChildren
+from simtools.statdump import dumper
+from simtools.smarts import RunningStats
+from simtools.workload import cache_length, cached_length, workload_key
+
+
+class ParallelSMARTS:
+    def __init__(self, processor, clock: str, workload=None, U: int = 1000,
+                 W: Optional[int] = None, k: Optional[int] = None,
+                 planned_samples: int = 50, default_k: int = 200,
+                 max_children: Optional[int] = None, z: float = 3.0,
+                 dump_stats: Optional[Sequence[str]] = None):
+        """
+        :param k: sampling period in units of U; by default sized from the
+            cached program length (simtools.workload) for `planned_samples`.
+        :param max_children: detailed samples in flight; default: one per
+            usable core, minus the one the parent runs on.
+        :param dump_stats: glob patterns of the stats the children dump
+            (simtools.statdump); default: all.
+        """
+        from m5 import options
+        from m5.util.convert import toFrequency
+
+        self.processor = processor
+        self.U = U
+        self.W = 2 * U if W is None else W
+        self.key = workload_key(workload) if workload else None
+        self.length = cached_length(self.key) if self.key else None
+        if k is None:
+            k = (math.ceil(self.length / (planned_samples * U))
+                 if self.length else default_k)
+        if k * U <= self.W + U:
+            raise ValueError(f"k={k} is shorter than one {self.W}+{U}-inst sample")
+        self.k = k
+        self.max_children = max_children or max(1, hostres.usable_cpus() - 1)
+        self.forks = ForkedChildren(self.max_children)
+        self.z = z
+        self.dump = dumper(dump_stats)
+        self.freq = toFrequency(clock)
+        self.t0 = time.monotonic()
+        self.root = Path(options.outdir)
+        self.forked = 0
+        self.position = 0
+
+    def _sample_dir(self, n: int) -> Path:
+        return self.root / "samples" / f"{n:05d}"
+
+    def start(self) -> None:
+        """Schedule the first sample at the first instruction."""
+        self.processor.get_cores()[0]._set_simpoint([1], False)
+        self.position = 1
+
+    def generator(self) -> Iterator[bool]:
+        while True:
+            # Sample point, in the parent: fork once a slot is free.
+            n = self.forked
+            if self.forks.fork(self._sample_dir(n), job=n):
+                yield from self._child(n)
+            self.forked += 1
+            self.position += self.k * self.U
+            self.processor.get_cores()[0]._set_simpoint([self.k * self.U], True)
+            yield False
+
+    def _child(self, n: int) -> Iterator[bool]:
+        import m5
+
+        self.processor.switch()
+        self.processor.get_cores()[0]._set_simpoint([self.W, self.W + self.U], True)
+        yield False
+
+        # End of warmup: measure the next U instructions.
+        m5.stats.reset()
+        t0 = m5.curTick()
+        yield False
+
+        cpi = (m5.curTick() - t0) / self._ticks_per_cycle() / self.U
+        self.dump()
+        (self._sample_dir(n) / "sample.json").write_text(json.dumps(
+            {"sample": n, "inst": self.position + self.W, "period": self.k, "cpi": cpi}))
+        print(f"pFSA sample {n}: CPI={cpi:.4f}")
+        while True:
+            yield True  # end the child's simulation loop; run() exits
+
+    def _ticks_per_cycle(self) -> float:
+        from m5.ticks import fromSeconds
+
+        return float(fromSeconds(1.0 / self.freq))
+
+    def run(self, simulator, *args, **kwargs) -> None:
+        """simulator.run(); in a child, exit once the sample is dumped."""
+        simulator.run(*args, **kwargs)
+        self.forks.exit_child()
+        self.forks.wait_all()
+        self.finish()
+
+    def samples(self) -> List[Dict[str, Any]]:
+        out = []
+        for n in range(self.forked):
+            f = self._sample_dir(n) / "sample.json"
+            if f.exists():
+                out.append(json.loads(f.read_text()))
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        per = self.samples()
+        stats = RunningStats()
+        for s in per:
+            stats.add(s["cpi"])
+        return {
+            "U": self.U, "W": self.W, "k": self.k, "mode": "pfsa",
+            "z": self.z,
+            "max_children": self.max_children,
+            "samples": len(per),
+            "failed_samples": sorted(self.forks.failed),
+            "cpi_mean": stats.mean if stats.n else None,
+            "cpi_rel_error": stats.rel_error(self.z) if stats.n > 1 else None,
+            "program_length": self.length,
+            "host_seconds": time.monotonic() - self.t0,
+            "per_sample": per,
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Merge the per-sample dumps and write the summary (parent only)."""
+        # The parent never switched, so its start cores ran the whole program.
+        length = sum(int(c.core.totalInsts()) for c in self.processor.get_cores())
+        if length:
+            self.length = length
+            if self.key:
+                cache_length(self.key, length)
+        with open(self.root / "samples.txt", "w") as merged:
+            for n in range(self.forked):
+                f = self._sample_dir(n) / "stats.txt"
+                if f.exists():
+                    merged.write(f.read_text())
+        out = self.summary()
+        (self.root / "smarts.json").write_text(json.dumps(out, indent=2))
+        print(f"pFSA: {out['samples']}/{self.forked} samples, CPI={out['cpi_mean']}, "
+              f"{self.max_children} in parallel -> {self.root / 'smarts.json'}")
+        return out
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+phase_profile.py — Where an FS run's host time goes, phase by phase.
+
+The p4 exit handlers print "1st exit event: Kernel booted" and so on, but
+not how long the host took to get there. PhaseProfiler records a mark at
+every exit event the Simulator handles and at every m5.stats.dump():
+
+  - host wall time since the profiler was attached,
+  - simulated ticks (and seconds),
+  - instructions committed by all cores, switched-out ones included
+    (KVM cores only count with usePerf),
+  - host RSS (current and peak).
+
+A phase is the stretch between two marks and is named after the mark that
+ends it ("EXIT:1" = up to the 1st m5 exit), or by `labels`
+({"EXIT:1": "kernel boot", ...}). After every mark the timeline is written
+to <outdir>/phases.json and <outdir>/phases.txt, so a run that is killed
+still leaves the phases it got through.
+
+Usage (in the config script)
+  from simtools.phase_profile import PhaseProfiler
+
+  simulator = Simulator(board=board, on_exit_event=...)
+  PhaseProfiler(board, labels={"EXIT:1": "kernel boot"}).attach(simulator)
+  simulator.run()
+
+Re-printing a run's summary
+  python3 -m simtools.phase_profile m5out
+"""
+
+import argparse
+import inspect
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def committed_insts(board) -> Optional[int]:
+    """Instructions committed by all of the board's cores, switched-out ones included."""
+    proc = board.get_processor()
+    cores = proc._all_cores() if hasattr(proc, "_all_cores") else proc.get_cores()
+    try:
+        return sum(int(c.core.totalInsts()) for c in cores)
+    except Exception:  # not instantiated yet
+        return None
+
+
+def phases(marks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Differences between consecutive marks."""
+    out = []
+    for prev, cur in zip(marks, marks[1:]):
+        host = cur["host_seconds"] - prev["host_seconds"]
+        insts = (cur["insts"] - prev["insts"]
+                 if cur["insts"] is not None and prev["insts"] is not None else None)
+        out.append({"phase": cur["label"], "host_seconds": host,
+                    "ticks": cur["tick"] - prev["tick"], "insts": insts,
+                    "mips": insts / host / 1e6 if insts and host > 0 else None,
+                    "rss": cur["rss"], "peak_rss": cur["peak_rss"]})
+    return out
+
+
+def summary(marks: List[Dict[str, Any]], ticks_per_second: float) -> str:
+    rows = phases(marks)
+    total = sum(r["host_seconds"] for r in rows) or 1.0
+    width = max([len(r["phase"]) for r in rows] + [5])
+    lines = [f"{'phase':<{width}} {'host s':>9} {'host%':>6} {'sim s':>10} "
+             f"{'insts':>14} {'MIPS':>8} {'RSS MiB':>8}"]
+    for r in rows:
+        insts = "-" if r["insts"] is None else str(r["insts"])
+        mips = "-" if r["mips"] is None else f"{r['mips']:.2f}"
+        lines.append(f"{r['phase']:<{width}} {r['host_seconds']:>9.1f} "
+                     f"{100 * r['host_seconds'] / total:>6.1f} "
+                     f"{r['ticks'] / ticks_per_second:>10.4f} {insts:>14} {mips:>8} "
+                     f"{r['rss'] / 2**20:>8.0f}")
+    if rows:
+        peak = max(r["peak_rss"] for r in rows)
+        lines.append(f"{'total':<{width}} {total:>9.1f}  (peak RSS {peak / 2**20:.0f} MiB)")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- gem5 side ----------
+
+class PhaseProfiler:
+    def __init__(self, board=None, labels: Optional[Dict[str, str]] = None,
+                 outdir: Optional[Path] = None):
+        from m5 import options
+
+        self.board = board
+        self.labels = labels or {}
+        self.outdir = Path(outdir or options.outdir)
+        self.marks: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {}
+        self.t0 = time.monotonic()  # reset by attach()
+
+    def mark(self, name: str) -> None:
+        import m5
+
+        self.counts[name] = self.counts.get(name, 0) + 1
+        key = f"{name}:{self.counts[name]}"
+        self.marks.append({
+            "mark": key, "label": self.labels.get(key, key),
+            "host_seconds": time.monotonic() - self.t0, "wall_clock": time.time(),
+            "tick": m5.curTick(),
+            "insts": committed_insts(self.board) if self.board is not None else None,
+            "rss": rss_bytes(),
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        })
+        self.write()
+
+    def write(self) -> None:
+        from m5.ticks import fromSeconds
+
+        tps = float(fromSeconds(1.0))
+        (self.outdir / "phases.json").write_text(json.dumps(
+            {"ticks_per_second": tps, "marks": self.marks,
+             "phases": phases(self.marks)}, indent=2))
+        (self.outdir / "phases.txt").write_text(summary(self.marks, tps))
+
+    def _wrap(self, name: str, handler):
+        if inspect.isgenerator(handler):
+            def steps():
+                while True:
+                    self.mark(name)
+                    try:
+                        step = next(handler)
+                    except StopIteration:
+                        return
+                    yield step
+            return steps()
+        if isinstance(handler, list):
+            return self._wrap(name, (f() for f in handler))
+
+        def call():
+            self.mark(name)
+            return handler()
+        return call
+
+    def attach(self, simulator) -> "PhaseProfiler":
+        """Record a mark at each exit event the simulator handles, and at each dump."""
+        import atexit
+
+        import m5
+        import m5.stats
+
+        for event, handler in list(simulator._on_exit_event.items()):
+            simulator._on_exit_event[event] = self._wrap(event.name, handler)
+        dump = m5.stats.dump
+
+        def dump_and_mark(*args, **kwargs):
+            dump(*args, **kwargs)
+            self.mark("stats dump")
+        m5.stats.dump = dump_and_mark
+        self.t0 = time.monotonic()
+        self.marks.append({"mark": "start", "label": "start", "host_seconds": 0.0,
+                           "wall_clock": time.time(), "tick": m5.curTick(), "insts": 0,
+                           "rss": rss_bytes(), "peak_rss": rss_bytes()})
+        atexit.register(self.mark, "end")
+        return self
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.phase_profile")
+    ap.add_argument("outdir", type=Path, help="outdir with phases.json")
+    args = ap.parse_args()
+    try:
+        data = json.loads((args.outdir / "phases.json").read_text())
+    except (OSError, ValueError) as e:
+        sys.exit(f"{args.outdir}: {e}")
+    sys.stdout.write(summary(data["marks"], data["ticks_per_second"]))
+
+
+if __name__ == "__main__":
+    main()
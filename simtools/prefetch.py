@@ -0,0 +1,214 @@
+"""
+prefetch.py — Fetch (or verify) every gem5 resource a set of configs uses.
+
+Resource ids are collected statically: config scripts are parsed with `ast`
+for `obtain_resource("<id>", resource_version="<v>")` calls with literal
+arguments, and sweep specs contribute the scripts of their points plus an
+optional "resources" list. Workloads (and suites) are then expanded into the
+kernels, disk images, bootloaders, ... they reference, and everything is
+fetched concurrently. Each resource is fetched under an exclusive file lock,
+so parallel gem5 jobs that start at the same time wait for one download
+instead of racing to write the same multi-GB disk image.
+
+Usage
+  python3 -m simtools.prefetch --list exercise1 materials   # ids only
+  gem5 -m simtools.prefetch [--jobs 8] exercise1/p4/sweep.json p1.py ...
+"""
+
+import argparse
+import ast
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+ResourceKey = Tuple[str, Optional[str]]  # (id, resource_version)
+
+
+# ---------- static collection ----------
+
+def _literal(node: ast.AST) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def ids_in_script(path: Path) -> Set[ResourceKey]:
+    """All obtain_resource() calls with a literal id in one Python file."""
+    try:
+        tree = ast.parse(Path(path).read_text(errors="ignore"), filename=str(path))
+    except (SyntaxError, ValueError):
+        return set()
+    found: Set[ResourceKey] = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        fn = node.func
+        name = fn.id if isinstance(fn, ast.Name) else fn.attr if isinstance(fn, ast.Attribute) else None
+        if name != "obtain_resource":
+            continue
+        kw = {k.arg: k.value for k in node.keywords}
+        rid = _literal(node.args[0]) if node.args else _literal(kw.get("resource_id"))
+        if rid is None:
+            continue
+        ver = kw.get("resource_version")
+        found.add((rid, _literal(ver) if ver is not None else None))
+    return found
+
+
+def ids_in_spec(path: Path) -> Set[ResourceKey]:
+    """A sweep spec: its explicit "resources" plus whatever its scripts use."""
+    spec = json.loads(Path(path).read_text())
+    found: Set[ResourceKey] = set()
+    for r in spec.get("resources", []):
+        if isinstance(r, str):
+            found.add((r, None))
+        else:
+            found.add((r["id"], r.get("resource_version")))
+    scripts = {spec.get("script")} | {p.get("script") for p in spec.get("points", [])}
+    for s in filter(None, scripts):
+        found |= ids_in_script(Path(path).parent / s)
+    return found
+
+
+def collect(paths: Iterable[Path]) -> Set[ResourceKey]:
+    found: Set[ResourceKey] = set()
+    for p in map(Path, paths):
+        if p.is_dir():
+            for f in sorted(p.rglob("*.py")):
+                found |= ids_in_script(f)
+            for f in sorted(p.rglob("sweep*.json")):
+                found |= ids_in_spec(f)
+        elif p.suffix == ".json":
+            found |= ids_in_spec(p)
+        elif p.exists():
+            found |= ids_in_script(p)
+    # An unversioned request is covered by a versioned one only if gem5 would
+    # pick the same version; keep both rather than guess.
+    return found
+
+
+# ---------- fetching (gem5 side) ----------
+
+def lock_dir() -> Path:
+    base = os.environ.get("GEM5_RESOURCE_DIR") or Path.home() / ".cache" / "gem5"
+    d = Path(base) / ".prefetch-locks"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+@contextmanager
+def resource_lock(key: ResourceKey) -> Iterator[None]:
+    rid, ver = key
+    with open(lock_dir() / f"{rid}@{ver or 'latest'}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Prefetcher:
+    def __init__(self, jobs: int):
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self.seen: Set[ResourceKey] = set()
+        self.mutex = threading.Lock()
+        self.pending = 0
+        self.done = threading.Condition(self.mutex)
+        self.failed: List[Tuple[ResourceKey, str]] = []
+
+    def submit(self, key: ResourceKey) -> None:
+        with self.mutex:
+            if key in self.seen:
+                return
+            self.seen.add(key)
+            self.pending += 1
+        self.pool.submit(self._fetch, key)
+
+    def _fetch(self, key: ResourceKey) -> None:
+        from gem5.resources.resource import obtain_resource
+
+        try:
+            t0 = time.monotonic()
+            with resource_lock(key):
+                res = obtain_resource(key[0], resource_version=key[1], quiet=True)
+                for dep in self._dependencies(res):
+                    self.submit(dep)
+                path = self._local_path(res)
+            print(f"[ok] {key[0]}@{key[1] or 'latest'} "
+                  f"({time.monotonic() - t0:.1f}s){' -> ' + str(path) if path else ''}")
+        except Exception as e:
+            with self.mutex:
+                self.failed.append((key, repr(e)))
+            print(f"[FAIL] {key[0]}@{key[1] or 'latest'}: {e}", file=sys.stderr)
+        finally:
+            with self.mutex:
+                self.pending -= 1
+                self.done.notify_all()
+
+    @staticmethod
+    def _dependencies(res) -> List[ResourceKey]:
+        from gem5.resources.resource import AbstractResource, WorkloadResource
+
+        children = []
+        if isinstance(res, WorkloadResource):
+            children = [v for v in res.get_parameters().values()
+                        if isinstance(v, AbstractResource)]
+        elif hasattr(res, "__iter__"):  # SuiteResource: iterable of workloads
+            children = list(res)
+        return [(c.get_id(), c.get_resource_version()) for c in children]
+
+    @staticmethod
+    def _local_path(res) -> Optional[str]:
+        from gem5.resources.resource import WorkloadResource
+
+        if isinstance(res, WorkloadResource) or hasattr(res, "__iter__"):
+            return None  # nothing on disk itself; its dependencies are fetched
+        return res.get_local_path()
+
+    def wait(self) -> None:
+        with self.mutex:
+            while self.pending:
+                self.done.wait()
+        self.pool.shutdown()
+
+
+def prefetch(keys: Iterable[ResourceKey], jobs: int = 8) -> List[Tuple[ResourceKey, str]]:
+    """Fetch all `keys` and their dependencies; returns the failures."""
+    p = Prefetcher(jobs)
+    for k in sorted(keys, key=lambda k: (k[0], k[1] or "")):
+        p.submit(k)
+    p.wait()
+    return p.failed
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="gem5 -m simtools.prefetch")
+    ap.add_argument("paths", nargs="+", type=Path,
+                    help="config scripts, sweep specs, or directories to scan")
+    ap.add_argument("--jobs", type=int, default=8, help="concurrent fetches")
+    ap.add_argument("--list", action="store_true",
+                    help="print the collected ids and exit (works without gem5)")
+    args = ap.parse_args()
+
+    keys = collect(args.paths)
+    if args.list:
+        for rid, ver in sorted(keys, key=lambda k: (k[0], k[1] or "")):
+            print(f"{rid}\t{ver or ''}")
+        return
+    try:
+        import gem5.resources.resource  # noqa: F401
+    except ImportError:
+        sys.exit("Error: fetching needs the gem5 binary (gem5 -m simtools.prefetch); "
+                 "use --list with python3")
+    failed = prefetch(keys, args.jobs)
+    print(f"Prefetched {len(keys)} requested resources, {len(failed)} failed.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ in ("__main__", "__m5_main__"):
+    main()
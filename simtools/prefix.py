@@ -0,0 +1,205 @@
+"""
+prefix.py — gem5-side half of shared sweep prefixes.
+
+Sweep points that only differ after a switch point (the N-th occurrence of
+an exit event, e.g. the 2nd m5 exit once Linux has booted under KVM) can
+declare it in the sweep spec:
+
+    "prefix": {"at": "EXIT:2"}
+
+simtools.sweep then runs the prefix once with `--take-checkpoint DIR` and
+every point with `--restore-checkpoint DIR`. The config script only has to
+route its exit handlers and its `run()` through this module:
+
+    from simtools.prefix import SharedPrefix, add_arguments
+
+    add_arguments(ap, at="EXIT:2")
+    args = ap.parse_args()
+    shared = SharedPrefix.from_args(args)
+
+    simulator = Simulator(
+        board=board,
+        on_exit_event=shared.handlers({ExitEvent.EXIT: exit_handler()}),
+        checkpoint_path=shared.checkpoint_path,
+    )
+    shared.run(simulator)
+
+Without either option the script runs exactly as before. With
+--take-checkpoint, the handler steps before the switch point run as usual
+and the simulation is checkpointed and stopped when the switch point is
+reached. With --restore-checkpoint, the steps before the switch point are
+replayed without simulating (so they must not change the board, only
+print or bookkeep), and the switch-point step runs right after restore.
+
+With --checkpoint-store, the checkpoint at the switch point comes from the
+shared store (simtools/ckptstore.py) instead: once the board and workload
+are set up, `shared.use_store(board, workload)` restores from the stored
+checkpoint, and if there is none yet it first re-runs the script with
+--take-checkpoint to produce it.
+
+The prefix run only gets the sweep's prefix args, so a point whose own
+args change the board or processor would restore a checkpoint of a
+different system. Scripts name those options in
+`SharedPrefix.from_args(args, fixed=("cores", ...))`: their values are
+saved next to the checkpoint, and restoring with other values is an error.
+
+With --plain-memory, a checkpoint is restored from a copy whose memory
+stores are plain sparse files instead of gzip (simtools/fastrestore.py),
+made once next to it.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+def add_arguments(ap, at: str = "EXIT:1") -> None:
+    g = ap.add_argument_group("shared prefix (set by simtools.sweep)")
+    g.add_argument("--prefix-at", default=at,
+                   help="switch point, EVENT[:N] = N-th ExitEvent.EVENT (default: %(default)s)")
+    g.add_argument("--take-checkpoint", type=Path, default=None,
+                   help="run up to the switch point, checkpoint into this directory, stop")
+    g.add_argument("--restore-checkpoint", type=Path, default=None,
+                   help="start from a checkpoint taken at the switch point")
+    g.add_argument("--checkpoint-store", type=Path, nargs="?", const="", default=None,
+                   help="restore from (or produce into) the shared checkpoint store, "
+                        "optionally at this root")
+    g.add_argument("--plain-memory", action="store_true",
+                   help="restore from a copy of the checkpoint with uncompressed, sparse "
+                        "memory images (made once, next to it)")
+
+
+def parse_at(at: str) -> Tuple[Any, int]:
+    """'EXIT:2' -> (ExitEvent.EXIT, 2); 'WORKBEGIN' -> (ExitEvent.WORKBEGIN, 1)."""
+    from gem5.simulate.exit_event import ExitEvent
+
+    name, _, count = at.partition(":")
+    try:
+        event = ExitEvent[name.strip().upper()]
+    except KeyError:
+        raise ValueError(f"unknown exit event in prefix point '{at}'") from None
+    n = int(count) if count else 1
+    if n < 1:
+        raise ValueError(f"prefix point '{at}': count must be >= 1")
+    return event, n
+
+
+FIXED = "simtools-prefix.json"  # the `fixed` options, in the checkpoint directory
+
+
+def _steps(handler, event) -> Iterator[bool]:
+    """Uniform view of a generator, a callable, or no handler at all."""
+    from gem5.simulate.exit_event import ExitEvent
+
+    if handler is None:
+        # Like the stdlib defaults: m5 exit and tick exits stop, the rest continue.
+        while True:
+            yield event in (ExitEvent.EXIT, ExitEvent.SCHEDULED_TICK)
+    elif callable(handler):
+        while True:
+            yield bool(handler())
+    else:
+        yield from handler
+
+
+class SharedPrefix:
+    def __init__(self, at: str = "EXIT:1", take: Optional[Path] = None,
+                 restore: Optional[Path] = None, store: Optional[Path] = None,
+                 plain_memory: bool = False, fixed: Optional[Dict[str, Any]] = None):
+        if take is not None and restore is not None:
+            raise ValueError("--take-checkpoint and --restore-checkpoint are exclusive")
+        self.at = at
+        self.event, self.count = parse_at(at)
+        self.take = take
+        self.restore = restore
+        self.store = store
+        self.plain_memory = plain_memory
+        self.fixed = fixed or {}
+        self.simulator = None
+
+    @classmethod
+    def from_args(cls, args, fixed: Tuple[str, ...] = ()) -> "SharedPrefix":
+        """`fixed`: options that must be the same for the prefix and the points."""
+        return cls(args.prefix_at, args.take_checkpoint, args.restore_checkpoint,
+                   getattr(args, "checkpoint_store", None),
+                   getattr(args, "plain_memory", False),
+                   {name: getattr(args, name) for name in fixed})
+
+    def _check_fixed(self) -> None:
+        try:
+            taken = json.loads((Path(self.restore) / FIXED).read_text())
+        except (OSError, ValueError):
+            return  # taken without any (or by an older version)
+        differ = {k: (taken[k], v) for k, v in self.fixed.items() if k in taken and taken[k] != v}
+        if differ:
+            what = ", ".join(f"--{k.replace('_', '-')}={a!r} there, {b!r} here"
+                             for k, (a, b) in differ.items())
+            raise ValueError(f"{self.restore} was taken with other options ({what}); "
+                             f"put them in the sweep's prefix args too")
+
+    @property
+    def checkpoint_path(self) -> Optional[Path]:
+        if self.restore is not None:
+            self._check_fixed()
+        if self.restore is not None and self.plain_memory:
+            from simtools.fastrestore import prepare
+
+            self.restore = prepare(self.restore)
+        return self.restore
+
+    def use_store(self, board, workload) -> None:
+        """With --checkpoint-store: restore from the store, producing the entry first."""
+        if self.store is None or self.take is not None or self.restore is not None:
+            return
+        from simtools.ckptstore import CheckpointStore, key_for, rerun_command
+
+        store = CheckpointStore(self.store or None)
+        key = key_for(board, workload, self.at)
+        self.restore = store.ensure(key, rerun_command(self.at))
+        print(f"simtools.prefix: restoring {key.describe()} from {self.restore}")
+
+    def handlers(self, on_exit_event: Dict) -> Dict:
+        """The script's on_exit_event, rewired for the prefix/suffix mode."""
+        from gem5.simulate.exit_event import ExitEvent
+
+        handlers = dict(on_exit_event)
+        steps = _steps(on_exit_event.get(self.event), self.event)
+        if self.take is not None:
+            handlers[self.event] = self._take(steps)
+        elif self.restore is not None:
+            handlers[ExitEvent.SCHEDULED_TICK] = self._resume(
+                steps, on_exit_event.get(ExitEvent.SCHEDULED_TICK))
+            handlers[self.event] = steps
+        return handlers
+
+    def _take(self, steps: Iterator[bool]) -> Iterator[bool]:
+        for _ in range(self.count - 1):
+            yield next(steps)
+        print(f"simtools.prefix: reached {self.at}, checkpointing to {self.take}")
+        self.simulator.save_checkpoint(self.take)
+        (Path(self.take) / FIXED).write_text(json.dumps(self.fixed))
+        yield True
+
+    def _resume(self, steps: Iterator[bool], tick_handler) -> Iterator[bool]:
+        from gem5.simulate.exit_event import ExitEvent
+
+        # First scheduled-tick exit is ours (see run()); the script's own
+        # SCHEDULED_TICK handler, if any, takes over afterwards.
+        for _ in range(self.count - 1):
+            next(steps)
+        print(f"simtools.prefix: restored at {self.at}")
+        yield next(steps)
+        yield from _steps(tick_handler, ExitEvent.SCHEDULED_TICK)
+
+    def run(self, simulator, *args, **kwargs) -> None:
+        """simulator.run(), plus the resume exit when restoring."""
+        import m5
+
+        self.simulator = simulator
+        if self.restore is not None:
+            # The resume exit has to be scheduled relative to the restored
+            # tick, i.e. after instantiation; run() does not instantiate twice.
+            simulator._instantiate()
+            m5.scheduleTickExitFromCurrent(1)
+        simulator.run(*args, **kwargs)
+
@@ -0,0 +1,123 @@
+"""
+resultsdb.py — SQLite results database shared by the sweep tooling.
+
+Tables
+  runs         one row per finished sweep point (features, outdir, exit
+               status, wall-clock seconds)
+  predictions  runtime predictions made before a point ran, filled in with
+               the measured runtime once it finishes
+  rows         the latest extracted summary row (the exercise's CSV row)
+               per point, written as soon as the point's stats are parsed
+
+The database lives next to the sweep spec (sweep.db) and is deliberately
+not removed by `make clean`: the runtime model learns from its history.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY,
+    point        TEXT NOT NULL,
+    features     TEXT NOT NULL,
+    outdir       TEXT,
+    status       INTEGER,
+    host_seconds REAL,
+    finished     REAL
+);
+CREATE INDEX IF NOT EXISTS runs_point ON runs(point);
+CREATE TABLE IF NOT EXISTS predictions (
+    id        INTEGER PRIMARY KEY,
+    point     TEXT NOT NULL,
+    model     TEXT NOT NULL,
+    predicted REAL,
+    actual    REAL,
+    created   REAL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    point   TEXT PRIMARY KEY,
+    outdir  TEXT,
+    updated REAL,
+    data    TEXT NOT NULL
+);
+"""
+
+
+class ResultsDB:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # Several make invocations may share one db; wait rather than fail.
+        self.conn = sqlite3.connect(str(self.path), timeout=60.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self) -> "ResultsDB":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---------- runs ----------
+
+    def record_run(self, point: str, features: Dict[str, Any], outdir: Optional[str],
+                   status: int, host_seconds: Optional[float]) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO runs(point, features, outdir, status, host_seconds, finished) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (point, json.dumps(features, sort_keys=True), outdir, status,
+             host_seconds, time.time()),
+        )
+        self.conn.commit()
+        return cur.lastrowid
+
+    def runs(self, ok_only: bool = True) -> List[Dict[str, Any]]:
+        q = "SELECT * FROM runs"
+        if ok_only:
+            q += " WHERE status = 0 AND host_seconds IS NOT NULL"
+        rows = []
+        for r in self.conn.execute(q + " ORDER BY id"):
+            d = dict(r)
+            d["features"] = json.loads(d["features"])
+            rows.append(d)
+        return rows
+
+    # ---------- predictions ----------
+
+    def record_prediction(self, point: str, model: str, predicted: Optional[float]) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO predictions(point, model, predicted, created) VALUES (?, ?, ?, ?)",
+            (point, model, predicted, time.time()),
+        )
+        self.conn.commit()
+        return cur.lastrowid
+
+    def set_actual(self, prediction_id: int, actual: Optional[float]) -> None:
+        self.conn.execute("UPDATE predictions SET actual = ? WHERE id = ?",
+                          (actual, prediction_id))
+        self.conn.commit()
+
+    def predictions(self) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self.conn.execute("SELECT * FROM predictions ORDER BY id")]
+
+    # ---------- extracted rows ----------
+
+    def record_row(self, point: str, outdir: str, row: Dict[str, Any]) -> None:
+        """Insert or replace the summary row of `point`."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rows(point, outdir, updated, data) VALUES (?, ?, ?, ?)",
+            (point, outdir, time.time(), json.dumps(row)),
+        )
+        self.conn.commit()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """All summary rows, ordered by outdir like the parse scripts order them."""
+        return [json.loads(r["data"])
+                for r in self.conn.execute("SELECT data FROM rows ORDER BY outdir")]
@@ -0,0 +1,143 @@
+"""
+roi.py — KVM fast-forward, cache warming and a detailed ROI, as one bundle.
+
+p4_1 and 02-kvm-time.py switch from KVM straight to the detailed core at
+the ROI marker, so the measurement starts with cold caches and branch
+predictors. ROIProcessor has three sets of cores instead:
+
+  fast_forward  KVM (default) up to the ROI marker;
+  warm          ATOMIC with the board's caches for `warmup_insts`
+                instructions, which fills the caches (and TLBs) at
+                functional speed;
+  detailed      TIMING/O3/MINOR for `roi_insts` instructions, after a
+                stats dump and reset (as p4_1 does at the switch), so the
+                final stats block is this phase only.
+
+ROIPipeline drives the switches from exit events: the ROI marker is the
+N-th occurrence of an exit event (EVENT:N as in simtools/prefix.py), and
+the instruction limits are counted on core 0 (ExitEvent.SIMPOINT_BEGIN,
+like simpoint-run.py). A later occurrence of the marker event (e.g. the
+runscript's final m5 exit) ends the ROI early. Instruction limits of 0 skip
+the warm phase or measure until that marker.
+
+Usage (in the config script)
+  from simtools.roi import ROIPipeline, ROIProcessor
+
+  processor = ROIProcessor(detailed=CPUTypes.O3, isa=ISA.X86, num_cores=2)
+  board = X86Board(..., processor=processor, ...)
+  roi = ROIPipeline(processor, at="EXIT:2", warmup_insts=50_000_000,
+                    roi_insts=100_000_000)
+  simulator = Simulator(board=board, on_exit_event=roi.handlers())
+  simulator.run()
+"""
+
+from typing import Dict, Iterator, Optional
+
+from simtools.prefix import parse_at
+
+STAGES = ("fast_forward", "warm", "detailed")
+
+
+def _processor_class():
+    from gem5.components.processors.cpu_types import CPUTypes, get_mem_mode
+    from gem5.components.processors.simple_core import SimpleCore
+    from gem5.components.processors.switchable_processor import SwitchableProcessor
+    from gem5.utils.override import overrides
+
+    class ROIProcessor(SwitchableProcessor):
+        def __init__(self, detailed, isa, num_cores: int,
+                     fast_forward=CPUTypes.KVM, warm=CPUTypes.ATOMIC):
+            types = dict(zip(STAGES, (fast_forward, warm, detailed)))
+            self._mem_mode = get_mem_mode(fast_forward)
+            self.stage = STAGES[0]
+            super().__init__(
+                switchable_cores={
+                    stage: [SimpleCore(cpu_type=t, core_id=i, isa=isa) for i in range(num_cores)]
+                    for stage, t in types.items()
+                },
+                starting_cores=self.stage,
+            )
+
+        @overrides(SwitchableProcessor)
+        def incorporate_processor(self, board) -> None:
+            super().incorporate_processor(board=board)
+            board.set_mem_mode(self._mem_mode)
+
+        def switch_to(self, stage: str) -> None:
+            if stage != self.stage:
+                self.switch_to_processor(stage)
+                self.stage = stage
+
+    ROIProcessor.__module__, ROIProcessor.__qualname__ = __name__, "ROIProcessor"
+    return ROIProcessor
+
+
+def __getattr__(name: str):
+    # ROIProcessor subclasses a gem5 class, so it is only defined once it is
+    # asked for (from a config script, under gem5).
+    if name == "ROIProcessor":
+        globals()[name] = cls = _processor_class()
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ROIPipeline:
+    def __init__(self, processor, at: str = "EXIT:2",
+                 warmup_insts: int = 50_000_000, roi_insts: int = 100_000_000):
+        self.processor = processor
+        self.at = at
+        self.event, self.count = parse_at(at)
+        self.warmup_insts = warmup_insts
+        self.roi_insts = roi_insts
+
+    def _stop_after(self, insts: int) -> None:
+        self.processor.get_cores()[0]._set_simpoint([insts], True)
+
+    def _warm(self) -> None:
+        print(f"roi: {self.at} reached, warming caches on ATOMIC cores "
+              f"for {self.warmup_insts} instructions")
+        self.processor.switch_to("warm")
+        self._stop_after(self.warmup_insts)
+
+    def _detailed(self) -> None:
+        import m5
+
+        m5.stats.dump()
+        m5.stats.reset()
+        self.processor.switch_to("detailed")
+        limit = f"{self.roi_insts} instructions" if self.roi_insts else "the next marker"
+        print(f"roi: stats dumped and reset, detailed cores until {limit}")
+        if self.roi_insts:
+            self._stop_after(self.roi_insts)
+
+    def _marker(self, handler) -> Iterator[bool]:
+        for i in range(1, self.count):
+            print(f"roi: {self.event.name} {i}, before the ROI")
+            yield next(handler) if handler is not None else False
+        if self.warmup_insts:
+            self._warm()
+        else:
+            self._detailed()
+        yield False
+        print(f"roi: {self.event.name} after the ROI start, ending in stage {self.processor.stage}")
+        yield True
+
+    def _limits(self) -> Iterator[bool]:
+        if self.warmup_insts:
+            self._detailed()
+            yield False
+        print(f"roi: {self.roi_insts} detailed instructions done")
+        yield True
+
+    def handlers(self, on_exit_event: Optional[Dict] = None) -> Dict:
+        """
+        on_exit_event for the Simulator. The pipeline owns the marker event
+        and SIMPOINT_BEGIN; a script handler for the marker event, if any
+        (a generator), runs for the occurrences before the ROI.
+        """
+        from gem5.simulate.exit_event import ExitEvent
+
+        handlers = dict(on_exit_event or {})
+        handlers[self.event] = self._marker(handlers.get(self.event))
+        handlers[ExitEvent.SIMPOINT_BEGIN] = self._limits()
+        return handlers
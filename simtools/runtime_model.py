@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+runtime_model.py — Predict the wall-clock runtime of a sweep point.
+
+The model is learned from the `runs` table of the results database:
+
+  - a point that already ran before is predicted from its own history
+    (geometric mean of the most recent runs), since reruns of the same
+    configuration are by far the best predictor;
+  - any other point goes through a ridge regression on log(hostSeconds)
+    over its features: categorical values (cpu type, workload id, memory
+    type, ...) are one-hot encoded, numeric values and size strings
+    (core count, "256kB" cache sizes, ...) enter as log2.
+
+Usage
+  python3 -m simtools.runtime_model report sweep.db
+"""
+
+import argparse
+import math
+import re
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from simtools.resultsdb import ResultsDB
+
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kKmMgGtT]i?)?[bB]?(?:/s)?\s*$")
+UNITS = {"": 1, "k": 1e3, "m": 1e6, "g": 1e9, "t": 1e12,
+         "ki": 2**10, "mi": 2**20, "gi": 2**30, "ti": 2**40}
+
+HISTORY_DEPTH = 3
+RIDGE_LAMBDA = 0.1
+
+
+def parse_size(v: Any) -> Optional[float]:
+    """'256kB' -> 256000.0, '1MiB' -> 1048576.0, '32GiB/s' -> 3.4e10, else None."""
+    if not isinstance(v, str):
+        return None
+    m = SIZE_RE.match(v)
+    if not m:
+        return None
+    return float(m.group(1)) * UNITS[(m.group(2) or "").lower()]
+
+
+def encode(features: Dict[str, Any]) -> Dict[str, float]:
+    """Map a feature dict onto named regression columns."""
+    out: Dict[str, float] = {}
+    for k, v in sorted(features.items()):
+        if v is None:
+            continue
+        if isinstance(v, bool):
+            out[f"{k}={v}"] = 1.0
+        elif isinstance(v, (int, float)):
+            out[k] = math.log2(1.0 + float(v))
+        else:
+            size = parse_size(v)
+            if size is not None:
+                out[k] = math.log2(1.0 + size)
+            else:
+                out[f"{k}={v}"] = 1.0
+    return out
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting; a is square and SPD here."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        piv = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[piv] = m[piv], m[col]
+        p = m[col][col]
+        if abs(p) < 1e-12:
+            continue
+        for r in range(col + 1, n):
+            f = m[r][col] / p
+            if f:
+                for c in range(col, n + 1):
+                    m[r][c] -= f * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        s = m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))
+        x[r] = s / m[r][r] if abs(m[r][r]) >= 1e-12 else 0.0
+    return x
+
+
+class RuntimeModel:
+    name = "history+ridge-log"
+
+    def __init__(self, lam: float = RIDGE_LAMBDA):
+        self.lam = lam
+        self.history: Dict[str, List[float]] = defaultdict(list)
+        self.columns: List[str] = []
+        self.means: Dict[str, float] = {}
+        self.weights: List[float] = []
+        self.intercept = 0.0
+
+    @classmethod
+    def from_db(cls, db: ResultsDB) -> "RuntimeModel":
+        model = cls()
+        model.fit(db.runs())
+        return model
+
+    def fit(self, runs: Sequence[Dict[str, Any]]) -> None:
+        runs = [r for r in runs if r.get("host_seconds") and r["host_seconds"] > 0]
+        self.history.clear()
+        for r in runs:
+            self.history[r["point"]].append(float(r["host_seconds"]))
+        if not runs:
+            return
+
+        xs = [encode(r["features"]) for r in runs]
+        ys = [math.log(r["host_seconds"]) for r in runs]
+        self.columns = sorted({k for x in xs for k in x})
+        self.intercept = statistics.fmean(ys)
+        n = len(self.columns)
+        if n == 0:
+            return
+
+        # Numeric columns are centred so a point that leaves a knob at its
+        # default (feature absent) is treated as "typical", not as zero.
+        self.means = {
+            c: statistics.fmean(x[c] for x in xs if c in x)
+            for c in self.columns if "=" not in c
+        }
+        rows = [self._row(x) for x in xs]
+
+        # Ridge on centred targets: (X^T X + lam I) w = X^T (y - mean)
+        xtx = [[0.0] * n for _ in range(n)]
+        xty = [0.0] * n
+        for row, y in zip(rows, ys):
+            yc = y - self.intercept
+            for i, vi in enumerate(row):
+                if not vi:
+                    continue
+                xty[i] += vi * yc
+                for j, vj in enumerate(row):
+                    xtx[i][j] += vi * vj
+        for i in range(n):
+            xtx[i][i] += self.lam
+        self.weights = _solve(xtx, xty)
+
+    def _row(self, x: Dict[str, float]) -> List[float]:
+        return [x[c] - self.means.get(c, 0.0) if c in x else 0.0 for c in self.columns]
+
+    def predict(self, point: str, features: Dict[str, Any]) -> Optional[float]:
+        """Predicted wall-clock seconds, or None when nothing has been learned yet."""
+        past = self.history.get(point)
+        if past:
+            recent = past[-HISTORY_DEPTH:]
+            return math.exp(statistics.fmean(math.log(v) for v in recent))
+        if not self.columns and not self.history:
+            return None
+        row = self._row(encode(features))
+        z = self.intercept + sum(w * v for w, v in zip(self.weights, row))
+        return math.exp(z)
+
+
+def report(db: ResultsDB, last: int = 20) -> None:
+    preds = [p for p in db.predictions() if p["predicted"] and p["actual"]]
+    if not preds:
+        print("No predictions with measured runtimes yet.")
+        return
+    errs = [abs(p["predicted"] - p["actual"]) / p["actual"] for p in preds]
+    print(f"{len(preds)} predictions  "
+          f"MAPE={100 * statistics.fmean(errs):.1f}%  "
+          f"median APE={100 * statistics.median(errs):.1f}%")
+    print(f"{'point':<30} {'predicted[s]':>13} {'actual[s]':>11} {'err':>7}")
+    for p, e in list(zip(preds, errs))[-last:]:
+        print(f"{p['point']:<30} {p['predicted']:>13.1f} {p['actual']:>11.1f} {100 * e:>6.1f}%")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("report", help="prediction accuracy from a results db")
+    rp.add_argument("db", type=Path)
+    rp.add_argument("--last", type=int, default=20)
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        sys.exit(f"{args.db}: no such results database")
+    with ResultsDB(args.db) as db:
+        report(db, args.last)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+sample_estimator.py — Estimate program-level metrics from sampled stats.txt.
+
+Every m5.stats.dump() of a sampled run (SMARTS, pFSA, ...) is one sample.
+All blocks are loaded once into a (samples x stats) array; each metric is a
+ratio of sums of stats matched by regex (summed over cores/caches/channels),
+computed per sample. For every metric the report holds
+
+  - mean, variance and standard deviation over the samples,
+  - the z-confidence interval of the mean (absolute and relative),
+  - the pooled ratio (sum of numerators / sum of denominators),
+  - the number of samples needed to reach --target relative error.
+
+Dumps without committed instructions are not samples and are dropped. So
+are dumps in which a core that commits in none of the other samples (the
+fast-forward core of a switchable processor) committed instructions: gem5's
+at-exit dump of a SMARTS run holds the last unit plus the fast-forward tail.
+--keep-fast-forward keeps them. Samples where a metric's denominator is
+zero are left out of that metric.
+
+Usage
+  python3 -m simtools.sample_estimator m5out/stats.txt \
+      [--metrics cpi ipc l1d_mpki ...] [--z 3] [--target 0.03] [--json out.json]
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simtools.statsfile import load_blocks
+
+INSTS = [r"\.core\.commitStats0\.numInsts$", r"\.core\.committedInsts$",
+         r"^system\.cpu\d*\.committedInsts$"]
+CYCLES = [r"\.core\.numCycles$", r"^system\.cpu\d*\.numCycles$"]
+
+# name -> (numerator patterns, denominator patterns, scale)
+METRICS: Dict[str, Tuple[List[str], List[str], float]] = {
+    "cpi": (CYCLES, INSTS, 1.0),
+    "ipc": (INSTS, CYCLES, 1.0),
+    "l1i_mpki": ([r"l1i-cache-\d+\.overallMisses::total$",
+                  r"L1Icache\.m_demand_misses$",
+                  r"icache\.overall_misses::total$"], INSTS, 1000.0),
+    "l1d_mpki": ([r"l1d-cache-\d+\.overallMisses::total$",
+                  r"L1Dcache\.m_demand_misses$",
+                  r"dcache\.overall_misses::total$"], INSTS, 1000.0),
+    "l2_mpki": ([r"l2-cache-\d+\.overallMisses::total$",
+                 r"L2cache\.m_demand_misses$",
+                 r"l2(?:cache)?\.overall_misses::total$"], INSTS, 1000.0),
+    "mem_bw": ([r"\.mem_ctrl\d*\.dram\.bytes(?:Read|Written)::total$",
+                r"^system\.mem_ctrls?\d*\.bytes(?:Read|Written)::total$"],
+               [r"^simSeconds$"], 1.0),
+    "branch_mispredict": ([r"\.branchPred\.condIncorrect$"],
+                          [r"\.branchPred\.condPredicted$"], 1.0),
+}
+
+
+def load_samples(stats_path: Path) -> Tuple[List[str], np.ndarray]:
+    """All dumps as one array; stats missing from a dump are 0."""
+    blocks = load_blocks(stats_path)
+    names = sorted({k for b in blocks for k in b})
+    col = {n: i for i, n in enumerate(names)}
+    data = np.zeros((len(blocks), len(names)))
+    for r, b in enumerate(blocks):
+        idx = [col[k] for k in b]
+        data[r, idx] = list(b.values())
+    return names, np.nan_to_num(data, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _columns(names: Sequence[str], patterns: Sequence[str]) -> List[int]:
+    """Columns of the first pattern that matches anything (like parse.py's pick())."""
+    for pat in patterns:
+        rx = re.compile(pat)
+        cols = [i for i, n in enumerate(names) if rx.search(n)]
+        if cols:
+            return cols
+    return []
+
+
+def metric_arrays(names: Sequence[str], data: np.ndarray, metric: str
+                  ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    num_pats, den_pats, scale = METRICS[metric]
+    num_cols, den_cols = _columns(names, num_pats), _columns(names, den_pats)
+    if not num_cols or not den_cols:
+        return None
+    return data[:, num_cols].sum(axis=1) * scale, data[:, den_cols].sum(axis=1)
+
+
+def estimate(num: np.ndarray, den: np.ndarray, z: float = 3.0,
+             target: Optional[float] = None) -> Dict[str, Any]:
+    ok = den > 0
+    x = num[ok] / den[ok]
+    n = int(x.size)
+    out: Dict[str, Any] = {"samples": n}
+    if n == 0:
+        return out
+    mean = float(x.mean())
+    var = float(x.var(ddof=1)) if n > 1 else 0.0
+    sd = math.sqrt(var)
+    half = z * sd / math.sqrt(n)
+    out.update({
+        "mean": mean,
+        "variance": var,
+        "stdev": sd,
+        "ci": [mean - half, mean + half],
+        "ci_half_width": half,
+        "ci_rel": half / abs(mean) if mean else None,
+        "pooled": float(num[ok].sum() / den[ok].sum()),
+    })
+    if target and mean:
+        # n >= (z * cv / e)^2, the usual SMARTS sample-size bound
+        cv = sd / abs(mean)
+        out["recommended_samples"] = max(2, math.ceil((z * cv / target) ** 2))
+    return out
+
+
+def sample_rows(names: Sequence[str], data: np.ndarray,
+                keep_fast_forward: bool = False) -> np.ndarray:
+    """Mask of the dumps that are samples (see the module docstring)."""
+    insts = _columns(names, INSTS)
+    if not insts:
+        return np.ones(data.shape[0], dtype=bool)
+    active = data[:, insts] > 0
+    rows = active.any(axis=1)
+    if keep_fast_forward or not rows.any():
+        return rows
+    # The cores that commit in a sample: the most common set among the dumps.
+    patterns, counts = np.unique(active[rows], axis=0, return_counts=True)
+    detailed = patterns[counts.argmax()]
+    return rows & ~(active & ~detailed).any(axis=1)
+
+
+def estimate_file(stats_path: Path, metrics: Sequence[str], z: float = 3.0,
+                  target: Optional[float] = None,
+                  keep_fast_forward: bool = False) -> Dict[str, Any]:
+    names, data = load_samples(stats_path)
+    dumps = int(data.shape[0])
+    data = data[sample_rows(names, data, keep_fast_forward)]
+    result: Dict[str, Any] = {"stats": str(stats_path), "dumps": dumps,
+                              "samples": int(data.shape[0]),
+                              "z": z, "target": target, "metrics": {}}
+    for m in metrics:
+        arrays = metric_arrays(names, data, m)
+        result["metrics"][m] = None if arrays is None else estimate(*arrays, z=z, target=target)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("stats", type=Path, help="stats.txt with one dump per sample")
+    ap.add_argument("--metrics", nargs="+", default=list(METRICS), choices=list(METRICS))
+    ap.add_argument("--z", type=float, default=3.0, help="CI width in standard errors")
+    ap.add_argument("--target", type=float, default=0.03,
+                    help="relative error for the recommended sample count")
+    ap.add_argument("--json", type=Path, help="write the result here instead of stdout")
+    ap.add_argument("--keep-fast-forward", action="store_true",
+                    help="count dumps in which a fast-forward core committed as samples")
+    args = ap.parse_args()
+
+    if not args.stats.exists():
+        sys.exit(f"{args.stats}: no such stats file")
+    result = estimate_file(args.stats, args.metrics, args.z, args.target,
+                           args.keep_fast_forward)
+    text = json.dumps(result, indent=2)
+    if args.json:
+        args.json.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
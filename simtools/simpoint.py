@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+simpoint.py — SimPoint clustering in-process, without the simpoint binary.
+
+Reads the basic block vectors written by `addSimPointProbe()`
+(simpoint.bb[.gz], one "T:<bb>:<count> :<bb>:<count> ..." line per interval)
+and follows the SimPoint 3.2 recipe:
+
+  1. normalize each interval's vector to sum 1 and project it to `dim` (15)
+     dimensions with a random [-1, 1] matrix; simtools/bbv.py does this
+     while streaming the file, into a memory-mapped float32 matrix;
+  2. k-means (k-means++ seeding, several restarts) for k = 1..max_k, or for
+     one fixed k; mini-batch updates once there are more intervals than one
+     batch, so millions of intervals cluster in bounded memory;
+  3. choose the smallest k whose BIC reaches `bic_threshold` (0.9) of the
+     range between the worst and the best BIC;
+  4. per cluster, the interval closest to the centroid is the simpoint and
+     the cluster's share of intervals is its weight.
+
+The .simpts ("<interval> <cluster>") and .weights ("<weight> <cluster>")
+files have the same format as SimPoint 3.2 and are read by
+gem5.utils.simpoint.SimPoint.
+
+Usage
+  python3 -m simtools.simpoint simpoint-analysis-m5out/simpoint.bb.gz \
+      --simpoints results.simpts --weights results.weights [--k 5 | --max-k 10]
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from simtools.bbv import DIM, SEED, project
+
+BATCH = 4096  # mini-batch size and distance-computation chunk
+
+
+# ---------- k-means ----------
+
+def _assign(x: np.ndarray, centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest center and squared distance per row, in BATCH-row chunks."""
+    labels = np.empty(x.shape[0], dtype=np.int64)
+    dist = np.empty(x.shape[0])
+    cc = (centers ** 2).sum(axis=1)
+    for s in range(0, x.shape[0], BATCH):
+        chunk = np.asarray(x[s:s + BATCH], dtype=np.float64)
+        d = (chunk ** 2).sum(axis=1)[:, None] - 2.0 * chunk @ centers.T + cc[None, :]
+        labels[s:s + BATCH] = d.argmin(axis=1)
+        dist[s:s + BATCH] = np.maximum(d[np.arange(len(chunk)), labels[s:s + BATCH]], 0.0)
+    return labels, dist
+
+
+def _kmeanspp(x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    # Seed from a sample so initialization stays cheap on huge inputs.
+    sample = x[rng.choice(x.shape[0], size=min(x.shape[0], 16 * BATCH), replace=False)]
+    sample = np.asarray(sample, dtype=np.float64)
+    centers = [sample[rng.integers(sample.shape[0])]]
+    d = ((sample - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        p = d / d.sum() if d.sum() > 0 else None
+        c = sample[rng.choice(sample.shape[0], p=p)]
+        centers.append(c)
+        d = np.minimum(d, ((sample - c) ** 2).sum(axis=1))
+    return np.array(centers)
+
+
+def kmeans(x: np.ndarray, k: int, rng: np.random.Generator, iters: int = 100
+           ) -> Tuple[np.ndarray, np.ndarray, float]:
+    """(centers, labels, inertia). Lloyd when x fits in a batch, else mini-batch."""
+    centers = _kmeanspp(x, k, rng)
+    n = x.shape[0]
+    if n <= BATCH:
+        xd = np.asarray(x, dtype=np.float64)
+        for _ in range(iters):
+            labels, _ = _assign(xd, centers)
+            new = centers.copy()
+            for c in range(k):
+                members = xd[labels == c]
+                if len(members):
+                    new[c] = members.mean(axis=0)
+            if np.allclose(new, centers):
+                break
+            centers = new
+    else:
+        counts = np.zeros(k)
+        ewa, best, stale = None, math.inf, 0
+        for _ in range(iters):
+            # Sorted indices make the reads from a memmap mostly sequential.
+            idx = np.sort(rng.integers(n, size=BATCH))
+            batch = np.asarray(x[idx], dtype=np.float64)
+            labels, dist = _assign(batch, centers)
+            # Stop when the smoothed batch inertia no longer improves.
+            ewa = dist.mean() if ewa is None else 0.9 * ewa + 0.1 * dist.mean()
+            if ewa < best:
+                best, stale = ewa, 0
+            else:
+                stale += 1
+                if stale >= 10:
+                    break
+            np.add.at(counts, labels, 1)
+            # Per-center learning rate 1/count (Sculley's mini-batch k-means).
+            for c in np.unique(labels):
+                members = batch[labels == c]
+                eta = len(members) / counts[c]
+                centers[c] += eta * (members.mean(axis=0) - centers[c])
+    labels, dist = _assign(x, centers)
+    return centers, labels, float(dist.sum())
+
+
+def bic(x: np.ndarray, labels: np.ndarray, inertia: float, k: int) -> float:
+    """BIC of a spherical Gaussian mixture (X-means formulation)."""
+    n, d = x.shape
+    if n <= k:
+        return -math.inf
+    var = max(inertia / (d * (n - k)), 1e-12)
+    sizes = np.bincount(labels, minlength=k)
+    sizes = sizes[sizes > 0]
+    loglik = float(np.sum(sizes * np.log(sizes / n)
+                          - sizes * d / 2.0 * math.log(2 * math.pi * var)
+                          - d * (sizes - 1) / 2.0))
+    params = (k - 1) + k * d + 1
+    return loglik - params / 2.0 * math.log(n)
+
+
+def best_of(x: np.ndarray, k: int, restarts: int, seed: int
+            ) -> Tuple[np.ndarray, np.ndarray, float]:
+    best = None
+    for r in range(restarts):
+        res = kmeans(x, k, np.random.default_rng([seed, k, r]))
+        if best is None or res[2] < best[2]:
+            best = res
+    return best
+
+
+def choose(x: np.ndarray, ks: List[int], restarts: int, seed: int,
+           threshold: float) -> Tuple[int, np.ndarray, np.ndarray, List[Tuple[int, float]]]:
+    runs = {k: best_of(x, k, restarts, seed) for k in ks}
+    scores = [(k, bic(x, runs[k][1], runs[k][2], k)) for k in ks]
+    finite = [s for _, s in scores if math.isfinite(s)]
+    lo, hi = (min(finite), max(finite)) if finite else (0.0, 0.0)
+    chosen = ks[-1]
+    for k, s in scores:
+        if math.isfinite(s) and (hi == lo or (s - lo) / (hi - lo) >= threshold):
+            chosen = k
+            break
+    centers, labels, _ = runs[chosen]
+    return chosen, centers, labels, scores
+
+
+def pick_simpoints(x: np.ndarray, centers: np.ndarray, labels: np.ndarray
+                   ) -> List[Tuple[int, int, float]]:
+    """(interval, cluster, weight) for every non-empty cluster, by interval."""
+    n = x.shape[0]
+    out = []
+    for c in range(centers.shape[0]):
+        members = np.flatnonzero(labels == c)
+        if members.size == 0:
+            continue
+        d = ((np.asarray(x[members], dtype=np.float64) - centers[c]) ** 2).sum(axis=1)
+        out.append((int(members[d.argmin()]), c, members.size / n))
+    return sorted(out)
+
+
+def write_results(picks: List[Tuple[int, int, float]], simpts: Path, weights: Path) -> None:
+    with open(simpts, "w") as fs, open(weights, "w") as fw:
+        for interval, cluster, weight in picks:
+            fs.write(f"{interval} {cluster}\n")
+            fw.write(f"{weight:.6f} {cluster}\n")
+
+
+def read_results(simpts: Path, weights: Path) -> List[Tuple[int, int, float]]:
+    """
+    (interval, cluster, weight) by interval, as write_results() wrote them.
+    The position in this list is the simpoint id gem5's SimPoint uses.
+    """
+    def pairs(path):
+        rows = (line.split()[:2] for line in Path(path).read_text().split("\n") if line.strip())
+        return {int(cluster): value for value, cluster in rows}
+
+    points, w = pairs(simpts), pairs(weights)
+    if set(points) != set(w):
+        raise ValueError(f"{simpts} and {weights} do not list the same clusters")
+    return sorted((int(points[c]), c, float(w[c])) for c in points)
+
+
+def run(x: np.ndarray, k: Optional[int], max_k: int, restarts: int, seed: int,
+        threshold: float) -> Tuple[int, List[Tuple[int, int, float]], List[Tuple[int, float]]]:
+    n = x.shape[0]
+    ks = [min(k, n)] if k else list(range(1, min(max_k, n) + 1))
+    chosen, centers, labels, scores = choose(x, ks, restarts, seed, threshold)
+    return chosen, pick_simpoints(x, centers, labels), scores
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("bbv", type=Path, help="simpoint.bb or simpoint.bb.gz")
+    ap.add_argument("--simpoints", type=Path, default=Path("results.simpts"))
+    ap.add_argument("--weights", type=Path, default=Path("results.weights"))
+    ap.add_argument("--k", type=int, help="fixed number of clusters (like simpoint -k)")
+    ap.add_argument("--max-k", type=int, default=10, help="search k = 1..max-k by BIC")
+    ap.add_argument("--dim", type=int, default=DIM, help="projected dimensions")
+    ap.add_argument("--restarts", type=int, default=5, help="k-means restarts per k")
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--bic-threshold", type=float, default=0.9)
+    args = ap.parse_args()
+
+    if not args.bbv.exists():
+        sys.exit(f"{args.bbv}: no such BBV file")
+    x = project(args.bbv, args.dim, args.seed)
+    if x.shape[0] == 0:
+        sys.exit(f"{args.bbv}: no intervals")
+    k, picks, scores = run(x, args.k, args.max_k, args.restarts, args.seed, args.bic_threshold)
+    if len(scores) > 1:
+        print("k   BIC")
+        for kk, s in scores:
+            print(f"{kk:<3} {s:.1f}{'  <-' if kk == k else ''}")
+    write_results(picks, args.simpoints, args.weights)
+    print(f"{x.shape[0]} intervals, k={k}, {len(picks)} simpoints -> "
+          f"{args.simpoints}, {args.weights}")
+
+
+if __name__ == "__main__":
+    main()
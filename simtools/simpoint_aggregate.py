@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+simpoint_aggregate.py — Weighted whole-program estimates of every stat.
+
+Each simpoint run (simpoint-run.py) dumps twice; the last dump covers the
+measured interval. Those dumps are loaded into one (simpoints x stats)
+array and every numeric stat is combined according to its unit:
+
+  - counts (Count, Tick, Cycle, Byte, Joule, ...) are turned into
+    per-instruction rates, weighted, and scaled to the program length
+    (--program-insts, else the reference run's simInsts, else one interval);
+  - ratios are never averaged as ratios. A ratio N/D is estimated as
+    sum(w*N/insts) / sum(w*D/insts), i.e. as a mean weighted by each
+    simpoint's share of the denominator. The denominator is known for the
+    usual gem5 names (ipc -> cycles, cpi -> insts, *MissRate -> *Accesses,
+    *AvgMissLatency -> *Misses, ...); rates over time (.../Second,
+    .../Tick, .../Cycle, Watt) are weighted by simulated time;
+  - what is left (distribution means, Unspecified, ...) is the plain
+    weighted mean over the simpoints that have a finite value.
+
+With --reference (stats.txt of a full detailed run) every stat gets the
+reference value and the relative error; counts are compared as
+per-instruction rates, so the error does not depend on the scaling.
+
+Usage
+  python3 -m simtools.simpoint_aggregate RESULTS_DIR --weights results.weights \
+      [--simpoints results.simpts] [--outdir 'simpoint{sid}-run'] \
+      [--reference full-detailed-run-m5out/stats.txt] [--stats 'core\\.ipc$' ...] \
+      [--json estimates.json]
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simtools.sample_estimator import CYCLES, INSTS, _columns
+from simtools.simpoint import read_results
+from simtools.statsfile import load_blocks, units
+
+COUNT_UNITS = {"Count", "Tick", "Cycle", "Byte", "Bit", "Joule", "Second"}
+TIME_UNITS = {"Second", "Tick", "Cycle"}
+MEAN_SUFFIXES = ("::mean", "::stdev", "::gmean", "::min_value", "::max_value")
+CORE_INSTS = (".commitStats0.numInsts", ".committedInsts")
+# settings and gauges that carry a count-like unit but do not add up
+GAUGE_RE = re.compile(r"(^|\.)(clock|voltage|hostMemory|finalTick|warmupTick)$")
+
+# ratio stem -> denominator stem, within the same stat object
+DENOMINATORS = {
+    "mshrMissRate": "accesses", "MshrMissRate": "Accesses",
+    "missRate": "accesses", "MissRate": "Accesses",
+    "avgMshrMissLatency": "mshrMisses", "AvgMshrMissLatency": "MshrMisses",
+    "avgMissLatency": "misses", "AvgMissLatency": "Misses",
+    "avgRefs": "sampledRefs",
+}
+RATIO_RE = re.compile(r"^(.*?)(%s)(::.*)?$" % "|".join(DENOMINATORS))
+DEFAULT_STATS = [r"core\.ipc$", r"core\.cpi$", r"overallMissRate::total$",
+                 r"overallMisses::total$"]
+
+
+def _denominator_name(name: str, present: Dict[str, int]) -> Optional[str]:
+    """'l2.overallMissRate::total' -> 'l2.overallAccesses::total', if that exists."""
+    m = RATIO_RE.match(name)
+    if not m:
+        return None
+    cand = m.group(1) + DENOMINATORS[m.group(2)] + (m.group(3) or "")
+    return cand if cand in present else None
+
+
+def last_dumps(outdirs: Sequence[Path]) -> Tuple[List[str], np.ndarray]:
+    """
+    Last dump of every outdir as one (outdirs x stats) array. A stat that is
+    missing from a dump was zero (zero-valued stats are not printed).
+    """
+    blocks = []
+    for d in outdirs:
+        b = load_blocks(Path(d) / "stats.txt")
+        if not b:
+            raise FileNotFoundError(f"{d}: no stats dump")
+        blocks.append(b[-1])
+    names = sorted({k for b in blocks for k in b})
+    col = {n: i for i, n in enumerate(names)}
+    data = np.zeros((len(blocks), len(names)))
+    for r, b in enumerate(blocks):
+        data[r, [col[k] for k in b]] = list(b.values())
+    return names, data
+
+
+def _insts(names: Sequence[str], data: np.ndarray) -> np.ndarray:
+    cols = _columns(names, INSTS) or _columns(names, [r"^simInsts$"])
+    if not cols:
+        raise ValueError("no committed-instruction stat in the simpoint dumps")
+    return np.nansum(data[:, cols], axis=1)
+
+
+def classify(names: Sequence[str], unit_of: Dict[str, str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Per stat: the column of its denominator (-1: a count, -2: plain weighted
+    mean, -3: weighted by simulated time) and a method label.
+    """
+    col = {n: i for i, n in enumerate(names)}
+    cycles = _columns(names, CYCLES)
+    den = np.full(len(names), -2, dtype=np.int64)
+    method = ["mean"] * len(names)
+    for i, n in enumerate(names):
+        unit = unit_of.get(n, "Count")
+        den_unit = unit.partition("/")[2]
+        if n.endswith(MEAN_SUFFIXES) or GAUGE_RE.search(n) or unit in ("Unspecified", "Volt"):
+            continue
+        if n.endswith((".ipc", ".cpi")):
+            # Per core: IPC over that core's cycles, CPI over its instructions.
+            core = n[:-4]
+            own = ([core + ".numCycles"] if n.endswith(".ipc") else
+                   [core + s for s in CORE_INSTS])
+            d = next((c for c in own if c in col), None)
+            if d is not None:
+                den[i], method[i] = col[d], f"ratio/{d}"
+            elif n.endswith(".ipc") and cycles:
+                den[i], method[i] = cycles[0], f"ratio/{names[cycles[0]]}"
+            else:
+                den[i], method[i] = -4, "ratio/insts"
+        elif not den_unit and unit in COUNT_UNITS:
+            den[i], method[i] = -1, "count"
+        elif den_unit in TIME_UNITS or unit == "Watt":
+            den[i], method[i] = -3, "time"
+        else:
+            d = _denominator_name(n, col)
+            if d is not None:
+                den[i], method[i] = col[d], f"ratio/{d}"
+    return den, method
+
+
+def aggregate(names: Sequence[str], data: np.ndarray, weights: np.ndarray,
+              unit_of: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """(estimate, per-instruction rate for counts else NaN, method) for every stat."""
+    insts = _insts(names, data)
+    if np.any(insts <= 0):
+        raise ValueError("a simpoint dump has no committed instructions")
+    w = np.asarray(weights, dtype=np.float64)
+    w = w / w.sum()
+    den, method = classify(names, unit_of)
+    col = {n: i for i, n in enumerate(names)}
+    per_inst = np.nan_to_num(data, nan=0.0, posinf=0.0, neginf=0.0) / insts[:, None]
+
+    # Weight of simpoint i for stat j: w_i times its denominator per inst.
+    sim_time = data[:, col["simSeconds"]] if "simSeconds" in col else insts
+    wd = np.repeat(w[:, None], len(names), axis=1)
+    ratio = den >= 0
+    wd[:, ratio] *= per_inst[:, den[ratio]]
+    wd[:, den == -3] *= (np.nan_to_num(sim_time) / insts)[:, None]
+    wd[:, den == -4] *= (1.0 / insts)[:, None]
+
+    ok = np.isfinite(data) & (wd > 0)
+    num = np.where(ok, wd * np.where(ok, data, 0.0), 0.0).sum(axis=0)
+    tot = np.where(ok, wd, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        est = np.where(tot > 0, num / tot, np.nan)
+
+    counts = den == -1
+    rate = np.full(len(names), np.nan)
+    rate[counts] = w @ per_inst[:, counts]
+    est[counts] = rate[counts]  # scaled by the caller
+    return est, rate, method
+
+
+def reference_values(stats: Path) -> Tuple[Dict[str, float], Optional[float]]:
+    blocks = load_blocks(stats)
+    if not blocks:
+        return {}, None
+    ref = blocks[-1]
+    names = list(ref)
+    cols = _columns(names, INSTS) or _columns(names, [r"^simInsts$"])
+    insts = sum(ref[names[c]] for c in cols) if cols else None
+    return ref, insts
+
+
+def estimate(outdirs: Sequence[Path], weights: Sequence[float],
+             reference: Optional[Path] = None, program_insts: Optional[float] = None
+             ) -> Dict[str, Any]:
+    """Estimates of every stat from simpoint outdirs and their weights."""
+    names, data = last_dumps(outdirs)
+    unit_of = units(Path(outdirs[0]) / "stats.txt")
+    est, rate, method = aggregate(names, data, np.asarray(weights, dtype=np.float64), unit_of)
+
+    ref, ref_insts = reference_values(reference) if reference else ({}, None)
+    scale = program_insts or ref_insts or float(_insts(names, data).mean())
+    result: Dict[str, Any] = {
+        "simpoints": [{"outdir": str(o), "weight": w} for o, w in zip(outdirs, weights)],
+        "program_insts": scale,
+        "scaled_to": "program" if program_insts or ref_insts else "interval",
+        "stats": {},
+    }
+    for i, n in enumerate(names):
+        if math.isnan(est[i]):
+            continue
+        e = {"estimate": float(rate[i] * scale) if method[i] == "count" else float(est[i]),
+             "method": method[i], "unit": unit_of.get(n)}
+        if n in ref and math.isfinite(ref[n]):
+            r = ref[n]
+            e["reference"] = r
+            # Counts compare as per-instruction rates.
+            a, b = (rate[i], r / ref_insts) if method[i] == "count" and ref_insts else (e["estimate"], r)
+            e["relative_error"] = abs(a - b) / abs(b) if b else None
+        result["stats"][n] = e
+    return result
+
+
+def estimate_dir(results: Path, simpts: Path, weights: Path, outdir: str = "simpoint{sid}-run",
+                 reference: Optional[Path] = None, program_insts: Optional[float] = None
+                 ) -> Dict[str, Any]:
+    picks = read_results(simpts, weights)
+    outdirs = [Path(results) / outdir.format(sid=sid) for sid in range(len(picks))]
+    return estimate(outdirs, [w for _, _, w in picks], reference, program_insts)
+
+
+def predicted(result: Dict[str, Any], suffix: str = "core.ipc") -> Optional[float]:
+    """Mean over cores of one estimated stat, e.g. IPC."""
+    hits = [e for n, e in result["stats"].items() if n.endswith(suffix)]
+    return sum(e["estimate"] for e in hits) / len(hits) if hits else None
+
+
+def print_table(result: Dict[str, Any], patterns: Sequence[str]) -> None:
+    rxs = [re.compile(p) for p in patterns]
+    print(f"{'stat':<60} {'estimate':>14} {'reference':>14} {'err%':>7}  method")
+    for n, e in result["stats"].items():
+        if not any(rx.search(n) for rx in rxs):
+            continue
+        ref = e.get("reference")
+        err = e.get("relative_error")
+        print(f"{n:<60} {e['estimate']:>14.6g} {'-' if ref is None else format(ref, '.6g'):>14} "
+              f"{'-' if err is None else format(100 * err, '.2f'):>7}  {e['method']}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("results", type=Path, help="directory holding the simpoint outdirs")
+    ap.add_argument("--weights", type=Path, default=Path("results.weights"))
+    ap.add_argument("--simpoints", type=Path,
+                    help="the matching .simpts (default: next to --weights)")
+    ap.add_argument("--outdir", default="simpoint{sid}-run", help="outdir pattern in RESULTS")
+    ap.add_argument("--reference", type=Path, help="stats.txt of a full detailed run")
+    ap.add_argument("--program-insts", type=float,
+                    help="instructions in the whole program (scales counts)")
+    ap.add_argument("--stats", nargs="+", default=DEFAULT_STATS,
+                    help="regexes of the stats to print (the JSON has all)")
+    ap.add_argument("--json", type=Path, help="write every estimate here")
+    args = ap.parse_args()
+
+    simpts = args.simpoints or args.weights.with_suffix(".simpts")
+    for p in (args.weights, simpts):
+        if not p.exists():
+            sys.exit(f"{p}: not found")
+    try:
+        result = estimate_dir(args.results, simpts, args.weights, args.outdir,
+                              args.reference, args.program_insts)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(str(e))
+    print_table(result, args.stats)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
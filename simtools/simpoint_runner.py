@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+simpoint_runner.py — Restore and run every SimPoint in parallel, then predict.
+
+Reads the .simpts/.weights pair and starts one
+
+    gem5 -re --outdir=<outdir> simpoint-run.py --sid=<sid>
+
+per simpoint. Which simpoints exist, and how many, comes from the files, not
+from the script. gem5.utils.simpoint.SimPoint sorts simpoints by interval,
+so sid N is the N-th simpoint in interval order, which is also the index of
+the checkpoint cpt.SimPoint<N>.
+
+Jobs start as the host has room for them (simtools/hostres.py: free cores
+and MemAvailable against --mem-per-job). A simpoint whose outdir already
+has an IPC in its stats.txt is not run again, unless --force is given.
+At the end the weighted IPC prediction (simtools/simpoint_aggregate.py,
+with the estimates of all other stats in the --json output) is printed.
+With --reference-stats, it is compared against a full detailed run.
+
+Usage
+  python3 -m simtools.simpoint_runner [--simpoints results.simpts] \
+      [--weights results.weights] [--script simpoint-run.py] \
+      [--outdir 'simpoint{sid}-run'] [--jobs N] \
+      [--reference-stats full-detailed-run-m5out/stats.txt] [-- extra script args]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from simtools import hostres
+from simtools.simpoint import read_results
+from simtools.simpoint_aggregate import estimate, predicted
+from simtools.statsfile import load_blocks
+
+
+@dataclass
+class SimPointJob:
+    sid: int
+    interval: int
+    cluster: int
+    weight: float
+    outdir: Path
+
+
+def read_simpoints(simpts: Path, weights: Path) -> List[SimPointJob]:
+    return [SimPointJob(sid, interval, cluster, weight, Path())
+            for sid, (interval, cluster, weight) in enumerate(read_results(simpts, weights))]
+
+
+def ipc_of(outdir: Path) -> Optional[float]:
+    """IPC of the measured interval: the last dump that has a core IPC."""
+    for block in reversed(load_blocks(Path(outdir) / "stats.txt")):
+        vals = [v for k, v in block.items() if k.endswith("core.ipc") and v > 0]
+        if vals:
+            return sum(vals) / len(vals)
+    return None
+
+
+def run_jobs(jobs: List[SimPointJob], command: List[str], max_jobs: Optional[int],
+             mem_per_job: int) -> Dict[int, int]:
+    """Run `command + [--sid=N]` for every job; sid -> exit code."""
+    pending = list(jobs)
+    running: Dict[subprocess.Popen, SimPointJob] = {}
+    codes: Dict[int, int] = {}
+    t0 = time.monotonic()
+    while pending or running:
+        free_cpu = hostres.cpu_slots(len(running), max_jobs)
+        avail = hostres.mem_available()
+        if avail is not None:
+            # Running jobs may still grow up to the estimate.
+            avail -= sum(max(0, mem_per_job - hostres.rss(p.pid)) for p in running)
+        while pending and free_cpu > 0 and (avail is None or mem_per_job <= avail or not running):
+            job = pending.pop(0)
+            job.outdir.mkdir(parents=True, exist_ok=True)
+            cmd = [command[0], "-re", f"--outdir={job.outdir}", *command[1:], f"--sid={job.sid}"]
+            running[subprocess.Popen(cmd)] = job
+            free_cpu -= 1
+            if avail is not None:
+                avail -= mem_per_job
+            print(f"simpoint_runner: started sid {job.sid} (interval {job.interval}, "
+                  f"weight {job.weight:.4f}), {len(running)} running")
+        # Poll: subprocess has no wait-for-any, and jobs run for minutes.
+        time.sleep(1.0)
+        for proc in [p for p in running if p.poll() is not None]:
+            job = running.pop(proc)
+            codes[job.sid] = proc.returncode
+            print(f"simpoint_runner: gem5 with sid {job.sid} finished, exit {proc.returncode} "
+                  f"after {time.monotonic() - t0:.1f}s, {len(pending)} pending")
+    return codes
+
+
+def predict(jobs: List[SimPointJob], reference: Optional[Path] = None) -> Dict[str, Any]:
+    have = [j for j in jobs if ipc_of(j.outdir) is not None]
+    covered = sum(j.weight for j in have)
+    # Weights are renormalized over what ran, so one failed simpoint does
+    # not read as an IPC drop; `weight_covered` shows how much that is.
+    result: Dict[str, Any] = {"predicted_ipc": None, "weight_covered": covered,
+                              "missing": [j.sid for j in jobs if j not in have]}
+    if have:
+        est = estimate([j.outdir for j in have], [j.weight for j in have], reference)
+        result["predicted_ipc"] = predicted(est)
+        ref = [e.get("reference") for n, e in est["stats"].items() if n.endswith("core.ipc")]
+        if ref and None not in ref:
+            result["actual_ipc"] = sum(ref) / len(ref)
+        result["estimates"] = est
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--simpoints", type=Path, default=Path("results.simpts"))
+    ap.add_argument("--weights", type=Path, default=Path("results.weights"))
+    ap.add_argument("--gem5", default="gem5")
+    ap.add_argument("--script", default="simpoint-run.py")
+    ap.add_argument("--outdir", default="simpoint{sid}-run", help="per-simpoint outdir pattern")
+    ap.add_argument("--jobs", type=int, help="upper bound on parallel gem5 processes")
+    ap.add_argument("--mem-per-job", default="2GiB", help="expected peak RSS of one run")
+    ap.add_argument("--force", action="store_true", help="rerun simpoints with cached results")
+    ap.add_argument("--reference-stats", type=Path, help="stats.txt of a full detailed run")
+    ap.add_argument("--json", type=Path, help="write the prediction here as well")
+    ap.add_argument("script_args", nargs="*", help="passed to the script (after --)")
+    args = ap.parse_args()
+
+    for p in (args.simpoints, args.weights):
+        if not p.exists():
+            sys.exit(f"{p}: not found (run the SimPoint analysis first)")
+    jobs = read_simpoints(args.simpoints, args.weights)
+    for j in jobs:
+        j.outdir = Path(args.outdir.format(sid=j.sid))
+    todo = [j for j in jobs if args.force or ipc_of(j.outdir) is None]
+    print(f"simpoint_runner: {len(jobs)} simpoints, {len(jobs) - len(todo)} cached, "
+          f"{len(todo)} to run")
+
+    codes = run_jobs(todo, [args.gem5, args.script, *args.script_args], args.jobs,
+                     hostres.to_bytes(args.mem_per_job))
+    try:
+        result = predict(jobs, args.reference_stats)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(f"simpoint_runner: {e}")
+    result["failed"] = sorted(sid for sid, c in codes.items() if c != 0)
+
+    if result["predicted_ipc"] is None:
+        sys.exit("simpoint_runner: no simpoint produced an IPC")
+    print(f"predicted IPC: {result['predicted_ipc']}")
+    if result["missing"]:
+        print(f"  (without sids {result['missing']}, "
+              f"{100 * result['weight_covered']:.1f}% of the weight)")
+    actual = result.get("actual_ipc")
+    if actual:
+        result["relative_error"] = abs(actual - result["predicted_ipc"]) / actual
+        print(f"actual IPC: {actual}")
+        print(f"relative error: {100 * result['relative_error']}%")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    sys.exit(1 if result["failed"] or result["missing"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+smarts.py — Adaptive SMARTS sampling for SimpleSwitchableProcessor configs.
+
+Same sampling scheme as the SMARTS exercise (fast-forward on the starting
+core, W instructions of detailed warmup, U instructions measured, one sample
+every k*U instructions), but driven by the samples themselves:
+
+  - per-sample CPI (cycles of the measured unit / U) feeds running mean and
+    variance (Welford);
+  - once at least `min_samples` are in and the confidence interval is within
+    `target` (relative half-width, z = 3 ~ 99.7%), detailed sampling either
+    stops and the rest of the program is fast-forwarded ("stop"), or the
+    sampling period is stretched by `stretch` each time the interval still
+    holds and snaps back to k when it does not ("stretch");
+  - the program length is discovered from the committed instruction count at
+    the end of a run and cached per binary, so later runs size k for the
+    planned number of samples instead of using a typed-in length.
+
+Usage (in the config script)
+  from simtools.smarts import AdaptiveSMARTS
+
+  smarts = AdaptiveSMARTS(processor, clock="3GHz", workload=binary_path)
+  simulator = Simulator(board=board,
+                        on_exit_event={ExitEvent.SIMPOINT_BEGIN: smarts.generator()})
+  smarts.start()
+  simulator.run()
+  smarts.finish()   # writes <outdir>/smarts.json and caches the length
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from simtools.statdump import dumper
+from simtools.workload import cache_length, cached_length, workload_key
+
+
+class RunningStats:
+    """Welford's online mean/variance."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def half_width(self, z: float) -> float:
+        return z * math.sqrt(self.variance / self.n) if self.n else math.inf
+
+    def rel_error(self, z: float) -> float:
+        """Half-width of the z confidence interval relative to the mean."""
+        if self.n < 2 or self.mean == 0:
+            return math.inf
+        return self.half_width(z) / abs(self.mean)
+
+
+# ---------- gem5 side ----------
+
+class AdaptiveSMARTS:
+    def __init__(self, processor, clock: str, workload=None, U: int = 1000,
+                 W: Optional[int] = None, k: Optional[int] = None,
+                 planned_samples: int = 50, default_k: int = 200,
+                 target: float = 0.03, z: float = 3.0, min_samples: int = 30,
+                 mode: str = "stop", stretch: int = 4,
+                 dump_stats: Optional[Sequence[str]] = None):
+        """
+        :param clock: core clock ("3GHz"), to turn measured ticks into cycles.
+        :param workload: binary path, used to look up the discovered length.
+        :param k: sampling period in units of U; by default sized from the
+            cached program length for `planned_samples`, else `default_k`.
+        :param dump_stats: glob patterns of the stats each per-sample dump
+            keeps (simtools.statdump, e.g. SAMPLE_STATS); default: all.
+        """
+        from m5.util.convert import toFrequency
+
+        if mode not in ("stop", "stretch"):
+            raise ValueError(f"unknown adaptive mode '{mode}'")
+        self.processor = processor
+        self.U = U
+        self.W = 2 * U if W is None else W
+        self.key = workload_key(workload) if workload else None
+        self.length = cached_length(self.key) if self.key else None
+        if k is None:
+            k = (math.ceil(self.length / (planned_samples * U))
+                 if self.length else default_k)
+        if (k - 1) * U <= self.W:
+            raise ValueError(f"k={k} leaves no room to fast-forward before a {self.W}-inst warmup")
+        self.k = k
+        self.target = target
+        self.z = z
+        self.min_samples = min_samples
+        self.mode = mode
+        self.stretch = stretch
+        self.dump = dumper(dump_stats)
+        self.freq = toFrequency(clock)
+        self.stats = RunningStats()
+        self.samples: List[Dict[str, Any]] = []
+        self.converged_at: Optional[int] = None
+        self.position = 0  # instructions committed when the current sample started
+
+    def _ticks_per_cycle(self) -> float:
+        from m5.ticks import fromSeconds
+
+        return float(fromSeconds(1.0 / self.freq))
+
+    def start(self) -> None:
+        """Schedule the first sample at the first instruction."""
+        self.processor.get_cores()[0]._set_simpoint([1], False)
+        self.position = 1
+
+    def generator(self) -> Iterator[bool]:
+        import m5
+
+        period = self.k
+        while True:
+            # Start of the detailed warmup.
+            self.processor.switch()
+            self.processor.get_cores()[0]._set_simpoint([self.W, self.W + self.U], True)
+            yield False
+
+            # End of warmup: measure the next U instructions.
+            m5.stats.reset()
+            t0 = m5.curTick()
+            yield False
+
+            cpi = (m5.curTick() - t0) / self._ticks_per_cycle() / self.U
+            self.stats.add(cpi)
+            self.samples.append({"inst": self.position + self.W, "period": period, "cpi": cpi})
+            self.dump()
+            self.processor.switch()
+
+            met = (self.stats.n >= self.min_samples
+                   and self.stats.rel_error(self.z) <= self.target)
+            print(f"SMARTS sample {self.stats.n}: CPI={cpi:.4f} "
+                  f"mean={self.stats.mean:.4f} +/-{100 * self.stats.rel_error(self.z):.2f}%")
+            if met and self.converged_at is None:
+                self.converged_at = self.stats.n
+            if met and self.mode == "stop":
+                print(f"SMARTS: target +/-{100 * self.target:.1f}% reached after "
+                      f"{self.stats.n} samples; fast-forwarding the rest")
+                while True:
+                    yield False  # no more samples are scheduled
+            if self.mode == "stretch":
+                period = period * self.stretch if met else self.k
+            self.position += period * self.U
+            self.processor.get_cores()[0]._set_simpoint([self.U * (period - 1) - self.W], True)
+            yield False
+
+    def _committed(self) -> int:
+        cores = getattr(self.processor, "_switchable_cores", None)
+        groups = cores.values() if cores else [self.processor.get_cores()]
+        return sum(int(c.core.totalInsts()) for group in groups for c in group)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "U": self.U, "W": self.W, "k": self.k, "mode": self.mode,
+            "target": self.target, "z": self.z,
+            "samples": len(self.samples),
+            "cpi_mean": self.stats.mean if self.stats.n else None,
+            "cpi_rel_error": (self.stats.rel_error(self.z)
+                              if self.stats.n > 1 else None),
+            "converged_after": self.converged_at,
+            "program_length": self.length,
+            "per_sample": self.samples,
+        }
+
+    def finish(self, path: Optional[Path] = None) -> Dict[str, Any]:
+        """Record the discovered length and write the summary JSON."""
+        from m5 import options
+
+        length = self._committed()
+        if length:
+            self.length = length
+            if self.key:
+                cache_length(self.key, length)
+        out = self.summary()
+        path = Path(path) if path else Path(options.outdir) / "smarts.json"
+        path.write_text(json.dumps(out, indent=2))
+        print(f"SMARTS: {out['samples']} samples, CPI={out['cpi_mean']}, "
+              f"program length {length} -> {path}")
+        return out
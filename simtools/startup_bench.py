@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+startup_bench.py — How long config scripts take to reach their first tick.
+
+A 1 ms traffic-generator point (p3) spends most of its job in Python before
+the first tick. This benchmark runs every config script up to the end of
+m5.instantiate() and stops it at its first m5.simulate(). Each run is
+timed in phases:
+
+  boot          gem5 start until the script starts (C++ and embedded Python
+                init, importing m5);
+  import        top-level imports made while the script runs
+                (gem5.components.*, m5.objects, ...);
+  construct     the rest of the script up to m5.instantiate(): building the
+                components, set_workload (and obtain_resource), Simulator();
+  config_write  start of m5.instantiate() until the stats are initialized:
+                unproxying params, config.ini, config.json, config.dot;
+  instantiate   the rest of m5.instantiate(): creating and connecting the
+                C++ SimObjects, init(), regStats, initState;
+  teardown      the first m5.simulate() until the process has exited.
+
+Cases are collected from the given paths: each sweep spec contributes the
+first point of every script it runs (with that point's args, binary and
+cwd), and each other script that builds a Simulator or calls
+m5.instantiate() runs without args from its own directory. Every case runs
+--warmup times unmeasured (resource downloads, cold page cache), then
+--repeat times one after the other. Each phase is reported as the median,
+min and max over the runs.
+
+Usage
+  python3 -m simtools.startup_bench run exercise1 materials [--repeat 5] \
+      [--only 'exercise1/*'] [--gem5 gem5] [-o startup.json]
+  python3 -m simtools.startup_bench compare base.json startup.json [--threshold 0.1]
+
+`compare` lists the phases whose median got slower by more than the
+threshold (and by more than --min-seconds) and exits 1 if there are any.
+The gem5 side runs as `gem5 -re --outdir=D -m simtools.startup_bench
+SCRIPT [ARGS]` and writes D/startup.json.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+PHASES = ("boot", "import", "construct", "config_write", "instantiate", "teardown", "total")
+RESULT = "startup.json"
+T0_ENV = "SIMTOOLS_STARTUP_T0"
+
+
+# ---------- gem5 side ----------
+
+class _FirstTick(BaseException):
+    """Raised by the patched m5.simulate(); a BaseException so configs don't catch it."""
+
+
+def probe(script: Path, args: List[str]) -> None:
+    """Run a config script under gem5 up to its first m5.simulate(), timing it."""
+    import builtins
+    import runpy
+
+    import m5
+    import m5.stats
+    from m5 import options
+
+    start = time.time()
+    marks: Dict[str, Optional[float]] = {"instantiate": None, "stats_init": None,
+                                         "instantiated": None, "imports": None}
+    imports = {"depth": 0, "seconds": 0.0}
+    real_import = builtins.__import__
+
+    def timed_import(*a, **kw):
+        if imports["depth"]:
+            return real_import(*a, **kw)
+        imports["depth"] = 1
+        t = time.perf_counter()
+        try:
+            return real_import(*a, **kw)
+        finally:
+            imports["seconds"] += time.perf_counter() - t
+            imports["depth"] = 0
+
+    real_instantiate, real_init_stats = m5.instantiate, m5.stats.initSimStats
+
+    def instantiate(*a, **kw):
+        marks["instantiate"] = time.time()
+        marks["imports"] = imports["seconds"]
+        real_instantiate(*a, **kw)
+        marks["instantiated"] = time.time()
+
+    def init_sim_stats(*a, **kw):
+        if marks["stats_init"] is None:
+            marks["stats_init"] = time.time()
+        return real_init_stats(*a, **kw)
+
+    def simulate(*a, **kw):
+        raise _FirstTick()
+
+    builtins.__import__ = timed_import
+    m5.instantiate, m5.stats.initSimStats, m5.simulate = instantiate, init_sim_stats, simulate
+    status, error = "ok", None
+    sys.argv = [str(script), *args]
+    sys.path.insert(0, str(script.resolve().parent))
+    try:
+        runpy.run_path(str(script), run_name="__m5_main__")
+    except _FirstTick:
+        pass
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status, error = "error", f"exit {e.code}"
+    except Exception as e:  # the script's own failure is the result
+        status, error = "error", f"{type(e).__name__}: {e}"
+    finally:
+        builtins.__import__ = real_import
+    end = time.time()
+    if status == "ok" and marks["instantiated"] is None:
+        status = "no-instantiate"
+
+    from simtools.phase_profile import rss_bytes
+
+    t0 = float(os.environ.get(T0_ENV, start))
+    construct_end = marks["instantiate"] or end
+    imported = imports["seconds"] if marks["imports"] is None else marks["imports"]
+    result = {
+        "script": str(script), "args": args, "status": status, "error": error,
+        "boot": start - t0,
+        "import": imported,
+        "construct": construct_end - start - imported,
+        "config_write": (marks["stats_init"] - marks["instantiate"]
+                         if marks["stats_init"] and marks["instantiate"] else None),
+        "instantiate": (marks["instantiated"] - (marks["stats_init"] or marks["instantiate"])
+                        if marks["instantiated"] else None),
+        "first_tick": end - t0,
+        "rss": rss_bytes(),
+    }
+    try:
+        from m5.objects import Root
+
+        result["simobjects"] = len(list(Root.getInstance().descendants()))
+    except Exception:
+        result["simobjects"] = None
+    (Path(options.outdir) / RESULT).write_text(json.dumps(result, indent=2))
+
+
+# ---------- host side ----------
+
+@dataclass
+class Case:
+    id: str
+    script: str
+    args: List[str] = field(default_factory=list)
+    cwd: str = "."
+    gem5: Optional[str] = None
+
+
+def _is_config(path: Path) -> bool:
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return False
+    uses_gem5 = "import m5" in text or "from m5" in text or "from gem5" in text
+    return uses_gem5 and ("Simulator(" in text or "instantiate(" in text)
+
+
+def cases_from_spec(spec_path: Path, root: Path) -> List[Case]:
+    """The first point of every script in a sweep spec."""
+    from simtools.sweep import load_spec
+
+    spec, points = load_spec(spec_path)
+    out, seen = [], set()
+    for p in points:
+        if p.script in seen:  # prefix points run from boot here, like without the prefix
+            continue
+        seen.add(p.script)
+        script = (spec_path.parent / p.script).resolve()
+        out.append(Case(id=f"{os.path.relpath(script, root)}@{p.id}", script=str(script),
+                        args=[str(a) for a in p.args], cwd=str(spec_path.parent.resolve()),
+                        gem5=p.gem5))
+    return out
+
+
+def collect(paths: Iterable[Path], root: Path) -> List[Case]:
+    cases: List[Case] = []
+    scripts, specs = [], []
+    for p in map(Path, paths):
+        if p.is_dir():
+            specs += sorted(p.rglob("sweep*.json"))
+            scripts += sorted(p.rglob("*.py"))
+        elif p.suffix == ".json":
+            specs.append(p)
+        else:
+            scripts.append(p)
+    for s in specs:
+        cases += cases_from_spec(s, root)
+    covered = {c.script for c in cases}
+    for s in scripts:
+        s = s.resolve()
+        if str(s) not in covered and "simtools" not in s.parts and _is_config(s):
+            cases.append(Case(id=os.path.relpath(s, root), script=str(s), cwd=str(s.parent)))
+    return cases
+
+
+def run_once(case: Case, gem5: str, timeout: float) -> Dict[str, Any]:
+    root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    env["PYTHONHASHSEED"] = "0"
+    outdir = Path(tempfile.mkdtemp(prefix="startup-bench-"))
+    try:
+        env[T0_ENV] = repr(time.time())
+        t0 = time.monotonic()
+        try:
+            subprocess.run([gem5, "-re", f"--outdir={outdir}", "-m", "simtools.startup_bench",
+                            case.script, *case.args],
+                           cwd=case.cwd, env=env, timeout=timeout,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            return {"status": "timeout", "total": time.monotonic() - t0}
+        total = time.monotonic() - t0
+        try:
+            result = json.loads((outdir / RESULT).read_text())
+        except (OSError, ValueError):
+            errs = sorted(outdir.glob("simerr*"))
+            tail = errs[0].read_text(errors="replace").strip().splitlines()[-3:] if errs else []
+            return {"status": "crash", "error": " | ".join(tail), "total": total}
+        result["total"] = total
+        result["teardown"] = total - result.pop("first_tick")
+        return result
+    finally:
+        shutil.rmtree(outdir, ignore_errors=True)
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for phase in PHASES:
+        values = [r[phase] for r in runs if r.get(phase) is not None]
+        if values:
+            out[phase] = {"median": statistics.median(values), "min": min(values),
+                          "max": max(values)}
+    return out
+
+
+def bench(cases: List[Case], gem5: Optional[str], repeat: int, warmup: int,
+          timeout: float) -> List[Dict[str, Any]]:
+    results = []
+    for i, case in enumerate(cases, 1):
+        binary = gem5 or case.gem5 or "gem5"
+        for _ in range(warmup):
+            run_once(case, binary, timeout)
+        runs = [run_once(case, binary, timeout) for _ in range(repeat)]
+        ok = [r for r in runs if r.get("status") == "ok"]
+        status = "ok" if len(ok) == len(runs) else runs[-1].get("status", "error")
+        entry = {**asdict(case), "gem5": binary, "status": status, "runs": runs,
+                 "phases": summarize(ok or runs)}
+        for r in runs:
+            if r.get("error"):
+                entry["error"] = r["error"]
+                break
+        for k in ("simobjects", "rss"):
+            entry[k] = max((r[k] for r in ok if r.get(k) is not None), default=None)
+        results.append(entry)
+        if status == "ok":
+            print(f"[{i}/{len(cases)}] {case.id}: "
+                  f"{entry['phases']['total']['median']:.2f} s to first tick", flush=True)
+        else:
+            print(f"[{i}/{len(cases)}] {case.id}: {status} ({entry.get('error', '')})", flush=True)
+    return results
+
+
+def table(results: List[Dict[str, Any]]) -> str:
+    cols = list(PHASES)
+    width = max([len(r["id"]) for r in results] + [4])
+    lines = [f"{'case':<{width}} " + " ".join(f"{c:>12}" for c in cols) + "  status"]
+    for r in results:
+        cells = [r["phases"].get(c, {}).get("median") for c in cols]
+        lines.append(f"{r['id']:<{width}} "
+                     + " ".join(f"{'-':>12}" if v is None else f"{v:>12.3f}" for v in cells)
+                     + f"  {r['status']}")
+    return "\n".join(lines) + "\n"
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float,
+            min_seconds: float) -> List[str]:
+    """Phases whose median rose by more than `threshold` (relative) and `min_seconds`."""
+    old = {r["id"]: r for r in base["cases"]}
+    slower = []
+    for r in new["cases"]:
+        b = old.get(r["id"])
+        if b is None:
+            continue
+        if b["status"] == "ok" and r["status"] != "ok":
+            slower.append(f"{r['id']}: {b['status']} -> {r['status']}")
+            continue
+        for phase in PHASES:
+            x = b["phases"].get(phase, {}).get("median")
+            y = r["phases"].get(phase, {}).get("median")
+            if x is None or y is None:
+                continue
+            if y - x > min_seconds and y > x * (1 + threshold):
+                slower.append(f"{r['id']}: {phase} {x:.3f} s -> {y:.3f} s "
+                              f"(+{100 * (y - x) / max(x, 1e-9):.0f}%)")
+    return slower
+
+
+def main(under_gem5: bool = False):
+    if under_gem5:  # gem5 -m simtools.startup_bench SCRIPT [ARGS]
+        if len(sys.argv) < 2:
+            sys.exit("usage: gem5 -m simtools.startup_bench SCRIPT [ARGS]")
+        probe(Path(sys.argv[1]), sys.argv[2:])
+        return
+
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.startup_bench")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="benchmark the configs found in PATHS")
+    run.add_argument("paths", nargs="*", type=Path,
+                     default=[Path("exercise1"), Path("materials")],
+                     help="scripts, sweep specs or directories (default: exercise1 materials)")
+    run.add_argument("--gem5", default=None,
+                     help="gem5 binary for every case (default: the sweep spec's, else gem5)")
+    run.add_argument("--repeat", type=int, default=5, help="measured runs per case")
+    run.add_argument("--warmup", type=int, default=1, help="unmeasured runs per case first")
+    run.add_argument("--timeout", type=float, default=600.0, help="seconds per run")
+    run.add_argument("--only", nargs="*", help="fnmatch patterns over case ids")
+    run.add_argument("--list", action="store_true", help="print the cases and exit")
+    run.add_argument("-o", "--output", type=Path, default=Path("startup.json"))
+    cmp = sub.add_parser("compare", help="phases that got slower between two reports")
+    cmp.add_argument("base", type=Path)
+    cmp.add_argument("new", type=Path)
+    cmp.add_argument("--threshold", type=float, default=0.10, help="relative slowdown")
+    cmp.add_argument("--min-seconds", type=float, default=0.05, help="absolute slowdown")
+    args = ap.parse_args()
+
+    if args.cmd == "compare":
+        try:
+            base, new = (json.loads(p.read_text()) for p in (args.base, args.new))
+        except (OSError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+        slower = compare(base, new, args.threshold, args.min_seconds)
+        print("\n".join(slower) if slower else "no startup regressions")
+        sys.exit(1 if slower else 0)
+
+    root = Path(__file__).resolve().parent.parent
+    cases = collect(args.paths, root)
+    if args.only:
+        cases = [c for c in cases if any(fnmatch.fnmatch(c.id, pat) for pat in args.only)]
+    if args.list:
+        for c in cases:
+            print(f"{c.id}\t{' '.join(c.args)}")
+        return
+    if args.gem5 is not None and shutil.which(args.gem5) is None:
+        sys.exit(f"Error: gem5 binary '{args.gem5}' not found")
+    results = bench(cases, args.gem5, args.repeat, args.warmup, args.timeout)
+    args.output.write_text(json.dumps({
+        "created": time.time(), "host": platform.node(), "cpus": os.cpu_count(),
+        "loadavg": os.getloadavg()[0], "repeat": args.repeat, "warmup": args.warmup,
+        "cases": results}, indent=2))
+    sys.stdout.write(table(results))
+    print(f"wrote {args.output}")
+
+
+if __name__ in ("__main__", "__m5_main__"):
+    main(under_gem5=__name__ == "__m5_main__")
@@ -0,0 +1,89 @@
+"""
+statdump.py — Stats dumps restricted to a whitelist of stat paths.
+
+m5.stats.dump() writes the whole stat tree. A sampled run dumps once per
+sample, so its stats.txt is (samples x tree) large, and post-processing
+reads all of it to use a dozen stats. `dump(patterns)` walks the same tree
+the same way, but hands only the stats whose path matches one of the glob
+patterns (fnmatch, e.g. "*.core.ipc", "board.cache_hierarchy.*.overallMisses")
+to the stats outputs. The blocks look like normal dumps, so
+simtools.statsfile and sample_estimator read them unchanged. Vector and
+distribution stats are matched by their name and written whole (with
+::total and the rest).
+
+Only the dumps that go through this module are filtered; the dump gem5
+does at exit, and any m5.stats.dump() call, stay complete.
+
+SAMPLE_STATS is what simtools.sample_estimator's default metrics and the
+SMARTS summaries need.
+
+Usage (in an exit-event generator)
+  from simtools.statdump import SAMPLE_STATS, dumper
+
+  dump_stats = dumper(SAMPLE_STATS)   # or dumper(None) for full dumps
+  ...
+  dump_stats()                        # instead of m5.stats.dump()
+"""
+
+import fnmatch
+import re
+from typing import Callable, Optional, Sequence
+
+SAMPLE_STATS = [
+    "sim*", "finalTick",
+    "*.core.numCycles", "*.core.commitStats0.numInsts", "*.core.committedInsts",
+    "*.core.ipc", "*.core.cpi",
+    "*.overallMisses", "*.overallAccesses", "*.m_demand_misses", "*.overall_misses",
+    "*.dram.bytesRead", "*.dram.bytesWritten", "*.bytesRead", "*.bytesWritten",
+    "*.branchPred.condIncorrect", "*.branchPred.condPredicted",
+]
+
+
+def compile_patterns(patterns: Sequence[str]) -> Callable[[str], bool]:
+    """One regex for all globs: path -> whether it is whitelisted."""
+    rx = re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+    return lambda path: rx.match(path) is not None
+
+
+def _visit(group, prefix: str, visitor, keep: Callable[[str], bool]) -> None:
+    # Same walk as m5.stats._dump_to_visitor, minus the stats not kept.
+    for stat in group.getStats():
+        if keep(prefix + stat.name):
+            stat.visit(visitor)
+    for name, sub in group.getStatGroups().items():
+        visitor.beginGroup(name)
+        _visit(sub, f"{prefix}{name}.", visitor, keep)
+        visitor.endGroup()
+
+
+def _dump_filtered(keep: Callable[[str], bool]) -> None:
+    import m5.stats
+    from m5.objects import Root
+
+    root = Root.getInstance()
+    # Formulas and derived stats are computed here, as in a full dump.
+    root.preDumpStats()
+    m5.stats.prepare()
+    for output in m5.stats.outputList:
+        if output.valid():
+            output.begin()
+            _visit(root, "", output, keep)
+            output.end()
+
+
+def dump(patterns: Optional[Sequence[str]] = None) -> None:
+    """m5.stats.dump(), or with patterns a dump of only the matching stats."""
+    if patterns:
+        _dump_filtered(compile_patterns(patterns))
+    else:
+        import m5.stats
+
+        m5.stats.dump()
+
+
+def dumper(patterns: Optional[Sequence[str]]) -> Callable[[], None]:
+    """A no-argument dump function for exit-event generators."""
+    if not patterns:
+        return dump
+    keep = compile_patterns(patterns)  # a bad pattern fails before the run
+    return lambda: _dump_filtered(keep)
@@ -0,0 +1,92 @@
+"""
+statsfile.py — Minimal reader for gem5 text stats (stats.txt).
+
+A stats.txt holds one block per m5.stats.dump(), delimited by the
+"Begin/End Simulation Statistics" banners. Blocks are returned in dump order
+as flat {stat_name: float} dicts, which is what the exercise parse.py
+scripts already work with.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+Number = float
+
+NUM_RE = re.compile(
+    r"^\s*([A-Za-z0-9_.:\-/\[\]]+)\s+([+-]?(?:\d+(?:\.\d*)?|\.\d+|inf|nan)(?:[eE][+-]?\d+)?)\b"
+)
+
+
+def _parse_block(lines: List[str]) -> Dict[str, Number]:
+    d: Dict[str, Number] = {}
+    for line in lines:
+        m = NUM_RE.match(line)
+        if not m:
+            continue
+        try:
+            d[m.group(1)] = float(m.group(2))
+        except ValueError:
+            pass
+    return d
+
+
+def load_blocks(stats_path: Path) -> List[Dict[str, Number]]:
+    """Split stats.txt into one dict per dump. Missing file -> []."""
+    stats_path = Path(stats_path)
+    if not stats_path.exists():
+        return []
+    blocks: List[List[str]] = []
+    cur: List[str] = []
+    with stats_path.open("r", errors="ignore") as f:
+        for line in f:
+            if "Begin Simulation Statistics" in line or "End Simulation Statistics" in line:
+                if cur:
+                    blocks.append(cur)
+                    cur = []
+                continue
+            cur.append(line)
+    if cur:
+        blocks.append(cur)
+    return [b for b in (_parse_block(lines) for lines in blocks) if b]
+
+
+def host_seconds(stats_path: Path) -> Optional[Number]:
+    """
+    Wall-clock seconds of a whole run.
+
+    hostSeconds counts from the last m5.stats.reset(), so a run that dumps
+    without resetting holds the time so far in every block. Blocks are
+    grouped by the tick their stats were last reset at (finalTick - simTicks);
+    the last block of each group counts, and the groups add up. Without
+    those two stats the blocks are summed, which over-counts cumulative dumps.
+    """
+    blocks = [b for b in load_blocks(stats_path) if "hostSeconds" in b]
+    if not blocks:
+        return None
+    if not all("finalTick" in b and "simTicks" in b for b in blocks):
+        return sum(b["hostSeconds"] for b in blocks)
+    since_reset: Dict[Number, Number] = {}
+    for b in blocks:
+        since_reset[b["finalTick"] - b["simTicks"]] = b["hostSeconds"]
+    return sum(since_reset.values())
+
+
+UNIT_RE = re.compile(r"#.*\((\(?[^()]*\)?)\)\s*$")
+
+
+def units(stats_path: Path) -> Dict[str, str]:
+    """Unit of every stat ("Count", "Tick/Count", "Ratio", ...) from the comments."""
+    out: Dict[str, str] = {}
+    stats_path = Path(stats_path)
+    if not stats_path.exists():
+        return out
+    with stats_path.open("r", errors="ignore") as f:
+        for line in f:
+            m = NUM_RE.match(line)
+            if not m or m.group(1) in out:
+                continue
+            u = UNIT_RE.search(line)
+            if u:
+                out[m.group(1)] = u.group(1).strip("()")
+    return out
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+sweep.py — Run the points of a sweep spec on a fixed pool of gem5 workers.
+
+The queue is ordered longest-job-first using the runtime model learned from
+the results database (simtools/runtime_model.py), which keeps the one 6-hour
+FS point from being started last and running alone at the end of a sweep.
+Every prediction is stored next to the measured runtime, see
+`python3 -m simtools.runtime_model report sweep.db`.
+
+Spec (JSON, paths relative to the spec file)
+  {
+    "gem5": "gem5-mesi",                 # default binary
+    "script": "p1.py",                   # default config script
+    "outroot": "log",                    # outdir = <outroot>/<point id>
+    "features": {"workload": "...", "cores": 1, "l2_size": "256kB"},
+    "extract": {"module": "parse.py", "csv": "results.csv"},
+    "points": [
+      {"id": "timing", "args": ["--cpu", "timing"], "features": {"cpu": "timing"}},
+      {"id": "o3_rob{rob}", "grid": {"rob": [64, 128, 192]},
+       "args": ["--cpu", "o3", "--rob", "{rob}"],
+       "features": {"cpu": "o3", "rob": "{rob}"}}
+    ]
+  }
+
+With "extract", each point is summarized the moment it finishes: a separate
+worker process loads the exercise's own parse script, calls its
+`row_for_outdir(outdir)`, and the row goes into the `rows` table of the
+results database. The CSV (columns from the script's `CSV_COLUMNS`) is
+rewritten from that table after every point, so partial summaries and plots
+are always current and the final `make parse` has nothing left to do.
+
+Points whose configuration is identical up to a switch point (the N-th
+ExitEvent, e.g. the 2nd m5 exit after a KVM boot) may declare a shared
+prefix, at the spec level or per point:
+
+    "prefix": {"at": "EXIT:2", "args": []}
+
+Points with the same binary, script, prefix args and switch point form one
+group: the prefix runs once with --take-checkpoint, then every point of the
+group restores from it with --restore-checkpoint (the script handles both
+via simtools/prefix.py). Checkpoints live in <outroot>/.prefix/<key> and
+are reused by later sweeps; the key also covers the script's contents and
+the binary's size and mtime, so editing the script or rebuilding gem5
+takes a new one. The prefix runs with the prefix args only, so options
+that change the board or processor (p4_1's --roi-pipeline, --cores) must
+be in "prefix": {"args": [...]} as well as in each point's args; the
+scripts refuse to restore a checkpoint taken with other values. Once taken, a prefix checkpoint's memory
+images are rewritten as plain sparse files (simtools/fastrestore.py), so
+each point's restore does not gunzip them again.
+
+With --prefetch, every resource the points use is fetched once up front
+(simtools/prefetch.py) so the workers never race to download the same disk
+image when they start together.
+
+Usage
+  python3 -m simtools.sweep sweep.json [--jobs N] [--only 'o3_*'] [--prefetch] [--dry-run]
+"""
+
+import argparse
+import csv
+import fnmatch
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from simtools.fastrestore import prepare as prepare_restore
+from simtools.resultsdb import ResultsDB
+from simtools.runtime_model import RuntimeModel
+from simtools.statsfile import host_seconds
+
+
+@dataclass
+class Prefix:
+    """The part of a point before its switch point; shared by equal keys."""
+    at: str
+    gem5: str
+    script: str
+    args: List[str]
+    outroot: str
+    stamp: str = ""  # identity of the script and binary, see _stamp()
+
+    @property
+    def key(self) -> str:
+        blob = json.dumps([self.gem5, self.script, self.args, self.at, self.stamp])
+        return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+    @property
+    def outdir(self) -> str:
+        return f"{self.outroot}/.prefix/{self.key}"
+
+    @property
+    def checkpoint(self) -> str:
+        return f"{self.outdir}/cpt"
+
+    def done(self, cwd: Path) -> bool:
+        return (cwd / self.checkpoint / "m5.cpt").exists()
+
+
+@dataclass
+class Point:
+    id: str
+    gem5: str
+    script: str
+    args: List[str]
+    outdir: str
+    features: Dict[str, Any] = field(default_factory=dict)
+    prefix: Optional[Prefix] = None
+
+    def command(self) -> List[str]:
+        extra = []
+        if self.prefix is not None:
+            extra = ["--prefix-at", self.prefix.at,
+                     "--restore-checkpoint", self.prefix.checkpoint]
+        return [self.gem5, "-re", f"--outdir={self.outdir}", self.script, *self.args, *extra]
+
+
+def prefix_job(prefix: Prefix, features: Dict[str, Any]) -> Point:
+    """The run that produces a prefix checkpoint, scheduled like any point."""
+    return Point(
+        id=f"prefix-{prefix.key}",
+        gem5=prefix.gem5,
+        script=prefix.script,
+        args=[*prefix.args, "--prefix-at", prefix.at, "--take-checkpoint", prefix.checkpoint],
+        outdir=prefix.outdir,
+        features={**features, "stage": "prefix"},
+    )
+
+
+def _stamp(base: Path, gem5: str, script: str) -> str:
+    """Script contents plus the binary's path, size and mtime (paths relative to base)."""
+    h = hashlib.sha1()
+    try:
+        h.update((base / script).read_bytes())
+    except OSError:
+        h.update(f"missing {script}".encode())
+    binary = shutil.which(str(base / gem5) if os.sep in gem5 else gem5)
+    if binary:
+        st = os.stat(binary)
+        h.update(f"{os.path.realpath(binary)}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()[:12]
+
+
+def _subst(value: Any, env: Dict[str, Any]) -> Any:
+    """Fill "{name}" placeholders from a grid assignment; a bare "{name}" keeps its type."""
+    if isinstance(value, str):
+        if value.startswith("{") and value.endswith("}") and value[1:-1] in env:
+            return env[value[1:-1]]
+        return value.format(**env) if env else value
+    if isinstance(value, list):
+        return [_subst(v, env) for v in value]
+    if isinstance(value, dict):
+        return {k: _subst(v, env) for k, v in value.items()}
+    return value
+
+
+def load_spec(path: Path) -> Tuple[Dict[str, Any], List[Point]]:
+    spec = json.loads(Path(path).read_text())
+    outroot = spec.get("outroot", "log")
+    points: List[Point] = []
+    stamps: Dict[Tuple[str, str], str] = {}
+    for entry in spec["points"]:
+        grid = entry.get("grid", {})
+        names = list(grid)
+        for values in itertools.product(*(grid[n] for n in names)):
+            env = dict(zip(names, values))
+            e = _subst({k: v for k, v in entry.items() if k != "grid"}, env)
+            pid = str(e["id"])
+            gem5 = e.get("gem5", spec.get("gem5", "gem5"))
+            script = e.get("script", spec.get("script"))
+            decl = e.get("prefix", spec.get("prefix"))
+            prefix = None
+            if decl:
+                pscript = decl.get("script", script)
+                if (gem5, pscript) not in stamps:
+                    stamps[gem5, pscript] = _stamp(Path(path).parent, gem5, pscript)
+                prefix = Prefix(at=decl["at"], gem5=gem5, script=pscript,
+                                args=[str(a) for a in decl.get("args", [])], outroot=outroot,
+                                stamp=stamps[gem5, pscript])
+            points.append(Point(
+                id=pid,
+                gem5=gem5,
+                script=script,
+                args=[str(a) for a in e.get("args", [])],
+                outdir=e.get("outdir", f"{outroot}/{pid}"),
+                features={**spec.get("features", {}), **e.get("features", {})},
+                prefix=prefix,
+            ))
+    ids = [p.id for p in points]
+    dup = {i for i in ids if ids.count(i) > 1}
+    if dup:
+        raise ValueError(f"duplicate point ids in {path}: {sorted(dup)}")
+    return spec, points
+
+
+def order_longest_first(points: List[Point], model: RuntimeModel
+                        ) -> List[Tuple[Point, Optional[float]]]:
+    """
+    Sort by predicted runtime, longest first. Points the model knows nothing
+    about go to the front: an unknown point is the likeliest straggler.
+    """
+    preds = [(p, model.predict(p.id, p.features)) for p in points]
+    unknown = [pp for pp in preds if pp[1] is None]
+    known = sorted((pp for pp in preds if pp[1] is not None), key=lambda pp: -pp[1])
+    return unknown + known
+
+
+def run_point(point: Point, cwd: Path) -> Tuple[int, float]:
+    """(exit status, seconds); a run that cannot start fails with 127."""
+    t0 = time.monotonic()
+    try:
+        Path(cwd, point.outdir).mkdir(parents=True, exist_ok=True)
+        proc = subprocess.run(point.command(), cwd=cwd)
+    except OSError as e:
+        print(f"[FAIL] {point.id}: could not start gem5: {e}", file=sys.stderr)
+        return 127, time.monotonic() - t0
+    return proc.returncode, time.monotonic() - t0
+
+
+def run_prefix(point: Point, checkpoint: str, cwd: Path) -> Tuple[int, float]:
+    """
+    A prefix run, then its checkpoint's memory images made plain in place
+    (simtools/fastrestore.py), in the same worker: gunzipping a multi-GB
+    image must not hold up the scheduler. The time is the gem5 run's only.
+    """
+    status, secs = run_point(point, cwd)
+    if status == 0 and (cwd / checkpoint / "m5.cpt").exists():
+        try:
+            prepare_restore(cwd / checkpoint, in_place=True)
+        except (OSError, EOFError) as e:  # the gzip stores still restore
+            print(f"[WARN] {point.id}: memory images left compressed: {e!r}", file=sys.stderr)
+    return status, secs
+
+
+_extractors: Dict[str, Any] = {}
+
+
+def extract_row(module_path: str, outdir: str) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """Extraction worker: (CSV_COLUMNS, row) from the exercise's parse script."""
+    mod = _extractors.get(module_path)
+    if mod is None:
+        spec = importlib.util.spec_from_file_location(
+            f"_sweep_extract{len(_extractors)}", module_path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _extractors[module_path] = mod
+    return list(mod.CSV_COLUMNS), mod.row_for_outdir(Path(outdir))
+
+
+def write_csv(path: Path, columns: List[str], rows: List[Dict[str, Any]]) -> None:
+    # Write-then-rename: a plot script reading the CSV never sees half a file.
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, path)
+
+
+def seed_from_logs(db: ResultsDB, points: List[Point], cwd: Path) -> int:
+    """Learn from outdirs that were produced by plain `make sweep` runs."""
+    known = {r["point"] for r in db.runs(ok_only=False)}
+    n = 0
+    for p in points:
+        if p.id in known:
+            continue
+        secs = host_seconds(cwd / p.outdir / "stats.txt")
+        if secs:
+            db.record_run(p.id, p.features, p.outdir, 0, secs)
+            n += 1
+    return n
+
+
+def prefetch_resources(spec: Dict[str, Any], spec_path: Path) -> int:
+    """Run simtools.prefetch under gem5 for everything the spec touches."""
+    root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    outdir = spec_path.resolve().parent / spec.get("outroot", "log") / ".prefetch"
+    cmd = [spec.get("gem5", "gem5"), "-re", f"--outdir={outdir}",
+           "-m", "simtools.prefetch", str(spec_path.resolve())]
+    return subprocess.run(cmd, env=env).returncode
+
+
+def run_sweep(points: List[Point], db: ResultsDB, cwd: Path, jobs: int,
+              order: str = "ljf", dry_run: bool = False,
+              extract: Optional[Dict[str, str]] = None) -> int:
+    model = RuntimeModel.from_db(db)
+    if order == "ljf":
+        queue = order_longest_first(points, model)
+    else:
+        queue = [(p, model.predict(p.id, p.features)) for p in points]
+
+    def fmt(s: Optional[float]) -> str:
+        return "?" if s is None else f"{s:.1f}s"
+
+    # Prefix runs go first: everything in their group waits for them.
+    groups: Dict[str, List[Point]] = {}
+    for p, _ in queue:
+        if p.prefix is not None:
+            groups.setdefault(p.prefix.key, []).append(p)
+    ready = {k for k, g in groups.items() if g[0].prefix.done(cwd)}
+    prefix_jobs: Dict[str, str] = {}
+    for k, g in groups.items():
+        if k not in ready:
+            job = prefix_job(g[0].prefix, g[0].features)
+            prefix_jobs[job.id] = k
+            queue.insert(len(prefix_jobs) - 1, (job, model.predict(job.id, job.features)))
+
+    print(f"== {len(queue)} runs, {jobs} workers, order={order} ({model.name})")
+    for p, pred in queue:
+        print(f"   {p.id:<30} predicted {fmt(pred)}")
+    for k, g in groups.items():
+        state = "cached" if k in ready else "to run"
+        print(f"   prefix {k} at {g[0].prefix.at} ({state}): {', '.join(p.id for p in g)}")
+    if dry_run:
+        return 0
+
+    failed = 0
+    # One extraction worker is plenty (parsing takes seconds, a point takes
+    # minutes) and keeps the parse scripts out of the scheduler's process.
+    extractor = (ProcessPoolExecutor(max_workers=1, initializer=os.chdir, initargs=(str(cwd),))
+                 if extract else None)
+
+    def runnable(p: Point) -> bool:
+        return p.prefix is None or p.prefix.key in ready
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        runs, parses = {}, {}
+        while queue or runs or parses:
+            # Submit only as many runs as there are workers, so a point
+            # whose prefix finishes later can still start ahead of the rest.
+            while len(runs) < jobs:
+                nxt = next((q for q in queue if runnable(q[0])), None)
+                if nxt is None:
+                    break
+                queue.remove(nxt)
+                p, pred = nxt
+                pred_id = db.record_prediction(p.id, model.name, pred)
+                if p.id in prefix_jobs:
+                    fut = pool.submit(run_prefix, p,
+                                      groups[prefix_jobs[p.id]][0].prefix.checkpoint, cwd)
+                else:
+                    fut = pool.submit(run_point, p, cwd)
+                runs[fut] = (p, pred, pred_id)
+            if not runs and not parses:
+                break
+            done, _ = wait(list(runs) + list(parses), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in parses:
+                    p = parses.pop(fut)
+                    try:
+                        columns, row = fut.result()
+                    except Exception as e:
+                        print(f"[WARN] {p.id}: extraction failed: {e!r}", file=sys.stderr)
+                        continue
+                    if row is not None:
+                        db.record_row(p.id, p.outdir, row)
+                        write_csv(cwd / extract["csv"], columns, db.rows())
+                    continue
+                p, pred, pred_id = runs.pop(fut)
+                status, secs = fut.result()
+                db.record_run(p.id, p.features, p.outdir, status, secs if status == 0 else None)
+                db.set_actual(pred_id, secs if status == 0 else None)
+                print(f"[{'done' if status == 0 else 'FAIL'}] {p.id}: {secs:.1f}s "
+                      f"(predicted {fmt(pred)}, exit {status})")
+                if p.id in prefix_jobs:
+                    k = prefix_jobs[p.id]
+                    if status == 0 and groups[k][0].prefix.done(cwd):
+                        ready.add(k)
+                    else:
+                        # No checkpoint, so nothing in the group can run.
+                        if status == 0:
+                            print(f"[FAIL] {p.id}: finished without writing a checkpoint")
+                        failed += 1
+                        for q in [q for q in queue if q[0] in groups[k]]:
+                            queue.remove(q)
+                            failed += 1
+                            print(f"[FAIL] {q[0].id}: prefix {k} failed")
+                    continue
+                if status != 0:
+                    failed += 1
+                elif extractor is not None:
+                    parses[extractor.submit(extract_row, extract["module"], p.outdir)] = p
+    if extractor is not None:
+        extractor.shutdown()
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("spec", type=Path, help="sweep spec (JSON)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--db", type=Path, help="results db (default: sweep.db next to the spec)")
+    ap.add_argument("--only", nargs="*", help="fnmatch patterns over point ids")
+    ap.add_argument("--order", choices=["ljf", "fifo"], default="ljf")
+    ap.add_argument("--seed-from-logs", action="store_true",
+                    help="import hostSeconds of existing outdirs into the db first")
+    ap.add_argument("--prefetch", action="store_true",
+                    help="fetch all resources the points use before starting workers")
+    ap.add_argument("--dry-run", action="store_true", help="only print the queue")
+    args = ap.parse_args()
+
+    cwd = args.spec.resolve().parent
+    spec, points = load_spec(args.spec)
+    if args.only:
+        points = [p for p in points if any(fnmatch.fnmatch(p.id, pat) for pat in args.only)]
+    db_path = args.db or cwd / spec.get("db", "sweep.db")
+
+    if not args.dry_run:
+        for gem5 in sorted({p.gem5 for p in points}):
+            if shutil.which(str(cwd / gem5) if os.sep in gem5 else gem5) is None:
+                sys.exit(f"Error: gem5 binary '{gem5}' not found")
+
+    if args.prefetch and not args.dry_run and prefetch_resources(spec, args.spec) != 0:
+        sys.exit("Resource prefetch failed; not starting the sweep.")
+
+    with ResultsDB(db_path) as db:
+        if args.seed_from_logs:
+            print(f"Seeded {seed_from_logs(db, points, cwd)} runs from existing outdirs.")
+        failed = run_sweep(points, db, cwd, max(1, args.jobs), args.order, args.dry_run,
+                           spec.get("extract"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
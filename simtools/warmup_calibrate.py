@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+warmup_calibrate.py — Find the shortest detailed warmup that is still safe.
+
+simpoint-run.py warms up for 1M instructions and SMARTS.py for W = 2U,
+both by rule of thumb. Calibration measures it instead, for one workload
+and one cache hierarchy:
+
+  - a few sample points (spread over the program, or given) each get
+    their unit of U instructions measured after detailed warmups of
+    W = 0, U, 2U, 4U, ... up to `max_warmup`; the longest one is the
+    reference;
+  - the fast-forward core runs through the program once, in this process.
+    At point - W it forks a child (simtools/forking.py, like pfsa.py) that
+    switches to the detailed core, warms up for W, measures U and writes
+    <outdir>/calibration/<point>-w<W>/{stats.txt,sample.json}; up to
+    `max_children` children run at the same time;
+  - per W, the CPI error against the reference is taken over all points.
+    The safe W is the shortest one from which on the largest error stays
+    within `tolerance` (1%) for every longer warmup, i.e. where the error
+    curve has flattened out. It goes to <outdir>/calibration.json.
+
+The W found applies to SMARTS-style sampling with the same starting core:
+pass it as --W to adaptive-SMARTS.py or pfsa-SMARTS.py, or set ideal_W in
+SMARTS.py. For SimPoint the warmup is part of the checkpoint position
+(warmup_interval in simpoint-checkpoint.py and simpoint-run.py).
+
+Usage (in the config script)
+  from simtools.warmup_calibrate import WarmupCalibration
+
+  cal = WarmupCalibration(processor, clock="3GHz", workload=binary_path, U=1000)
+  simulator = Simulator(board=board,
+                        on_exit_event={ExitEvent.SIMPOINT_BEGIN: cal.generator()})
+  cal.start()
+  cal.run(simulator)   # returns in the parent only, with calibration.json written
+
+Re-reading the samples, e.g. with another tolerance
+  python3 -m simtools.warmup_calibrate report m5out [--tolerance 0.005]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+TOLERANCE = 0.01
+
+
+def geometric(U: int, max_warmup: int) -> List[int]:
+    """0, U, 2U, 4U, ... up to and including max_warmup."""
+    out, w = [0], U
+    while w < max_warmup:
+        out.append(w)
+        w *= 2
+    return sorted(set(out + [max_warmup]))
+
+
+def spread(length: int, n: int) -> List[int]:
+    """n points in the middle of n equal slices of the program."""
+    return [int((i + 0.5) * length / n) for i in range(n)]
+
+
+# ---------- host side ----------
+
+def analyze(samples: Sequence[Dict[str, Any]], tolerance: float = TOLERANCE) -> Dict[str, Any]:
+    """Error per warmup length against the longest one, and the safe W."""
+    cpi: Dict[int, Dict[int, float]] = {}
+    for s in samples:
+        cpi.setdefault(s["point"], {})[s["W"]] = s["cpi"]
+    ws = sorted({s["W"] for s in samples})
+    if not ws:
+        raise ValueError("no calibration samples")
+    ref_w = ws[-1]
+    rows = []
+    for w in ws[:-1]:
+        errs = [abs(c[w] - c[ref_w]) / c[ref_w] for c in cpi.values()
+                if w in c and c.get(ref_w)]
+        rows.append({"W": w, "points": len(errs),
+                     "mean_error": sum(errs) / len(errs) if errs else None,
+                     "max_error": max(errs) if errs else None})
+    safe = ref_w
+    for row in reversed(rows):
+        if row["max_error"] is None or row["max_error"] > tolerance:
+            break
+        safe = row["W"]
+    return {"reference_W": ref_w, "tolerance": tolerance, "safe_W": safe,
+            "points": sorted(cpi), "errors": rows}
+
+
+def load_samples(outdir: Path) -> List[Dict[str, Any]]:
+    return [json.loads(f.read_text())
+            for f in sorted((Path(outdir) / "calibration").glob("*/sample.json"))]
+
+
+def print_table(result: Dict[str, Any]) -> None:
+    print(f"{'W':>8} {'points':>6} {'mean err%':>10} {'max err%':>9}")
+    for r in result["errors"]:
+        def pct(v):
+            return "-" if v is None else format(100 * v, ".3f")
+        mark = "  <- safe" if r["W"] == result["safe_W"] else ""
+        print(f"{r['W']:>8} {r['points']:>6} {pct(r['mean_error']):>10} "
+              f"{pct(r['max_error']):>9}{mark}")
+    print(f"{result['reference_W']:>8} {'(reference)':>17}")
+    print(f"safe W = {result['safe_W']} (max CPI error <= {100 * result['tolerance']:g}% "
+          f"from there on)")
+
+
+# ---------- gem5 side ----------
+
+class WarmupCalibration:
+    def __init__(self, processor, clock: str, workload=None, U: int = 1000,
+                 points: Optional[Sequence[int]] = None, samples: int = 5,
+                 max_warmup: Optional[int] = None, max_children: Optional[int] = None,
+                 tolerance: float = TOLERANCE):
+        """
+        :param points: instruction counts at which the measured units start;
+            default: `samples` points spread over the cached program length
+            (simtools.workload).
+        :param max_warmup: the reference warmup; default 64 * U.
+        """
+        from m5 import options
+        from m5.util.convert import toFrequency
+
+        from simtools import hostres
+        from simtools.forking import ForkedChildren
+        from simtools.workload import cached_length, workload_key
+
+        self.processor = processor
+        self.U = U
+        self.warmups = geometric(U, max_warmup or 64 * U)
+        if points is None:
+            length = cached_length(workload_key(workload)) if workload else None
+            if not length:
+                raise ValueError("no cached program length for this workload; pass points=")
+            points = spread(length, samples)
+        self.points = sorted(points)
+        if self.points[0] <= self.warmups[-1]:
+            raise ValueError(f"point {self.points[0]} is before the {self.warmups[-1]}-inst warmup")
+        # (fork instant, [(point, W), ...]) in program order
+        at: Dict[int, List[Tuple[int, int]]] = {}
+        for p in self.points:
+            for w in self.warmups:
+                at.setdefault(p - w, []).append((p, w))
+        self.schedule = sorted(at.items())
+        self.max_children = max_children or max(1, hostres.usable_cpus() - 1)
+        self.forks = ForkedChildren(self.max_children)
+        self.tolerance = tolerance
+        self.freq = toFrequency(clock)
+        self.root = Path(options.outdir)
+
+    def _sample_dir(self, point: int, w: int) -> Path:
+        return self.root / "calibration" / f"{point}-w{w}"
+
+    def start(self) -> None:
+        self.processor.get_cores()[0]._set_simpoint([self.schedule[0][0]], False)
+
+    def generator(self) -> Iterator[bool]:
+        for i, (at, group) in enumerate(self.schedule):
+            for point, w in group:
+                if self.forks.fork(self._sample_dir(point, w), job=(point, w)):
+                    yield from self._child(point, w)
+            if i + 1 < len(self.schedule):
+                self.processor.get_cores()[0]._set_simpoint([self.schedule[i + 1][0] - at], True)
+                yield False
+        # Every sample is forked; the rest of the program is not needed.
+        print("warmup calibration: all samples started")
+        while True:
+            yield True
+
+    def _child(self, point: int, w: int) -> Iterator[bool]:
+        import m5
+        from m5.ticks import fromSeconds
+
+        self.processor.switch()
+        m5.stats.reset()
+        if w:
+            self.processor.get_cores()[0]._set_simpoint([w, w + self.U], True)
+            yield False
+            m5.stats.reset()  # end of warmup
+        else:
+            self.processor.get_cores()[0]._set_simpoint([self.U], True)
+        t0 = m5.curTick()
+        yield False
+
+        cpi = (m5.curTick() - t0) / float(fromSeconds(1.0 / self.freq)) / self.U
+        m5.stats.dump()
+        (self._sample_dir(point, w) / "sample.json").write_text(json.dumps(
+            {"point": point, "W": w, "U": self.U, "cpi": cpi}))
+        print(f"warmup calibration: point {point}, W={w}: CPI={cpi:.4f}")
+        while True:
+            yield True
+
+    def run(self, simulator, *args, **kwargs) -> Optional[Dict[str, Any]]:
+        """simulator.run(); children exit after their sample, the parent analyzes."""
+        simulator.run(*args, **kwargs)
+        self.forks.exit_child()
+        self.forks.wait_all()
+        return self.finish()
+
+    def finish(self) -> Dict[str, Any]:
+        result = analyze(load_samples(self.root), self.tolerance)
+        result["U"] = self.U
+        result["failed_samples"] = [list(j) for j in sorted(self.forks.failed)]
+        (self.root / "calibration.json").write_text(json.dumps(result, indent=2))
+        print_table(result)
+        return result
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m simtools.warmup_calibrate")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("report", help="error per warmup length and the safe W")
+    rp.add_argument("outdir", type=Path, help="outdir of a calibration run")
+    rp.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="largest acceptable relative CPI error (default 0.01)")
+    rp.add_argument("--json", type=Path, help="also write the result as JSON")
+    args = ap.parse_args()
+
+    try:
+        result = analyze(load_samples(args.outdir), args.tolerance)
+    except ValueError as e:
+        sys.exit(f"{args.outdir}: {e}")
+    print_table(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
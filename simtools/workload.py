@@ -0,0 +1,54 @@
+"""
+workload.py — Identify an SE binary and remember its program length.
+
+A binary is keyed by its resolved path, size and mtime, so a rebuild gets a
+new key. The committed instruction count of a finished run is cached per
+key in <GEM5_RESOURCE_DIR or ~/.cache/gem5>/simtools-program-lengths.json;
+the samplers size their sampling period from it instead of a typed-in
+program length.
+
+Usage
+  from simtools.workload import cache_length, cached_length, workload_key
+
+  key = workload_key(binary_path)
+  length = cached_length(key)          # None until a run has recorded it
+  ...
+  cache_length(key, committed_insts)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+
+def _cache_path() -> Path:
+    base = os.environ.get("GEM5_RESOURCE_DIR") or Path.home() / ".cache" / "gem5"
+    return Path(base) / "simtools-program-lengths.json"
+
+
+def workload_key(path) -> str:
+    """A binary is identified by path, size and mtime (a rebuild invalidates)."""
+    p = Path(path).resolve()
+    st = p.stat()
+    return f"{p}@{st.st_size}:{int(st.st_mtime)}"
+
+
+def cached_length(key: str) -> Optional[int]:
+    try:
+        return json.loads(_cache_path().read_text()).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_length(key: str, length: int) -> None:
+    path = _cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        known = json.loads(path.read_text())
+    except (OSError, ValueError):
+        known = {}
+    known[key] = length
+    tmp = path.with_name(path.name + f".{os.getpid()}")
+    tmp.write_text(json.dumps(known, indent=1, sort_keys=True))
+    os.replace(tmp, path)